@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# MCP Inspector - stand-in MCP server for benchmarks
+# Author: Manjesh S
+#
+# Serves the Streamable HTTP transport closely enough for the inspector's
+# send paths. Modes:
+#
+#   json  - every POST is answered inline with a 200 JSON reply
+#   sse   - calls get 202 Accepted and the reply is pushed on the GET stream
+#   slow  - like sse, but tools/call emits progress events for a while first
+#
+# --inventory-size generates that many tools, resources and prompts, listed
+# --page-size at a time with nextCursor. --call-delay makes every tools/call
+# take that long; with --serialize a session works on one call at a time,
+# like servers that process each session's calls in order.
+#
+# Run standalone:  python bench/mock_server.py --mode sse --port 8000
+
+import argparse
+import itertools
+import json
+import threading
+import time
+
+try:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+
+MODES = ("json", "sse", "slow")
+
+
+class _Session(object):
+    """Outgoing SSE events for one Mcp-Session-Id."""
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+
+    def push(self, event_type, payload):
+        self.events.put((event_type, json.dumps(payload)))
+
+
+class MockMCPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, address, mode="json", progress_steps=5, progress_interval=0.05,
+                 inventory_size=1, page_size=100, call_delay=0.0, serialize=False):
+        if mode not in MODES:
+            raise ValueError("Unknown mode: %s" % mode)
+        HTTPServer.__init__(self, address, _MockHandler)
+        self.mode = mode
+        self.progress_steps = progress_steps
+        self.progress_interval = progress_interval
+        self.inventory_size = inventory_size
+        self.page_size = page_size
+        self.call_delay = call_delay
+        self.serialize = serialize
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+        self._session_ids = itertools.count(1)
+
+    @property
+    def url(self):
+        return "http://%s:%d/mcp" % self.server_address[:2]
+
+    def new_session(self):
+        with self.sessions_lock:
+            session_id = "bench-%d" % next(self._session_ids)
+            self.sessions[session_id] = _Session()
+        return session_id
+
+    def session(self, session_id):
+        with self.sessions_lock:
+            return self.sessions.get(session_id)
+
+    def start(self):
+        t = threading.Thread(target=self.serve_forever, name="mock-mcp")
+        t.daemon = True
+        t.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            message = json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            self._send_json(400, {"error": "Invalid JSON"})
+            return
+
+        server = self.server
+        session_id = self.headers.get("Mcp-Session-Id")
+        batch = isinstance(message, list)
+        messages = message if batch else [message]
+        calls = [m for m in messages if isinstance(m, dict) and "id" in m]
+
+        if any(m.get("method") == "initialize" for m in calls):
+            session_id = server.new_session()
+            self._send_json(200, [self._reply(m) for m in calls] if batch else self._reply(calls[0]),
+                            session_id)
+            return
+
+        session = server.session(session_id) if session_id else None
+        self._work(session, calls)
+        if server.mode == "json" or session is None:
+            if not calls:
+                self._send_empty(202)
+            elif batch:
+                self._send_json(200, [self._reply(m) for m in calls])
+            else:
+                self._send_json(200, self._reply(calls[0]))
+            return
+
+        self._send_empty(202)
+        for call in calls:
+            if server.mode == "slow" and call.get("method") == "tools/call":
+                t = threading.Thread(target=self._slow_call, args=(session, call))
+                t.daemon = True
+                t.start()
+            else:
+                session.push(None, self._reply(call))
+
+    def do_GET(self):
+        session = self.server.session(self.headers.get("Mcp-Session-Id"))
+        if session is None or self.server.mode == "json":
+            self._send_empty(405)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                try:
+                    event_type, data = session.events.get(timeout=15)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    continue
+                frame = "data: %s\n\n" % data
+                if event_type:
+                    frame = "event: %s\n%s" % (event_type, frame)
+                self.wfile.write(frame.encode("utf-8"))
+                self.wfile.flush()
+        except (IOError, OSError):
+            pass
+
+    def _work(self, session, calls):
+        """Spend call_delay per tools/call, one call at a time per session with serialize."""
+        delay = self.server.call_delay * sum(1 for c in calls if c.get("method") == "tools/call")
+        if not delay:
+            return
+        if self.server.serialize and session is not None:
+            with session.lock:
+                time.sleep(delay)
+        else:
+            time.sleep(delay)
+
+    def _slow_call(self, session, call):
+        for step in range(self.server.progress_steps):
+            time.sleep(self.server.progress_interval)
+            session.push("progress", {"id": call["id"], "progress": step + 1,
+                                      "total": self.server.progress_steps})
+        session.push(None, self._reply(call))
+
+    def _reply(self, call):
+        method = call.get("method")
+        if method == "initialize":
+            result = {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {"tools": {}, "resources": {}, "prompts": {}},
+                "serverInfo": {"name": "mcp-bench", "version": "1.0"}
+            }
+        elif method in ("tools/list", "resources/list", "prompts/list"):
+            result = self._list_page(method.split("/")[0], call.get("params") or {})
+        else:
+            result = {"content": [{"type": "text", "text": json.dumps(call.get("params", {}))}]}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": result}
+
+    def _list_page(self, kind, params):
+        """One page of a generated inventory, with nextCursor while more remain."""
+        start = int(params.get("cursor") or 0)
+        end = min(start + self.server.page_size, self.server.inventory_size)
+        items = [self._inventory_item(kind, i) for i in range(start, end)]
+        result = {kind: items}
+        if end < self.server.inventory_size:
+            result["nextCursor"] = str(end)
+        return result
+
+    def _inventory_item(self, kind, i):
+        if kind == "tools":
+            return {"name": "echo" if i == 0 else "tool_%05d" % i,
+                    "description": "Echo the arguments" if i == 0 else "Generated tool %d" % i,
+                    "inputSchema": {"type": "object", "properties": {"text": {"type": "string"}}}}
+        if kind == "resources":
+            return {"uri": "file:///bench/%05d.txt" % i, "name": "resource_%05d" % i,
+                    "mimeType": "text/plain"}
+        return {"name": "prompt_%05d" % i, "arguments": [{"name": "topic", "required": False}]}
+
+    def _send_json(self, status, payload, session_id=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if session_id:
+            self.send_header("Mcp-Session-Id", session_id)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in MCP server for benchmarks")
+    parser.add_argument("--mode", choices=MODES, default="json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--progress-steps", type=int, default=5)
+    parser.add_argument("--progress-interval", type=float, default=0.05)
+    parser.add_argument("--inventory-size", type=int, default=1,
+                        help="number of tools, resources and prompts to list")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--call-delay", type=float, default=0.0, help="seconds each tools/call takes")
+    parser.add_argument("--serialize", action="store_true", help="one tools/call at a time per session")
+    args = parser.parse_args()
+
+    server = MockMCPServer((args.host, args.port), args.mode,
+                           args.progress_steps, args.progress_interval,
+                           args.inventory_size, args.page_size,
+                           args.call_delay, args.serialize)
+    print("Mock MCP server (%s mode) on %s" % (args.mode, server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
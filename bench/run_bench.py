@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+# MCP Inspector - load driver for the headless core
+# Author: Manjesh S
+#
+# Drives MCPClient and VirtualProxyServer against bench/mock_server.py and
+# reports throughput and latency percentiles for each send path:
+#
+#   async  - send_request_async, inline 200 JSON replies
+#   sync   - send_request_sync, inline 200 JSON replies
+#   sse    - send_request_async, 202 Accepted and delivery over the SSE listener
+#   slow   - send_request_async, progress events before the SSE reply
+#   proxy  - HTTP keep-alive clients through the Virtual Proxy (inline replies)
+#   bridge - the same calls sent as a Burp tool through the in-process BurpBridge
+#   list   - full cursor-paginated tools/list enumerations (one latency each)
+#
+# --sessions opens a SessionPool and spreads the async, sse, slow and proxy
+# paths over it; pair it with --call-delay and --serialize to model a server
+# that handles one call at a time per session. Given several sizes, those
+# paths run once per size and pool runs are reported as e.g. "async/s4".
+#
+# Every path runs --repeat times, in rounds over all paths so drift in the
+# machine's speed hits each path alike, and the median of each figure is
+# reported; one noisy run neither fails nor hides a regression.
+#
+# Examples:
+#   python bench/run_bench.py
+#   python bench/run_bench.py --sessions 1,4 --repeat 9 --save v2.1
+#   python bench/run_bench.py --paths async --call-delay 0.01 --serialize --sessions 8
+#   python bench/run_bench.py --compare bench/baselines/v2.1.json
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fake_burp import FakeCallbacks
+from mcp_core import MCPConfig, MCPClient, VirtualProxyServer, BurpBridge, SessionPool
+from mock_server import MockMCPServer
+
+PATHS = ("async", "sync", "sse", "slow", "proxy", "bridge", "list")
+SERVER_MODES = {"async": "json", "sync": "json", "sse": "sse", "slow": "slow", "proxy": "json",
+                "bridge": "json", "list": "json"}
+# Paths whose calls go through the SessionPool
+POOLED_PATHS = ("async", "sse", "slow", "proxy")
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000.0, 3)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+class Recorder(object):
+    """Collects per-request latencies from any number of threads."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, started, ok):
+        elapsed = time.time() - started
+        with self._lock:
+            if ok:
+                self.latencies.append(elapsed)
+            else:
+                self.errors += 1
+
+
+def _call_params(i):
+    return {"name": "echo", "arguments": {"text": "bench-%d" % i}}
+
+
+def run_async(client, requests, concurrency):
+    """Keep ``concurrency`` calls in flight through send_request_async."""
+    recorder = Recorder()
+    slots = threading.Semaphore(concurrency)
+    done = threading.Event()
+    remaining = [requests]
+    remaining_lock = threading.Lock()
+
+    def make_callback(started):
+        def on_response(resp):
+            recorder.record(started, isinstance(resp, dict) and "result" in resp)
+            slots.release()
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    done.set()
+        return on_response
+
+    started_all = time.time()
+    for i in range(requests):
+        slots.acquire()
+        started = time.time()
+        client.send_request_async("tools/call", _call_params(i), make_callback(started))
+    done.wait()
+    return recorder, time.time() - started_all
+
+
+def run_sync(client, requests, concurrency):
+    """``concurrency`` threads each issuing send_request_sync back to back."""
+    recorder = Recorder()
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+
+    def worker():
+        while True:
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.time()
+            resp = client.send_request_sync("tools/call", _call_params(i))
+            recorder.record(started, "result" in resp)
+
+    started_all = time.time()
+    _run_threads(worker, concurrency)
+    return recorder, time.time() - started_all
+
+
+def run_proxy(proxy, requests, concurrency):
+    """``concurrency`` keep-alive HTTP clients posting JSON-RPC to the proxy."""
+    recorder = Recorder()
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+
+    def worker():
+        conn = httplib.HTTPConnection("127.0.0.1", proxy.port, timeout=60)
+        try:
+            while True:
+                with counter_lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                body = json.dumps({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                                   "params": _call_params(i)})
+                started = time.time()
+                try:
+                    conn.request("POST", "/", body, {"Content-Type": "application/json"})
+                    resp = conn.getresponse()
+                    ok = resp.status == 200 and json.loads(resp.read().decode("utf-8")).get("id") == i
+                except Exception:
+                    conn.close()
+                    conn = httplib.HTTPConnection("127.0.0.1", proxy.port, timeout=60)
+                    ok = False
+                recorder.record(started, ok)
+        finally:
+            conn.close()
+
+    started_all = time.time()
+    _run_threads(worker, concurrency)
+    return recorder, time.time() - started_all
+
+
+class _BridgeListener(object):
+
+    def __init__(self, bridge):
+        self.bridge = bridge
+
+    def processHttpMessage(self, tool_flag, is_request, message_info):
+        self.bridge.process_http_message(tool_flag, is_request, message_info)
+
+
+def run_bridge(callbacks, requests, concurrency):
+    """``concurrency`` Repeater-style senders whose requests the BurpBridge rewrites."""
+    recorder = Recorder()
+    counter = iter(range(requests))
+    counter_lock = threading.Lock()
+    helpers = callbacks.getHelpers()
+    # Never contacted: the bridge redirects every marked request upstream
+    service = helpers.buildHttpService("127.0.0.1", 8899, False)
+
+    def worker():
+        while True:
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            body = json.dumps({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                               "params": _call_params(i)})
+            request = ("POST / HTTP/1.1\r\nHost: 127.0.0.1:8899\r\nContent-Type: application/json\r\n"
+                       "%s: 1\r\nContent-Length: %d\r\n\r\n%s" % (BurpBridge.MARKER, len(body), body))
+            started = time.time()
+            try:
+                response = callbacks.send_from_tool(callbacks.TOOL_REPEATER, service, request).getResponse()
+                head, _, payload = response.partition(b"\r\n\r\n")
+                ok = head.startswith(b"HTTP/1.1 200") and json.loads(payload.decode("utf-8")).get("id") == i
+            except Exception:
+                ok = False
+            recorder.record(started, ok)
+
+    started_all = time.time()
+    _run_threads(worker, concurrency)
+    return recorder, time.time() - started_all
+
+
+def run_list(client, runs, expected):
+    """Enumerate every tool page by page, ``runs`` times in a row."""
+    recorder = Recorder()
+    started_all = time.time()
+    for _ in range(runs):
+        done = threading.Event()
+        outcome = []
+        started = time.time()
+        client.list_all("tools/list", "tools", lambda items: None,
+                        lambda total, error: (outcome.append(total == expected and not error), done.set()))
+        done.wait()
+        recorder.record(started, outcome[0])
+    return recorder, time.time() - started_all
+
+
+def _run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def bench_path(path, args, session_count):
+    server = MockMCPServer(("127.0.0.1", 0), SERVER_MODES[path],
+                           args.progress_steps, args.progress_interval,
+                           args.inventory_size, args.page_size,
+                           args.call_delay, args.serialize).start()
+    config = MCPConfig(server.url,
+                       use_connection_pool=not args.no_pool,
+                       pool_size=max(args.concurrency, 1),
+                       executor_workers=max(args.concurrency, 1),
+                       executor_queue_depth=max(args.requests, 1000),
+                       request_timeout=args.timeout,
+                       cache_enabled=False,
+                       burp_bridge=path == "bridge")
+    callbacks = FakeCallbacks(quiet=True, timeout=args.timeout)
+    client = MCPClient(config, callbacks)
+    sessions = SessionPool(client)
+    proxy = None
+    try:
+        resp = client.initialize()
+        if "result" not in resp:
+            raise RuntimeError("initialize failed: %s" % resp)
+        sessions.open(session_count)
+        if path in ("sse", "slow"):
+            for member in sessions.members:
+                _wait_for_sse(member)
+
+        requests = args.requests
+        if path == "slow":
+            requests = max(1, requests // 10)
+        elif path == "list":
+            requests = max(1, requests // 20)
+
+        if path == "sync":
+            recorder, elapsed = run_sync(client, requests, args.concurrency)
+        elif path == "list":
+            recorder, elapsed = run_list(client, requests, args.inventory_size)
+        elif path == "proxy":
+            proxy = VirtualProxyServer(client, config, sessions=sessions)
+            proxy.start(0)
+            recorder, elapsed = run_proxy(proxy, requests, args.concurrency)
+        elif path == "bridge":
+            callbacks.registerHttpListener(_BridgeListener(BurpBridge(client, config, callbacks.getHelpers())))
+            recorder, elapsed = run_bridge(callbacks, requests, args.concurrency)
+        else:
+            recorder, elapsed = run_async(sessions, requests, args.concurrency)
+        return summarize(recorder.latencies, recorder.errors, elapsed)
+    finally:
+        if proxy:
+            proxy.shutdown()
+        sessions.close()
+        client.shutdown()
+        server.stop()
+
+
+def median_result(runs):
+    """The median of each figure over repeated runs of one path, with every run's errors."""
+    result = {}
+    for key in runs[0]:
+        values = sorted(r[key] for r in runs)
+        result[key] = values[len(values) // 2]
+    result["errors"] = sum(r["errors"] for r in runs)
+    result["repeats"] = len(runs)
+    return result
+
+
+def _wait_for_sse(client, timeout=5):
+    deadline = time.time() + timeout
+    while client.sse_socket is None and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def compare(results, baseline, threshold):
+    """Return (lines, regressed) comparing throughput and p95 against a baseline."""
+    lines = []
+    regressed = False
+    for path, current in sorted(results.items()):
+        base = baseline.get("results", {}).get(path)
+        if not base:
+            lines.append("%-9s no baseline" % path)
+            continue
+        rps_change = _change(current["throughput_rps"], base["throughput_rps"])
+        p95_change = _change(current["p95_ms"], base["p95_ms"])
+        bad = rps_change < -threshold or p95_change > threshold
+        regressed = regressed or bad
+        lines.append("%-9s rps %+6.1f%%  p95 %+6.1f%%  %s" % (
+            path, rps_change * 100, p95_change * 100, "REGRESSION" if bad else "ok"))
+    return lines, regressed
+
+
+def _change(current, base):
+    if not base:
+        return 0.0
+    return (current - base) / float(base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MCP Inspector core against a mock server")
+    parser.add_argument("--paths", default=",".join(PATHS),
+                        help="comma-separated subset of: %s" % ", ".join(PATHS))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=int, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--no-pool", action="store_true",
+                        help="send through FakeCallbacks.makeHttpRequest instead of the connection pool")
+    parser.add_argument("--progress-steps", type=int, default=5)
+    parser.add_argument("--progress-interval", type=float, default=0.02)
+    parser.add_argument("--inventory-size", type=int, default=2000, help="tools listed by the list path")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--sessions",
+                        help="comma-separated MCP session pool sizes to spread calls over "
+                             "(default 1, or the sizes in the --compare baseline)")
+    parser.add_argument("--call-delay", type=float, default=0.0, help="mock server seconds per tools/call")
+    parser.add_argument("--serialize", action="store_true",
+                        help="mock server handles one tools/call at a time per session")
+    parser.add_argument("--save", metavar="NAME", help="write results to bench/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="FILE", help="baseline JSON to compare against")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per path; the median of each figure is reported (default 5)")
+    parser.add_argument("--threshold", type=float, default=0.4,
+                        help="allowed relative drop in throughput / rise in p95 (default 0.4)")
+    args = parser.parse_args()
+
+    paths = [p.strip() for p in args.paths.split(",") if p.strip()]
+    for path in paths:
+        if path not in PATHS:
+            parser.error("unknown path: %s" % path)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    if args.sessions is None:
+        sizes = (baseline or {}).get("settings", {}).get("sessions", 1)
+        args.sessions = ",".join(str(n) for n in (sizes if isinstance(sizes, list) else [sizes]))
+    try:
+        session_counts = [int(n) for n in args.sessions.split(",") if n.strip()]
+    except ValueError:
+        parser.error("--sessions takes comma-separated integers")
+    if not session_counts or min(session_counts) < 1:
+        parser.error("--sessions needs at least one size of 1 or more")
+
+    runs = []
+    for path in paths:
+        for count in (session_counts if path in POOLED_PATHS else [1]):
+            runs.append((path if count == 1 else "%s/s%d" % (path, count), path, count))
+
+    samples = dict((name, []) for name, _, _ in runs)
+    for _ in range(max(1, args.repeat)):
+        for name, path, count in runs:
+            samples[name].append(bench_path(path, args, count))
+
+    results = {}
+    print("%-9s %8s %7s %10s %9s %9s %9s" % ("path", "requests", "errors", "rps", "p50 ms", "p95 ms", "p99 ms"))
+    for name, _, _ in runs:
+        r = results[name] = median_result(samples[name])
+        print("%-9s %8d %7d %10.1f %9.2f %9.2f %9.2f" % (
+            name, r["requests"], r["errors"], r["throughput_rps"], r["p50_ms"], r["p95_ms"], r["p99_ms"]))
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_implementation() + " " + platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {"requests": args.requests, "concurrency": args.concurrency,
+                     "connection_pool": not args.no_pool,
+                     "progress_steps": args.progress_steps,
+                     "progress_interval": args.progress_interval,
+                     "inventory_size": args.inventory_size, "page_size": args.page_size,
+                     "sessions": session_counts, "call_delay": args.call_delay,
+                     "serialize": args.serialize, "repeat": args.repeat},
+        "results": results,
+    }
+
+    if args.save:
+        if not os.path.isdir(BASELINE_DIR):
+            os.makedirs(BASELINE_DIR)
+        out = os.path.join(BASELINE_DIR, args.save + ".json")
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Saved %s" % out)
+
+    if baseline is not None:
+        lines, regressed = compare(results, baseline, args.threshold)
+        print("\nAgainst %s:" % args.compare)
+        for line in lines:
+            print("  " + line)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+# MCP Inspector - minimal stand-in for Burp's extender API
+# Author: Manjesh S
+#
+# Just enough of IBurpExtenderCallbacks / IExtensionHelpers for mcp_core to
+# run outside Burp, e.g. benchmarks and scripted checks on a plain Python:
+#
+#     from fake_burp import FakeCallbacks
+#     from mcp_core import MCPConfig, MCPClient
+#
+#     client = MCPClient(MCPConfig("http://127.0.0.1:8000/mcp"), FakeCallbacks())
+#     client.initialize()
+
+import socket
+import ssl
+import sys
+
+
+class FakeHttpService(object):
+
+    def __init__(self, host, port, is_https):
+        self.host = host
+        self.port = port
+        self.is_https = is_https
+
+    def getHost(self):
+        return self.host
+
+    def getPort(self):
+        return self.port
+
+    def getProtocol(self):
+        return "https" if self.is_https else "http"
+
+
+class FakeResponseInfo(object):
+
+    def __init__(self, headers, status_code, body_offset):
+        self._headers = headers
+        self._status_code = status_code
+        self._body_offset = body_offset
+
+    def getHeaders(self):
+        return self._headers
+
+    def getStatusCode(self):
+        return self._status_code
+
+    def getBodyOffset(self):
+        return self._body_offset
+
+
+class FakeRequestInfo(object):
+
+    def __init__(self, headers, body_offset):
+        self._headers = headers
+        self._body_offset = body_offset
+
+    def getHeaders(self):
+        return self._headers
+
+    def getMethod(self):
+        return self._headers[0].split(" ")[0] if self._headers else ""
+
+    def getBodyOffset(self):
+        return self._body_offset
+
+
+class FakeRequestResponse(object):
+
+    def __init__(self, http_service, request, response):
+        self._http_service = http_service
+        self._request = request
+        self._response = response
+
+    def getHttpService(self):
+        return self._http_service
+
+    def setHttpService(self, http_service):
+        self._http_service = http_service
+
+    def getRequest(self):
+        return self._request
+
+    def setRequest(self, request):
+        self._request = request
+
+    def getResponse(self):
+        return self._response
+
+    def setResponse(self, response):
+        self._response = response
+
+
+class FakeHelpers(object):
+    """Byte arrays are plain byte strings, converted as ISO-8859-1 like Burp does."""
+
+    def buildHttpService(self, host, port, is_https):
+        return FakeHttpService(host, port, is_https)
+
+    def stringToBytes(self, text):
+        if isinstance(text, bytes):
+            return text
+        return text.encode("iso-8859-1", "replace")
+
+    def bytesToString(self, data):
+        if isinstance(data, str):
+            return data
+        return bytes(data).decode("iso-8859-1")
+
+    def _split_head(self, message):
+        data = self.stringToBytes(message)
+        head_end = data.find(b"\r\n\r\n")
+        if head_end < 0:
+            head, body_offset = data, len(data)
+        else:
+            head, body_offset = data[:head_end], head_end + 4
+        return head.decode("iso-8859-1").split("\r\n"), body_offset
+
+    def analyzeRequest(self, request):
+        headers, body_offset = self._split_head(request)
+        return FakeRequestInfo(headers, body_offset)
+
+    def analyzeResponse(self, response):
+        headers, body_offset = self._split_head(response)
+        try:
+            status_code = int(headers[0].split(" ")[1])
+        except (IndexError, ValueError):
+            status_code = 0
+        return FakeResponseInfo(headers, status_code, body_offset)
+
+
+class FakeCallbacks(object):
+    """Records what an extension registers and performs makeHttpRequest for real.
+
+    ``makeHttpRequest`` sends the raw request over a fresh socket and reads
+    the response up to its Content-Length, or until the server closes the
+    connection. Like Burp, it passes the message
+    through registered HTTP listeners (as ``TOOL_EXTENDER``) before sending
+    and after the response arrives; ``send_from_tool`` does the same for
+    another tool's flag, e.g. to act as Repeater. Output goes to
+    stdout/stderr unless ``quiet`` is set.
+    """
+
+    TOOL_REPEATER = 64
+    TOOL_EXTENDER = 1024
+
+    def __init__(self, quiet=False, timeout=30):
+        self.quiet = quiet
+        self.timeout = timeout
+        self.extension_name = None
+        self.state_listeners = []
+        self.http_listeners = []
+        self.suite_tabs = []
+        self.repeater_requests = []
+        self._helpers = FakeHelpers()
+
+    def getHelpers(self):
+        return self._helpers
+
+    def setExtensionName(self, name):
+        self.extension_name = name
+
+    def registerExtensionStateListener(self, listener):
+        self.state_listeners.append(listener)
+
+    def registerHttpListener(self, listener):
+        self.http_listeners.append(listener)
+
+    def addSuiteTab(self, tab):
+        self.suite_tabs.append(tab)
+
+    def printOutput(self, output):
+        if not self.quiet:
+            sys.stdout.write("%s\n" % output)
+
+    def printError(self, error):
+        if not self.quiet:
+            sys.stderr.write("%s\n" % error)
+
+    def sendToRepeater(self, host, port, use_https, request, tab_caption):
+        self.repeater_requests.append((host, port, use_https, request, tab_caption))
+
+    def makeHttpRequest(self, http_service, request):
+        return self.send_from_tool(self.TOOL_EXTENDER, http_service, request)
+
+    def send_from_tool(self, tool_flag, http_service, request):
+        message = FakeRequestResponse(http_service, request, None)
+        for listener in self.http_listeners:
+            listener.processHttpMessage(tool_flag, True, message)
+        message.setResponse(self._send(message.getHttpService(), message.getRequest()))
+        for listener in self.http_listeners:
+            listener.processHttpMessage(tool_flag, False, message)
+        return message
+
+    def _send(self, http_service, request):
+        sock = socket.create_connection((http_service.getHost(), http_service.getPort()), self.timeout)
+        try:
+            if http_service.getProtocol() == "https":
+                context = ssl.create_default_context()
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+                sock = context.wrap_socket(sock, server_hostname=http_service.getHost())
+            sock.sendall(self._helpers.stringToBytes(request))
+            data = b""
+            expected = None
+            while expected is None or len(data) < expected:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+                if expected is None and b"\r\n\r\n" in data:
+                    expected = self._response_length(data)
+        finally:
+            sock.close()
+        return data or None
+
+    def _response_length(self, data):
+        """Full length of a response whose head has arrived, if Content-Length gives it."""
+        headers, body_offset = self._helpers._split_head(data)
+        for header in headers[1:]:
+            name, _, value = header.partition(":")
+            if name.strip().lower() == "content-length":
+                return body_offset + int(value.strip())
+        return None
@@ -0,0 +1,3684 @@
+# -*- coding: utf-8 -*-
+# MCP Inspector - headless MCP client core
+# Author: Manjesh S
+#
+# Everything here runs under Jython (inside Burp) and CPython alike: session
+# state, the send paths, SSE handling, pending requests and the Virtual Proxy.
+# The Swing tab in mcp_inspector.py is a view on top of MCPClient.
+
+import json
+import re
+import threading
+import traceback
+import time
+import socket
+import ssl
+import heapq
+import itertools
+import os
+import binascii
+import bisect
+import collections
+import tempfile
+import hashlib
+import zlib
+import email.utils
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+try:
+    _string_types = basestring
+except NameError:
+    _string_types = str
+
+
+class _PooledHTTPConnection(httplib.HTTPConnection):
+    """HTTPConnection with a separate connect timeout and TCP_NODELAY."""
+
+    def __init__(self, host, port, connect_timeout, read_timeout):
+        httplib.HTTPConnection.__init__(self, host, port, timeout=read_timeout)
+        self.connect_timeout = connect_timeout
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), self.connect_timeout)
+        self.sock.settimeout(self.timeout)
+        try:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except Exception:
+            pass
+
+
+class _PooledHTTPSConnection(httplib.HTTPSConnection):
+    """HTTPSConnection that shares one SSL context and resumes TLS sessions."""
+
+    def __init__(self, host, port, connect_timeout, read_timeout, context, session_cache):
+        httplib.HTTPSConnection.__init__(self, host, port, timeout=read_timeout, context=context)
+        self.connect_timeout = connect_timeout
+        self.pool_context = context
+        self.session_cache = session_cache
+
+    def connect(self):
+        sock = socket.create_connection((self.host, self.port), self.connect_timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except Exception:
+            pass
+        key = (self.host, self.port)
+        session = self.session_cache.get(key)
+        try:
+            self.sock = self.pool_context.wrap_socket(sock, server_hostname=self.host, session=session)
+        except TypeError:
+            # Jython and older Pythons resume sessions from the context's own cache
+            self.sock = self.pool_context.wrap_socket(sock, server_hostname=self.host)
+        self.sock.settimeout(self.timeout)
+
+    def remember_session(self):
+        session = getattr(self.sock, "session", None)
+        if session is not None:
+            self.session_cache[(self.host, self.port)] = session
+
+
+def _closed_before_response(exc):
+    """True if ``exc`` means the peer closed the connection before any status line byte."""
+    remote_disconnected = getattr(httplib, "RemoteDisconnected", None)
+    if remote_disconnected is not None and isinstance(exc, remote_disconnected):
+        return True
+    if isinstance(exc, httplib.BadStatusLine):
+        line = getattr(exc, "line", None)
+        return line in ("", "''") or (isinstance(line, _string_types) and line.startswith("No status line received"))
+    return False
+
+
+class HttpConnectionPool(object):
+    """Keep-alive HTTP(S) connections shared by the MCP send paths.
+
+    Idle connections are kept per (scheme, host, port), at most ``max_per_host``
+    of them, and are closed once they sit idle longer than ``idle_timeout``
+    seconds. HTTPS connections share one SSL context and TLS session cache, so
+    new connections to a known host resume the previous handshake.
+    """
+
+    def __init__(self, max_per_host=8, idle_timeout=30, connect_timeout=10):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self._idle = {}
+        self._tls_sessions = {}
+        self._lock = threading.Lock()
+        self._ssl_context = self._create_ssl_context()
+        self.created = 0
+        self.reused = 0
+
+    def _create_ssl_context(self):
+        # Match Burp's makeHttpRequest, which does not validate certificates
+        if hasattr(ssl, "_create_unverified_context"):
+            return ssl._create_unverified_context()
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        return context
+
+    def configure(self, max_per_host, idle_timeout):
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.evict_idle()
+
+    def _acquire(self, key, read_timeout, fresh=False):
+        now = time.time()
+        stale = []
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key, []) if not fresh else []
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used > self.idle_timeout:
+                    stale.append(candidate)
+                    continue
+                conn = candidate
+                self.reused += 1
+                break
+        for c in stale:
+            c.close()
+        if conn is not None:
+            conn.timeout = read_timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(read_timeout)
+            return conn, True
+
+        is_https, host, port = key
+        if is_https:
+            conn = _PooledHTTPSConnection(host, port, self.connect_timeout, read_timeout,
+                                          self._ssl_context, self._tls_sessions)
+        else:
+            conn = _PooledHTTPConnection(host, port, self.connect_timeout, read_timeout)
+        with self._lock:
+            self.created += 1
+        return conn, False
+
+    def _release(self, key, conn):
+        if isinstance(conn, _PooledHTTPSConnection):
+            conn.remember_session()
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append((conn, time.time()))
+                return
+        conn.close()
+
+    def request(self, is_https, host, port, method, path, headers, body=None, timeout=30):
+        """Send one request, returning (status, [(name, value)], body_bytes).
+
+        A reused keep-alive connection is retried once on a fresh connection,
+        but only when the server cannot have seen the request: the send itself
+        failed, or the connection was closed before any response byte arrived.
+        Errors after that point are raised, so a tools/call never runs twice.
+        """
+        key = (is_https, host, port)
+        conn, reused = self._acquire(key, timeout)
+        while True:
+            sent = False
+            try:
+                conn.request(method, path, body, headers)
+                sent = True
+                resp = conn.getresponse()
+                data = resp.read()
+            except socket.timeout:
+                conn.close()
+                raise
+            except (socket.error, httplib.HTTPException) as e:
+                conn.close()
+                if reused and (not sent or _closed_before_response(e)):
+                    # Stale kept-alive connection; retry once on a new one
+                    conn, reused = self._acquire(key, timeout, fresh=True)
+                    continue
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return resp.status, resp.getheaders(), data
+
+    def evict_idle(self):
+        now = time.time()
+        stale = []
+        with self._lock:
+            for key, idle in self._idle.items():
+                keep = []
+                for conn, last_used in idle:
+                    if now - last_used > self.idle_timeout or len(keep) >= self.max_per_host:
+                        stale.append(conn)
+                    else:
+                        keep.append((conn, last_used))
+                self._idle[key] = keep
+        for conn in stale:
+            conn.close()
+
+    def open_stream(self, is_https, host, port, timeout):
+        """Open a dedicated, unpooled socket for a long-lived response stream."""
+        sock = socket.create_connection((host, port), self.connect_timeout)
+        if is_https:
+            sock = self._ssl_context.wrap_socket(sock, server_hostname=host)
+        sock.settimeout(timeout)
+        return sock
+
+    def idle_count(self):
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    def close_all(self):
+        with self._lock:
+            conns = [conn for idle in self._idle.values() for conn, _ in idle]
+            self._idle = {}
+        for conn in conns:
+            conn.close()
+
+
+class ChunkedDecoder(object):
+    """Incremental decoder for Transfer-Encoding: chunked bodies.
+
+    Bytes that follow the terminating chunk and trailers (e.g. the next
+    pipelined request) are left in ``remainder()``.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._remaining = None
+        self._in_trailer = False
+        self.finished = False
+
+    def feed(self, data):
+        """Feed raw bytes, returning whatever body bytes are now complete."""
+        self._buffer += data
+        out = []
+        while not self.finished:
+            if self._in_trailer:
+                eol = self._buffer.find(b"\r\n")
+                if eol < 0:
+                    break
+                line = self._buffer[:eol]
+                self._buffer = self._buffer[eol + 2:]
+                if not line:
+                    self.finished = True
+            elif self._remaining is None:
+                eol = self._buffer.find(b"\r\n")
+                if eol < 0:
+                    break
+                size_line = self._buffer[:eol].split(b";", 1)[0].strip()
+                self._buffer = self._buffer[eol + 2:]
+                self._remaining = int(size_line, 16)
+                if self._remaining == 0:
+                    self._in_trailer = True
+            elif self._remaining > 0:
+                piece = self._buffer[:self._remaining]
+                if not piece:
+                    break
+                out.append(piece)
+                self._buffer = self._buffer[len(piece):]
+                self._remaining -= len(piece)
+            else:
+                if len(self._buffer) < 2:
+                    break
+                if self._buffer[:2] != b"\r\n":
+                    raise ValueError("Chunk data not followed by CRLF")
+                self._buffer = self._buffer[2:]
+                self._remaining = None
+        return b"".join(out)
+
+    def remainder(self):
+        return self._buffer
+
+
+class HttpParseError(Exception):
+    """A malformed or oversized request; ``status`` is the HTTP error to send."""
+
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+class HttpRequestReader(object):
+    """Byte-oriented HTTP/1.1 request reader for one client connection.
+
+    The socket is read in bulk buffers; the header block is located and
+    decoded in one pass and the body is read as bytes (Content-Length or
+    chunked) and decoded once. Bytes beyond the current request stay
+    buffered, so pipelined requests are returned by later calls.
+    """
+
+    max_header_bytes = 65536
+    recv_size = 65536
+
+    def __init__(self, sock, max_body_bytes=64 * 1024 * 1024):
+        self.sock = sock
+        self.max_body_bytes = max_body_bytes
+        self._buffer = b""
+
+    def read_request(self):
+        """Return (method, path, version, headers, body) or None at end of stream."""
+        while True:
+            self._buffer = self._buffer.lstrip(b"\r\n")
+            end = self._buffer.find(b"\r\n\r\n")
+            if end >= 0:
+                break
+            if len(self._buffer) > self.max_header_bytes:
+                raise HttpParseError(431, "Request header block too large")
+            data = self.sock.recv(self.recv_size)
+            if not data:
+                if self._buffer:
+                    raise HttpParseError(400, "Connection closed mid-request")
+                return None
+            self._buffer += data
+
+        head = self._buffer[:end].decode("iso-8859-1")
+        self._buffer = self._buffer[end + 4:]
+        lines = head.split("\r\n")
+        parts = lines[0].split(" ")
+        if len(parts) != 3:
+            raise HttpParseError(400, "Malformed request line")
+        method, path, version = parts[0].upper(), parts[1], parts[2].upper()
+
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, val = line.split(":", 1)
+                headers[key.strip().lower()] = val.strip()
+
+        if "100-continue" in headers.get("expect", "").lower():
+            self.sock.sendall(b"HTTP/1.1 100 Continue\r\n\r\n")
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            body = self._read_chunked()
+        else:
+            try:
+                length = int(headers.get("content-length", "0") or 0)
+            except ValueError:
+                raise HttpParseError(400, "Invalid Content-Length")
+            if length < 0:
+                raise HttpParseError(400, "Invalid Content-Length")
+            if length > self.max_body_bytes:
+                raise HttpParseError(413, "Request body too large")
+            body = self._read_exact(length)
+
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError:
+            raise HttpParseError(400, "Request body is not valid UTF-8")
+        return method, path, version, headers, text
+
+    def _read_exact(self, length):
+        chunks = [self._buffer[:length]]
+        received = len(chunks[0])
+        self._buffer = self._buffer[length:]
+        while received < length:
+            data = self.sock.recv(min(self.recv_size * 4, length - received))
+            if not data:
+                raise HttpParseError(400, "Connection closed mid-body")
+            chunks.append(data)
+            received += len(data)
+        return b"".join(chunks)
+
+    def _read_chunked(self):
+        decoder = ChunkedDecoder()
+        data = self._buffer
+        self._buffer = b""
+        chunks = []
+        received = 0
+        try:
+            while True:
+                piece = decoder.feed(data)
+                chunks.append(piece)
+                received += len(piece)
+                if received > self.max_body_bytes:
+                    raise HttpParseError(413, "Request body too large")
+                if decoder.finished:
+                    break
+                data = self.sock.recv(self.recv_size)
+                if not data:
+                    raise HttpParseError(400, "Connection closed mid-body")
+        except ValueError:
+            raise HttpParseError(400, "Malformed chunked body")
+        self._buffer = decoder.remainder()
+        return b"".join(chunks)
+
+
+class SSEParser(object):
+    """Incremental text/event-stream parser.
+
+    ``feed`` accepts raw bytes in arbitrary pieces and returns the events
+    completed by them as (event_type, data_lines) tuples, the same shape
+    ``_process_sse_event`` consumes. The last ``id:`` and ``retry:`` values
+    survive across reconnects so the listener can resume the stream.
+    """
+
+    def __init__(self):
+        self.last_event_id = None
+        self.retry_ms = None
+        self._pending = b""
+        self._reset_event()
+
+    def _reset_event(self):
+        self._event_type = None
+        self._data = []
+
+    def feed(self, data):
+        self._pending += data
+        events = []
+        while True:
+            lf = self._pending.find(b"\n")
+            cr = self._pending.find(b"\r")
+            if lf < 0 and cr < 0:
+                break
+            eol = min(lf, cr) if lf >= 0 and cr >= 0 else max(lf, cr)
+            # A trailing CR may be the first half of CRLF; wait for more data
+            if self._pending[eol:eol + 1] == b"\r" and eol + 1 == len(self._pending):
+                break
+            line = self._pending[:eol]
+            skip = 2 if self._pending[eol:eol + 2] == b"\r\n" else 1
+            self._pending = self._pending[eol + skip:]
+            event = self._feed_line(line.decode("utf-8", "replace"))
+            if event:
+                events.append(event)
+        return events
+
+    def _feed_line(self, line):
+        line = line.strip()
+        if not line:
+            if self._data:
+                event = (self._event_type, self._data)
+                self._reset_event()
+                return event
+            self._reset_event()
+            return None
+        if line.startswith(":"):
+            return None
+        if line.startswith("event:"):
+            self._event_type = line[6:].strip()
+        elif line.startswith("data:"):
+            data = line[5:].strip()
+            if data and data != "ping":
+                self._data.append(data)
+        elif line.startswith("id:"):
+            event_id = line[3:].strip()
+            if "\0" not in event_id:
+                self.last_event_id = event_id
+        elif line.startswith("retry:"):
+            value = line[6:].strip()
+            if value.isdigit():
+                self.retry_ms = int(value)
+        return None
+
+
+class BoundedExecutor(object):
+    """Fixed-size worker pool with a bounded task queue.
+
+    Workers are started on demand up to ``max_workers`` and then reused.
+    ``submit`` never blocks: it returns False once ``queue_depth`` tasks are
+    already waiting, so callers can fail the request instead of piling up
+    threads.
+    """
+
+    def __init__(self, name, max_workers=16, queue_depth=1000, on_error=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.on_error = on_error
+        self._queue = queue.Queue(queue_depth)
+        self._lock = threading.Lock()
+        self._workers = []
+        self._idle = 0
+        self._active = 0
+        self._shutdown = False
+        self.completed = 0
+        self.rejected = 0
+
+    def configure(self, max_workers, queue_depth):
+        self.max_workers = max_workers
+        self._queue.maxsize = queue_depth
+
+    def submit(self, fn, *args):
+        if self._shutdown:
+            return False
+        try:
+            self._queue.put_nowait((fn, args))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            if self._queue.qsize() <= self._idle or len(self._workers) >= self.max_workers:
+                return True
+            worker = threading.Thread(target=self._run, name="%s-%d" % (self.name, len(self._workers) + 1))
+            worker.daemon = True
+            self._workers.append(worker)
+        worker.start()
+        return True
+
+    def _run(self):
+        me = threading.currentThread()
+        while True:
+            with self._lock:
+                if len(self._workers) > self.max_workers:
+                    self._workers.remove(me)
+                    return
+                self._idle += 1
+            task = self._queue.get()
+            with self._lock:
+                self._idle -= 1
+                if task is None:
+                    self._workers.remove(me)
+                    return
+                self._active += 1
+            fn, args = task
+            try:
+                fn(*args)
+            except Exception:
+                if self.on_error:
+                    self.on_error("%s task failed: %s" % (self.name, traceback.format_exc()))
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self.completed += 1
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def active_count(self):
+        with self._lock:
+            return self._active
+
+    def worker_count(self):
+        with self._lock:
+            return len(self._workers)
+
+    def shutdown(self, timeout=2):
+        self._shutdown = True
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            workers = list(self._workers)
+        for _ in workers:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        deadline = time.time() + timeout
+        for worker in workers:
+            worker.join(max(0, deadline - time.time()))
+
+    def stats(self):
+        return "%d workers (%d active, max %d), queue %d/%d, %d completed, %d rejected" % (
+            self.worker_count(), self.active_count(), self.max_workers,
+            self.queue_depth(), self._queue.maxsize, self.completed, self.rejected)
+
+
+class RequestIdAllocator(object):
+    """Monotonic, namespaced JSON-RPC request ids.
+
+    Ids look like ``req-3f9a1c-42``: a caller-chosen prefix, a random
+    namespace fixed per extension load and a counter, so concurrent senders
+    never reuse an id and ids from an earlier load cannot be mistaken for
+    current ones.
+    """
+
+    def __init__(self):
+        self.namespace = binascii.hexlify(os.urandom(3)).decode("ascii")
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self, prefix="req"):
+        with self._lock:
+            n = next(self._counter)
+        return "%s-%s-%d" % (prefix, self.namespace, n)
+
+
+class ResponseFuture(object):
+    """One-shot handoff of a JSON-RPC response to a waiting thread.
+
+    The future is itself the request callback, so the waiter wakes the
+    moment the response (or the scheduler's timeout error) is delivered.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+
+    def __call__(self, result):
+        self._result = result
+        self._event.set()
+
+    def done(self):
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the response; None if ``timeout`` elapses first."""
+        self._event.wait(timeout)
+        return self._result
+
+
+class TimeoutScheduler(object):
+    """Single thread owning the deadlines of every request awaiting a response.
+
+    Deadlines sit in a heap and the thread sleeps until the earliest one.
+    ``touch`` only moves a deadline in the entry table; when the stale heap
+    slot comes due it is re-queued at the new deadline, so progress events
+    never touch the heap. ``on_timeout(key)`` runs on the scheduler thread.
+    """
+
+    def __init__(self, on_timeout):
+        self.on_timeout = on_timeout
+        self._cond = threading.Condition()
+        self._heap = []
+        self._entries = {}
+        self._seq = itertools.count()
+        self._thread = None
+        self._running = False
+
+    def schedule(self, key, timeout, max_total, reset_on_progress):
+        now = time.time()
+        hard_deadline = now + max_total
+        deadline = min(now + timeout, hard_deadline)
+        with self._cond:
+            self._entries[key] = [deadline, hard_deadline, timeout, reset_on_progress]
+            heapq.heappush(self._heap, (deadline, next(self._seq), key))
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name="mcp-timeouts")
+                self._thread.daemon = True
+                self._thread.start()
+            elif self._heap[0][2] == key:
+                self._cond.notify()
+
+    def touch(self, key):
+        """Extend a request's deadline after progress, if reset-on-progress applies."""
+        with self._cond:
+            entry = self._entries.get(key)
+            if entry and entry[3]:
+                entry[0] = min(time.time() + entry[2], entry[1])
+
+    def cancel(self, key):
+        with self._cond:
+            self._entries.pop(key, None)
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._entries)
+
+    def clear(self):
+        with self._cond:
+            self._entries.clear()
+            self._heap = []
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._entries.clear()
+            self._heap = []
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            expired = []
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.time()
+                while self._heap and self._heap[0][0] <= now:
+                    _, _, key = heapq.heappop(self._heap)
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        continue
+                    if entry[0] > now:
+                        heapq.heappush(self._heap, (entry[0], next(self._seq), key))
+                    else:
+                        del self._entries[key]
+                        expired.append(key)
+                if not expired:
+                    self._cond.wait(self._heap[0][0] - now if self._heap else 60)
+                    continue
+            for key in expired:
+                try:
+                    self.on_timeout(key)
+                except Exception:
+                    pass
+
+
+class LatencyHistogram(object):
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds.
+
+    Recording is a bisect and two additions, so it can stay on every
+    request path. Not thread-safe on its own; MetricsRegistry holds the lock.
+    """
+
+    BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+                 10000, 30000, 60000, 120000, 300000)
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.buckets[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                if i < len(self.BOUNDS_MS):
+                    return float(min(self.BOUNDS_MS[i], self.max_ms))
+                return self.max_ms
+        return self.max_ms
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 3),
+            "sum_ms": round(self.total_ms, 3),
+            "buckets": list(zip([str(b) for b in self.BOUNDS_MS] + ["+Inf"], self.buckets)),
+        }
+
+
+class RateMeter(object):
+    """Events per second over a sliding window of one-second slots."""
+
+    def __init__(self, window=10):
+        self.window = window
+        self._slots = [0] * window
+        self._stamps = [0] * window
+        self.total = 0
+
+    def mark(self, n=1, now=None):
+        second = int(now or time.time())
+        i = second % self.window
+        if self._stamps[i] != second:
+            self._stamps[i] = second
+            self._slots[i] = 0
+        self._slots[i] += n
+        self.total += n
+
+    def rate(self, now=None):
+        second = int(now or time.time())
+        # The current second is still filling, so average the full ones before it
+        recent = sum(n for n, stamp in zip(self._slots, self._stamps)
+                     if second - self.window < stamp < second)
+        return recent / float(self.window - 1)
+
+
+class MetricsRegistry(object):
+    """Always-on counters, latency histograms, rates and gauges.
+
+    Counters and histograms are keyed by name and, for per-method data, by
+    JSON-RPC method. Gauges are callables sampled at snapshot time, so
+    things like the pending map size cost nothing until someone looks.
+    Gauges registered with a ``server`` label are reported per server under
+    ``servers`` in the snapshot, next to the unlabelled ones.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._gauges = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.counters = {}
+            self.methods = {}
+            self.rates = {}
+
+    def register_gauge(self, name, fn, server=None):
+        with self._lock:
+            self._gauges[(name, server)] = fn
+
+    def unregister_gauges(self, server, names=None):
+        """Drop the gauges labelled with ``server``, or only those in ``names``."""
+        with self._lock:
+            for key in [key for key in self._gauges
+                        if key[1] == server and (names is None or key[0] in names)]:
+                del self._gauges[key]
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def mark(self, name, n=1):
+        with self._lock:
+            meter = self.rates.get(name)
+            if meter is None:
+                meter = self.rates[name] = RateMeter()
+            meter.mark(n)
+
+    def observe_call(self, method, elapsed, outcome="ok"):
+        """Record one finished call; ``outcome`` is "ok", "error" or "timeout"."""
+        with self._lock:
+            entry = self.methods.get(method)
+            if entry is None:
+                entry = self.methods[method] = {"requests": 0, "errors": 0, "timeouts": 0,
+                                                "latency": LatencyHistogram()}
+            entry["requests"] += 1
+            if outcome == "error":
+                entry["errors"] += 1
+            elif outcome == "timeout":
+                entry["timeouts"] += 1
+            entry["latency"].observe(elapsed * 1000.0)
+
+    def timed_callback(self, method, callback, is_timeout=None):
+        """Wrap a response callback so its call is recorded when it fires."""
+        started = time.time()
+
+        def on_response(resp):
+            outcome = "ok"
+            if not isinstance(resp, dict) or "error" in resp:
+                outcome = "timeout" if is_timeout and is_timeout(resp) else "error"
+            self.observe_call(method or "?", time.time() - started, outcome)
+            callback(resp)
+        return on_response
+
+    def snapshot(self):
+        gauges = {}
+        servers = {}
+        with self._lock:
+            registered = list(self._gauges.items())
+        for (name, server), fn in registered:
+            try:
+                value = fn()
+            except Exception:
+                value = None
+            if server is None:
+                gauges[name] = value
+            else:
+                servers.setdefault(server, {})[name] = value
+        with self._lock:
+            methods = {}
+            for method, entry in self.methods.items():
+                methods[method] = {"requests": entry["requests"], "errors": entry["errors"],
+                                   "timeouts": entry["timeouts"],
+                                   "latency": entry["latency"].snapshot()}
+            return {
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "counters": dict(self.counters),
+                "rates": dict((name, {"per_second": round(m.rate(), 2), "total": m.total})
+                              for name, m in self.rates.items()),
+                "gauges": gauges,
+                "servers": servers,
+                "methods": methods,
+            }
+
+    def render_text(self):
+        """Prometheus text exposition of ``snapshot()``."""
+        snap = self.snapshot()
+        lines = ["mcp_uptime_seconds %s" % snap["uptime_seconds"]]
+        for name, value in sorted(snap["counters"].items()):
+            lines.append("mcp_%s_total %d" % (name, value))
+        for name, rate in sorted(snap["rates"].items()):
+            lines.append("mcp_%s_total %d" % (name, rate["total"]))
+            lines.append("mcp_%s_per_second %s" % (name, rate["per_second"]))
+        for name, value in sorted(snap["gauges"].items()):
+            if value is not None:
+                lines.append("mcp_%s %s" % (name, value))
+        for server, gauges in sorted(snap["servers"].items()):
+            label = 'server="%s"' % server.replace("\\", "\\\\").replace('"', '\\"')
+            for name, value in sorted(gauges.items()):
+                if value is not None:
+                    lines.append("mcp_%s{%s} %s" % (name, label, value))
+        for method, entry in sorted(snap["methods"].items()):
+            label = 'method="%s"' % method.replace("\\", "\\\\").replace('"', '\\"')
+            for key in ("requests", "errors", "timeouts"):
+                lines.append("mcp_%s_total{%s} %d" % (key, label, entry[key]))
+            latency = entry["latency"]
+            cumulative = 0
+            for bound, n in latency["buckets"]:
+                cumulative += n
+                lines.append('mcp_latency_ms_bucket{%s,le="%s"} %d' % (label, bound, cumulative))
+            lines.append("mcp_latency_ms_sum{%s} %s" % (label, latency["sum_ms"]))
+            lines.append("mcp_latency_ms_count{%s} %d" % (label, latency["count"]))
+        return "\n".join(lines) + "\n"
+
+
+class AdaptiveLimiter(object):
+    """AIMD control of how many requests are in flight and how fast they start.
+
+    ``submit(fn)`` runs ``fn`` straight away while fewer than ``limit``
+    requests are in flight and the rate allows it; otherwise ``fn`` waits in
+    a queue that a dispatcher thread drains as permits come back. Every
+    started request returns its permit through ``release(token, latency,
+    outcome)``, where ``outcome`` comes from ``outcome(resp)``.
+
+    Feedback is judged one window (about one round of in-flight requests)
+    at a time; replies to requests started before a decrease are ignored. A 429 or
+    503, a ``Retry-After`` or a timeout halves the limit at once and caps the
+    rate at half the observed throughput. At the end of a window, an error
+    rate above ``error_threshold`` cuts the limit by a quarter, and mean
+    latency above ``latency_tolerance`` times the best seen cuts it by a
+    tenth. A clean window that used the whole limit adds one slot, and one
+    where the rate cap held requests back adds ``rate_step`` per second to it.
+
+    If ``fn`` raises, its permit is taken back without counting as feedback
+    and the traceback goes to ``on_error``.
+    """
+
+    # JSON-RPC errors that blame the request rather than the server's load
+    CLIENT_ERROR_CODES = (-32700, -32600, -32601, -32602)
+    OVERLOAD_STATUSES = (429, 503)
+    # Latency below this never counts as a slowdown
+    LATENCY_FLOOR = 0.05
+    MIN_WINDOW = 8
+    MAX_PAUSE = 300
+
+    def __init__(self, enabled=True, initial=16, min_limit=1, max_limit=256, queue_depth=1000,
+                 latency_tolerance=2.0, error_threshold=0.1, rate_step=5.0, on_error=None):
+        self.enabled = enabled
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_depth = queue_depth
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.rate_step = rate_step
+        self.on_error = on_error
+        self._cond = threading.Condition()
+        self._queue = collections.deque()
+        self._thread = None
+        self._running = False
+        self.rejected = 0
+        self.reset()
+
+    def configure(self, enabled, max_limit, queue_depth):
+        with self._cond:
+            self.enabled = enabled
+            self.max_limit = max_limit
+            self.queue_depth = queue_depth
+            self.limit = max(self.min_limit, min(self.limit, max_limit))
+            self._cond.notify()
+
+    def reset(self):
+        """Forget learned limits, in-flight and queued requests, e.g. for a new session."""
+        with self._cond:
+            self.generation = getattr(self, "generation", 0) + 1
+            self.limit = float(self.initial)
+            self.rate = None
+            self.baseline = None
+            self.in_flight = 0
+            self.paused_until = 0.0
+            self._queue.clear()
+            self._throughput = RateMeter(5)
+            self.last_change = "initial"
+            self._next_start = 0.0
+            self._cut_at = 0.0
+            self._new_window()
+            self._cond.notify()
+
+    def _new_window(self):
+        self._window = {"count": 0, "ok": 0, "errors": 0, "latency": 0.0, "peak": self.in_flight, "cut": False}
+
+    def submit(self, fn):
+        """Call ``fn(token)`` now or once a permit is free; False when the queue is full.
+
+        ``fn``'s request hands ``token`` back to ``release`` when it finishes.
+        """
+        with self._cond:
+            now = time.time()
+            if not self.enabled or (not self._queue and self._may_start(now)):
+                token = self._start(now)
+            elif len(self._queue) >= self.queue_depth:
+                self.rejected += 1
+                return False
+            else:
+                self._queue.append(fn)
+                if not self._running:
+                    self._running = True
+                    self._thread = threading.Thread(target=self._run, name="mcp-limiter")
+                    self._thread.daemon = True
+                    self._thread.start()
+                self._cond.notify()
+                return True
+        try:
+            fn(token)
+        except Exception:
+            self._abandon(token)
+            raise
+        return True
+
+    def _may_start(self, now):
+        return self.in_flight < int(self.limit) and now >= self.paused_until and now >= self._next_start
+
+    def _start(self, now):
+        """Take a permit (lock held) and return its token."""
+        self.in_flight += 1
+        if self.in_flight > self._window["peak"]:
+            self._window["peak"] = self.in_flight
+        if self.rate and self.enabled:
+            self._next_start = max(self._next_start, now) + 1.0 / self.rate
+        return self.generation
+
+    def outcome(self, resp, is_timeout=None):
+        """"ok", "error", "overload" or "timeout" for a response, as feedback."""
+        if not isinstance(resp, dict):
+            return "error"
+        error = resp.get("error")
+        if error is None:
+            return "ok"
+        if is_timeout and is_timeout(resp):
+            return "timeout"
+        code = error.get("code") if isinstance(error, dict) else None
+        if code in self.OVERLOAD_STATUSES:
+            return "overload"
+        if code in self.CLIENT_ERROR_CODES:
+            return "ok"
+        return "error"
+
+    def release(self, token, latency, outcome="ok"):
+        with self._cond:
+            if token != self.generation:
+                return
+            self.in_flight -= 1
+            self._throughput.mark(1)
+            if self.enabled:
+                self._observe(time.time(), latency, outcome)
+            self._cond.notify()
+
+    def _abandon(self, token):
+        """Take back the permit of a request that failed to start, as no feedback."""
+        with self._cond:
+            if token != self.generation or self.in_flight <= 0:
+                return
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def backoff(self, retry_after=None):
+        """Server said it is overloaded (429/503), optionally with Retry-After seconds."""
+        with self._cond:
+            now = time.time()
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + min(retry_after, self.MAX_PAUSE))
+            if self.enabled:
+                self._cut(now, 0.5, "overload" + (" (Retry-After %ss)" % retry_after if retry_after else ""))
+
+    def _observe(self, now, latency, outcome):
+        if now - latency < self._cut_at:
+            # Started before the last decrease, so it says nothing about the new limit
+            return
+        window = self._window
+        window["count"] += 1
+        if outcome in ("overload", "timeout"):
+            if not window["cut"]:
+                self._cut(now, 0.5, outcome)
+                return
+        elif outcome == "error":
+            window["errors"] += 1
+        else:
+            window["ok"] += 1
+            window["latency"] += latency
+        if window["count"] < max(min(int(self.limit), window["peak"]), self.MIN_WINDOW):
+            return
+
+        mean = window["latency"] / window["ok"] if window["ok"] else None
+        if window["cut"]:
+            pass
+        elif window["errors"] > self.error_threshold * window["count"]:
+            self._cut(now, 0.75, "error rate %d%%" % (100 * window["errors"] // window["count"]))
+        elif (self.baseline is not None and mean is not None and mean > self.LATENCY_FLOOR
+              and mean > self.baseline * self.latency_tolerance):
+            self._cut(now, 0.9, "latency %dms" % (mean * 1000))
+        else:
+            if window["peak"] >= int(self.limit) and self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1)
+                self.last_change = "increase"
+            if self.rate and self._queue:
+                self.rate += self.rate_step
+                self.last_change = "increase"
+        # The baseline follows improvements at once and slowdowns only slowly
+        if mean is None:
+            pass
+        elif self.baseline is None or mean < self.baseline:
+            self.baseline = mean
+        else:
+            self.baseline += (mean - self.baseline) * 0.05
+        self._new_window()
+
+    def _cut(self, now, factor, reason):
+        """Multiplicative decrease, at most once per window."""
+        if self._window["cut"]:
+            return
+        observed = self._throughput.rate(now)
+        self.limit = max(self.min_limit, self.limit * factor)
+        if factor <= 0.5 and observed:
+            self.rate = max(1.0, min(self.rate or observed, observed) * factor)
+        self.last_change = "%s at %s" % (reason, time.strftime("%H:%M:%S", time.localtime(now)))
+        self._cut_at = now
+        self._new_window()
+        self._window["cut"] = True
+
+    def stats(self):
+        with self._cond:
+            if not self.enabled:
+                return "off (%d in flight)" % self.in_flight
+            paused = self.paused_until - time.time()
+            return "limit %d, %d in flight, %d queued, rate %s%s, last change: %s" % (
+                int(self.limit), self.in_flight, len(self._queue),
+                "%.1f/s" % self.rate if self.rate else "unlimited",
+                ", paused %.1fs" % paused if paused > 0 else "", self.last_change)
+
+    def queued_count(self):
+        with self._cond:
+            return len(self._queue)
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._queue.clear()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.time()
+                if not self._queue:
+                    self._cond.wait(60)
+                    continue
+                if not self.enabled or self._may_start(now):
+                    fn = self._queue.popleft()
+                    token = self._start(now)
+                elif self.in_flight < int(self.limit):
+                    self._cond.wait(max(self.paused_until, self._next_start) - now)
+                    continue
+                else:
+                    self._cond.wait(60)
+                    continue
+            try:
+                fn(token)
+            except Exception:
+                self._abandon(token)
+                if self.on_error:
+                    self.on_error("mcp-limiter task failed: %s" % traceback.format_exc())
+
+
+class LogRing(object):
+    """Fixed-capacity ring of log records, oldest overwritten first.
+
+    Records are ``(seq, timestamp, level, msg, args)``; ``msg % args`` is only
+    evaluated by ``format`` when a reader actually shows the record, so
+    producers pay for an append under a lock and nothing else. Readers keep
+    the last ``seq`` they saw and poll ``since``.
+    """
+
+    DEBUG = 10
+    INFO = 20
+    WARN = 30
+    ERROR = 40
+    LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARN: "WARN", ERROR: "ERROR"}
+
+    def __init__(self, capacity=5000):
+        self.capacity = capacity
+        self._records = [None] * capacity
+        self._lock = threading.Lock()
+        self.seq = 0
+
+    def append(self, level, msg, args=None):
+        with self._lock:
+            self.seq += 1
+            self._records[self.seq % self.capacity] = (self.seq, time.time(), level, msg, args)
+
+    def since(self, seq, limit=None):
+        """Return ``(records, last_seq, dropped)`` for records after ``seq``.
+
+        At most ``limit`` of the newest records are returned; ``dropped``
+        counts the ones skipped because of ``limit`` or because the ring
+        already overwrote them.
+        """
+        with self._lock:
+            last = self.seq
+            first = max(seq + 1, last - self.capacity + 1)
+            if limit is not None:
+                first = max(first, last - limit + 1)
+            records = [self._records[i % self.capacity] for i in range(first, last + 1)]
+        return records, last, max(0, first - seq - 1)
+
+    @classmethod
+    def format(cls, record, timestamps=False):
+        seq, stamp, level, msg, args = record
+        if args:
+            try:
+                msg = msg % args
+            except (TypeError, ValueError):
+                msg = "%s %r" % (msg, args)
+        if level >= cls.WARN:
+            msg = "%s: %s" % (cls.LEVEL_NAMES.get(level, level), msg)
+        if timestamps:
+            msg = time.strftime("[%H:%M:%S] ", time.localtime(stamp)) + msg
+        return msg
+
+
+class TrafficJournal(object):
+    """Bounded, structured record of every exchange the Virtual Proxy serves.
+
+    The newest ``capacity`` records stay in memory as tuples in ``FIELDS``
+    order. Older ones are appended to ``spill_path`` as JSON lines, written
+    ``spill_batch`` at a time; an empty path spills to a file in the temp
+    directory named on first use (``spill_file`` is the file actually
+    written). ``since(seq)`` lets a view pick up only
+    the records added after the last one it saw.
+    """
+
+    FIELDS = ("seq", "time", "client_id", "upstream_id", "method", "tool", "status",
+              "latency_ms", "request_bytes", "response_bytes", "cache")
+
+    def __init__(self, capacity=2000, spill_path="", spill_batch=256):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.spill_batch = spill_batch
+        self.seq = 0
+        self.spill_file = None
+        self.spilled = 0
+        self.spill_error = None
+        self._records = collections.deque()
+        self._unspilled = []
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+
+    def configure(self, capacity, spill_path):
+        with self._lock:
+            self.capacity = capacity
+            if spill_path != self.spill_path:
+                self.spill_path = spill_path
+                self.spill_file = None
+                self.spill_error = None
+            self._evict()
+        self.flush()
+
+    def record(self, client_id, upstream_id, method, tool, status, latency, request_bytes,
+               response_bytes, cache=None):
+        batch = None
+        with self._lock:
+            self.seq += 1
+            self._records.append((self.seq, time.time(), client_id, upstream_id, method, tool, status,
+                                  round(latency * 1000.0, 1), request_bytes, response_bytes, cache))
+            self._evict()
+            if len(self._unspilled) >= self.spill_batch:
+                batch, self._unspilled = self._unspilled, []
+        if batch:
+            self._spill(batch)
+
+    def _evict(self):
+        while len(self._records) > self.capacity:
+            self._unspilled.append(self._records.popleft())
+
+    def since(self, seq):
+        """Records still in memory with a sequence number above ``seq``."""
+        with self._lock:
+            if not self._records or self._records[-1][0] <= seq:
+                return []
+            skip = max(0, seq - self._records[0][0] + 1)
+            return list(itertools.islice(self._records, skip, None))
+
+    def flush(self):
+        """Write evicted records that are still waiting for a full batch."""
+        with self._lock:
+            batch, self._unspilled = self._unspilled, []
+        if batch:
+            self._spill(batch)
+
+    def _spill(self, batch):
+        with self._spill_lock:
+            if not self.spill_file:
+                self.spill_file = self.spill_path or os.path.join(
+                    tempfile.gettempdir(), "mcp-inspector-traffic-%s.jsonl" % time.strftime("%Y%m%d-%H%M%S"))
+            lines = [json.dumps(dict(zip(self.FIELDS, record))) for record in batch]
+            try:
+                with open(self.spill_file, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                self.spilled += len(batch)
+            except (IOError, OSError) as e:
+                self.spill_error = str(e)
+
+    def __len__(self):
+        return len(self._records)
+
+
+def _replace_file(src, dst):
+    """Rename ``src`` over ``dst``; os.replace is missing on Jython and Python 2."""
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+class HistoryStore(object):
+    """Request Editor history: a recent tail in memory, older entries on disk.
+
+    Entries are ``(timestamp, request, response)`` with a timestamp free of
+    spaces. The newest ``memory_entries`` keep their text in memory; older
+    ones are spilled to ``path``, an append-only file of records::
+
+        B <sha1> <length>\n<zlib data>        once per distinct text
+        E <timestamp> <request sha1> <response sha1>\n
+
+    so bodies repeated across entries are stored once. The index maps each
+    sha1 to its data offset and ``get`` reads archived text back on demand.
+    ``load`` rebuilds the index from an existing file, so history survives a
+    reload once ``close`` has spilled the tail. At most ``max_entries`` are
+    indexed; ``clear`` also truncates the file.
+
+    ``compact`` rewrites the file with only the indexed entries. It runs when
+    ``load`` finds a torn tail or more entries than fit, and once the entries
+    trimmed since the last rewrite outnumber the live ones on disk, so the
+    file stays within about twice the size of the history it holds.
+    """
+
+    compact_min_dropped = 1000
+
+    def __init__(self, path, max_entries=100000, memory_entries=50):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.error = None
+        self._entries = collections.deque()
+        self._blobs = {}
+        self._spill_pos = 0
+        self._dropped = 0
+        self._file = None
+        self._lock = threading.RLock()
+        # Bytes written by an earlier session, not yet indexed by ``load``
+        try:
+            self._unloaded = os.path.getsize(path)
+        except (IOError, OSError):
+            self._unloaded = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def configure(self, max_entries, memory_entries):
+        with self._lock:
+            self.max_entries = max_entries
+            self.memory_entries = memory_entries
+            self._trim()
+
+    def add(self, request, response, timestamp=None):
+        with self._lock:
+            self._entries.append((timestamp or time.strftime("%Y-%m-%dT%H:%M:%S"), request, response, False))
+            self._trim()
+
+    def get(self, index):
+        """``(timestamp, request, response)`` for entry ``index``, oldest first."""
+        with self._lock:
+            timestamp, request, response, on_disk = self._entries[index]
+            if on_disk:
+                request, response = self._read_blob(request), self._read_blob(response)
+            return timestamp, request, response
+
+    def _trim(self, keep=None):
+        keep = self.memory_entries if keep is None else keep
+        while len(self._entries) - self._spill_pos > keep:
+            try:
+                self._entries[self._spill_pos] = self._spill(self._entries[self._spill_pos])
+            except (IOError, OSError) as e:
+                # Keep the text in memory rather than lose the entry
+                self.error = str(e)
+                break
+            self._spill_pos += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popleft()
+            if self._spill_pos:
+                self._spill_pos -= 1
+                self._dropped += 1
+        # Not before ``load``: the rewrite would drop the entries it has yet to index
+        if not self._unloaded and self._dropped >= max(self.compact_min_dropped, self._spill_pos):
+            self.compact()
+
+    def _spill(self, entry):
+        timestamp, request, response, _ = entry
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        request_key = self._write_blob(request)
+        response_key = self._write_blob(response)
+        self._file.write(("E %s %s %s\n" % (timestamp, request_key, response_key)).encode("ascii"))
+        self._file.flush()
+        return (timestamp, request_key, response_key, True)
+
+    def _write_blob(self, text):
+        data = text.encode("utf-8")
+        key = hashlib.sha1(data).hexdigest()
+        if key not in self._blobs:
+            packed = zlib.compress(data)
+            self._file.write(("B %s %d\n" % (key, len(packed))).encode("ascii"))
+            self._blobs[key] = (self._file.tell(), len(packed))
+            self._file.write(packed)
+        return key
+
+    def _read_blob(self, key):
+        offset, length = self._blobs[key]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length)).decode("utf-8")
+
+    def load(self):
+        """Index the entries already in ``path`` ahead of any added since; returns how many.
+
+        Only the bytes the file held when the store was created are scanned,
+        so entries spilled by ``add`` in the meantime are not indexed twice.
+        """
+        with self._lock:
+            end = self._unloaded
+            if not end:
+                return 0
+        entries = []
+        blobs = {}
+        good = 0
+        # Scan headers only, seeking past the data; stop at a torn or foreign record
+        with open(self.path, "rb") as f:
+            while good < end:
+                try:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    parts = line.decode("ascii").split()
+                    if len(parts) == 3 and parts[0] == "B":
+                        offset = f.tell()
+                        length = int(parts[2])
+                        if length < 0 or offset + length > end:
+                            break
+                        blobs[parts[1]] = (offset, length)
+                        f.seek(offset + length)
+                    elif len(parts) == 4 and parts[0] == "E" and parts[2] in blobs and parts[3] in blobs:
+                        entries.append((parts[1], parts[2], parts[3], True))
+                    else:
+                        break
+                except ValueError:
+                    break
+                good = f.tell()
+        with self._lock:
+            room = max(0, self.max_entries - len(self._entries))
+            overflow = len(entries) > room
+            entries = entries[-room:] if room else []
+            for key, location in blobs.items():
+                self._blobs.setdefault(key, location)
+            self._entries.extendleft(reversed(entries))
+            self._spill_pos += len(entries)
+            self._unloaded = 0
+            # Rewrite before the next spill appends, or records after a torn
+            # one would be unreachable on every later load
+            if good < end or overflow:
+                self.compact()
+            return len(entries)
+
+    def compact(self):
+        """Rewrite ``path`` with only the indexed entries; returns False on an I/O error."""
+        with self._lock:
+            self._close_file()
+            tmp_path = self.path + ".tmp"
+            blobs = {}
+            try:
+                with open(tmp_path, "wb") as dst:
+                    if self._spill_pos:
+                        with open(self.path, "rb") as src:
+                            for i in range(self._spill_pos):
+                                timestamp, request_key, response_key, _ = self._entries[i]
+                                for key in (request_key, response_key):
+                                    if key in blobs:
+                                        continue
+                                    offset, length = self._blobs[key]
+                                    src.seek(offset)
+                                    dst.write(("B %s %d\n" % (key, length)).encode("ascii"))
+                                    blobs[key] = (dst.tell(), length)
+                                    dst.write(src.read(length))
+                                dst.write(("E %s %s %s\n" % (timestamp, request_key, response_key)).encode("ascii"))
+                _replace_file(tmp_path, self.path)
+            except (IOError, OSError) as e:
+                self.error = str(e)
+                return False
+            self._blobs = blobs
+            self._dropped = 0
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._blobs.clear()
+            self._spill_pos = 0
+            self._dropped = 0
+            self._unloaded = 0
+            self._close_file()
+            try:
+                open(self.path, "wb").close()
+            except (IOError, OSError) as e:
+                self.error = str(e)
+
+    def close(self):
+        """Spill every in-memory entry so the next ``load`` sees it, then close the file."""
+        with self._lock:
+            self._trim(0)
+            self._close_file()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except (IOError, OSError):
+                pass
+            self._file = None
+
+
+class ResponseCache(object):
+    """TTL + LRU cache of successful responses to idempotent MCP calls.
+
+    Keys are (endpoint, session, method, params); only methods with a TTL
+    in ``ttls`` are cached, so caching is opt-in per method. Stored
+    responses are returned as copies carrying the caller's request id.
+    """
+
+    def __init__(self, ttls=None, max_entries=256):
+        self.ttls = dict(ttls or {})
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, ttls, max_entries):
+        with self._lock:
+            self.ttls = dict(ttls)
+            self.max_entries = max_entries
+            for key in [k for k in self._entries if k[2] not in self.ttls]:
+                del self._entries[key]
+            self._trim()
+
+    def cacheable(self, method):
+        return self.ttls.get(method, 0) > 0
+
+    def make_key(self, endpoint, session_id, method, params):
+        return (endpoint, session_id, method, json.dumps(params or {}, sort_keys=True))
+
+    def get(self, key, req_id=None):
+        """Return a copy of the cached response for ``key`` re-addressed to ``req_id``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = self._entries.pop(key)
+            self.hits += 1
+        resp = dict(entry[1])
+        resp["id"] = req_id
+        return resp
+
+    def put(self, key, resp):
+        ttl = self.ttls.get(key[2], 0)
+        if ttl <= 0 or not isinstance(resp, dict) or "result" not in resp:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + ttl, resp)
+            self._trim()
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, method_prefix, params_match=None):
+        """Drop entries whose method starts with ``method_prefix``.
+
+        ``params_match`` optionally narrows this to entries whose params
+        contain every given key/value pair, e.g. {"uri": ...}.
+        """
+        with self._lock:
+            stale = []
+            for key in self._entries:
+                if not key[2].startswith(method_prefix):
+                    continue
+                if params_match:
+                    params = json.loads(key[3])
+                    if any(params.get(k) != v for k, v in params_match.items()):
+                        continue
+                stale.append(key)
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def handle_notification(self, message):
+        """Invalidate on ``notifications/<kind>/list_changed`` and ``notifications/resources/updated``."""
+        method = message.get("method") or ""
+        if not method.startswith("notifications/"):
+            return 0
+        parts = method.split("/")
+        if len(parts) == 3 and parts[2] == "list_changed":
+            return self.invalidate(parts[1] + "/")
+        if method == "notifications/resources/updated":
+            uri = (message.get("params") or {}).get("uri")
+            return self.invalidate("resources/read", {"uri": uri} if uri else None)
+        return 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        return "%d entries (max %d), %d hits, %d misses" % (
+            len(self), self.max_entries, self.hits, self.misses)
+
+
+class PagedListing(object):
+    """Follows ``nextCursor`` through a paginated list method.
+
+    Each page's items go to ``on_page(items)`` in page order, then
+    ``on_done(total, error)`` runs once; ``error`` is None on success. With
+    ``prefetch`` the next page is requested before ``on_page`` runs, so
+    fetching overlaps rendering. ``on_response`` can be handed to a batch
+    as the first page's callback instead of calling ``start``.
+    """
+
+    def __init__(self, client, method, result_key, on_page, on_done, prefetch=True, max_pages=1000):
+        self.client = client
+        self.method = method
+        self.result_key = result_key
+        self.on_page = on_page
+        self.on_done = on_done
+        self.prefetch = prefetch
+        self.max_pages = max_pages
+        self.pages = 0
+        self.total = 0
+        self.cancelled = False
+        self._cursors = set()
+        # Holds page N+1 until page N's handler is done, keeping pages in order.
+        # Re-entrant because a full request queue fails the next page inline.
+        self._order_lock = threading.RLock()
+
+    def start(self, params=None):
+        self._request(params or {})
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _request(self, params):
+        self.client.send_request_async(self.method, params, self.on_response)
+
+    def on_response(self, resp):
+        with self._order_lock:
+            if self.cancelled:
+                return
+            if not isinstance(resp, dict) or "result" not in resp:
+                error = resp.get("error") if isinstance(resp, dict) else None
+                self.on_done(self.total, error or {"code": -1, "message": "No result"})
+                return
+
+            result = resp["result"]
+            items = result.get(self.result_key) or []
+            cursor = result.get("nextCursor")
+            self.pages += 1
+            more = bool(cursor) and cursor not in self._cursors and self.pages < self.max_pages
+            if cursor:
+                self._cursors.add(cursor)
+            if cursor and not more:
+                self.client.log("%s: stopped following nextCursor after %d pages" % (self.method, self.pages))
+
+            if more and self.prefetch:
+                self._request({"cursor": cursor})
+            self.total += len(items)
+            self.on_page(items)
+            if more and not self.prefetch:
+                self._request({"cursor": cursor})
+            if not more:
+                self.on_done(self.total, None)
+
+
+class ToolIndex(object):
+    """Name lookup and an inverted token index over a list of tools.
+
+    Tools are indexed by position in the order they were added, so search
+    results line up with the list they were listed into. Tokens come from
+    the tool name (split on punctuation and camelCase), the description and
+    ``inputSchema`` property names at any depth. ``search`` ANDs the query
+    words, each matching any indexed token it is a prefix of.
+    """
+
+    _WORD_RE = re.compile(r"[A-Za-z0-9]+")
+    _CAMEL_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+    def __init__(self):
+        self.by_name = {}
+        self.count = 0
+        self._postings = {}
+        self._sorted_tokens = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def add(self, tools):
+        with self._lock:
+            for tool in tools:
+                position = self.count
+                self.count += 1
+                name = tool.get("name", "")
+                self.by_name.setdefault(name, tool)
+                for token in self._tool_tokens(tool):
+                    postings = self._postings.get(token)
+                    if postings is None:
+                        postings = self._postings[token] = set()
+                    postings.add(position)
+            self._sorted_tokens = None
+
+    def tokenize(self, text):
+        tokens = set()
+        for word in self._WORD_RE.findall(text or ""):
+            tokens.add(word.lower())
+            for part in self._CAMEL_RE.findall(word):
+                tokens.add(part.lower())
+        return tokens
+
+    def _tool_tokens(self, tool):
+        tokens = self.tokenize(tool.get("name", ""))
+        tokens.add((tool.get("name") or "").lower())
+        tokens.update(self.tokenize(tool.get("description", "")))
+        schemas = [tool.get("inputSchema")]
+        while schemas:
+            schema = schemas.pop()
+            if not isinstance(schema, dict):
+                continue
+            properties = schema.get("properties")
+            if isinstance(properties, dict):
+                for prop, sub in properties.items():
+                    tokens.update(self.tokenize(prop))
+                    schemas.append(sub)
+            schemas.append(schema.get("items"))
+        tokens.discard("")
+        return tokens
+
+    def search(self, query):
+        """Positions of tools matching every word of ``query``, in list order."""
+        words = [w.lower() for w in self._WORD_RE.findall(query or "")]
+        if not words:
+            return list(range(self.count))
+        with self._lock:
+            if self._sorted_tokens is None:
+                self._sorted_tokens = sorted(self._postings)
+            tokens = self._sorted_tokens
+            matches = None
+            for word in sorted(words, key=len, reverse=True):
+                hits = set()
+                i = bisect.bisect_left(tokens, word)
+                while i < len(tokens) and tokens[i].startswith(word):
+                    hits.update(self._postings[tokens[i]])
+                    i += 1
+                matches = hits if matches is None else matches & hits
+                if not matches:
+                    return []
+        return sorted(matches)
+
+
+class UnescapeCancelled(Exception):
+    pass
+
+
+class NestedJsonUnescaper(object):
+    """Expands JSON documents embedded as strings inside a parsed JSON value.
+
+    MCP tool output often wraps JSON in a string, sometimes escaped again.
+    The walk is iterative and rewrites containers in place, so the value
+    passed in is modified. Only strings that start and end like an object
+    or array are tried. Each is decoded at most twice: once as is, and once
+    after undoing one level of string escaping.
+
+    Budgets bound the work: ``max_depth`` nested unwraps, ``max_string_bytes``
+    per candidate string, ``max_total_bytes`` parsed overall and
+    ``max_nodes`` values visited. When one runs out the walk stops and
+    ``stats["budget_exhausted"]`` names it. Setting ``cancel_event`` raises
+    UnescapeCancelled.
+    """
+
+    CHECK_EVERY = 1024
+
+    def __init__(self, max_depth=10, max_string_bytes=8 * 1024 * 1024,
+                 max_total_bytes=64 * 1024 * 1024, max_nodes=2000000):
+        self.max_depth = max_depth
+        self.max_string_bytes = max_string_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_nodes = max_nodes
+
+    def unescape(self, value, cancel_event=None):
+        """Return (value, stats) with every embedded JSON string expanded."""
+        stats = {"nodes": 0, "unwrapped": 0, "max_depth": 0, "bytes_parsed": 0,
+                 "skipped_large": 0, "budget_exhausted": None}
+        root = [value]
+        # (container, key, unwrap depth) of values still to visit
+        stack = [(root, 0, 0)]
+        while stack:
+            container, key, depth = stack.pop()
+            stats["nodes"] += 1
+            if stats["nodes"] % self.CHECK_EVERY == 0 and cancel_event is not None and cancel_event.is_set():
+                raise UnescapeCancelled()
+            if stats["nodes"] > self.max_nodes:
+                stats["budget_exhausted"] = "nodes"
+                break
+
+            item = container[key]
+            if isinstance(item, dict):
+                stack.extend((item, k, depth) for k in item)
+            elif isinstance(item, list):
+                stack.extend((item, i, depth) for i in range(len(item)))
+            elif isinstance(item, _string_types) and depth < self.max_depth:
+                parsed = self._parse_embedded(item, stats)
+                if parsed is _NOT_JSON:
+                    continue
+                if parsed is _OVER_BUDGET:
+                    break
+                container[key] = parsed
+                stats["unwrapped"] += 1
+                stats["max_depth"] = max(stats["max_depth"], depth + 1)
+                stack.append((container, key, depth + 1))
+        return root[0], stats
+
+    def _parse_embedded(self, text, stats):
+        if len(text) < 2:
+            return _NOT_JSON
+        # Cheap shape test before any parsing: must look like {...} or [...]
+        first = text[0] if text[0] in "{[" else text.lstrip()[:1]
+        if first not in ("{", "["):
+            return _NOT_JSON
+        last = text[-1] if text[-1] in "}]" else text.rstrip()[-1:]
+        if last not in ("}", "]"):
+            return _NOT_JSON
+        if len(text) > self.max_string_bytes:
+            stats["skipped_large"] += 1
+            return _NOT_JSON
+        if stats["bytes_parsed"] + len(text) > self.max_total_bytes:
+            stats["budget_exhausted"] = "bytes"
+            return _OVER_BUDGET
+        stats["bytes_parsed"] += len(text)
+
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            if "\\" not in text:
+                return _NOT_JSON
+            # One level of string escaping (\" \n \\ ...) undone by the JSON decoder itself
+            try:
+                parsed = json.loads(json.loads('"%s"' % text.strip()))
+            except ValueError:
+                return _NOT_JSON
+        if not isinstance(parsed, (dict, list)):
+            return _NOT_JSON
+        return parsed
+
+
+_NOT_JSON = object()
+_OVER_BUDGET = object()
+
+
+_OMIT = object()
+
+
+def sample_args(schema):
+    """Default arguments for an inputSchema: each property's default, example,
+    first enum value, or an empty value of its type."""
+    args = {}
+    for prop, details in ((schema or {}).get("properties") or {}).items():
+        details = details if isinstance(details, dict) else {}
+        prop_type = _schema_type(details)
+        if details.get("default") is not None:
+            args[prop] = details["default"]
+        elif details.get("example") is not None:
+            args[prop] = details["example"]
+        elif details.get("enum"):
+            args[prop] = details["enum"][0]
+        elif prop_type in ("number", "integer"):
+            args[prop] = 0
+        elif prop_type == "boolean":
+            args[prop] = False
+        elif prop_type == "array":
+            args[prop] = []
+        elif prop_type == "object":
+            args[prop] = {}
+        else:
+            args[prop] = ""
+    return args
+
+
+def _schema_type(details):
+    prop_type = details.get("type", "string")
+    if isinstance(prop_type, list):
+        prop_type = ([t for t in prop_type if t != "null"] or ["null"])[0]
+    return prop_type
+
+
+def _json_type(value):
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)) or type(value).__name__ == "long":
+        return "integer" if not isinstance(value, float) else "number"
+    if isinstance(value, _string_types):
+        return "string"
+    return "array" if isinstance(value, list) else "object"
+
+
+class PayloadGenerator(object):
+    """Expands tool inputSchemas into typed fuzzing cases.
+
+    Each case starts from ``sample_args`` and replaces one property (or
+    leaves it out) with a payload from one of ``CATEGORIES``:
+
+      boundary   empty and limit values, just past minimum/maximum/length
+                 limits, null, and the property omitted
+      enum       every enum value plus one outside the enum
+      type       a value of every other JSON type
+      oversized  long strings, long arrays, wide objects and huge numbers
+      nested     deeply nested objects and arrays
+      wordlist   each of the user's words
+
+    ``cases`` is a generator, so a campaign over thousands of tools never
+    holds more than the case being sent.
+    """
+
+    CATEGORIES = ("boundary", "enum", "type", "oversized", "nested", "wordlist")
+    TYPE_SAMPLES = (None, True, 0, -1.5, "", "0", "true", [], {}, [None], {"": None})
+
+    def __init__(self, categories=None, wordlist=None, max_string=65536, nesting_depth=64):
+        self.categories = [c for c in (categories or self.CATEGORIES) if c in self.CATEGORIES]
+        self.wordlist = list(wordlist or [])
+        self._long_strings = ["A" * 1024, "A" * max_string, u"\u00e9\U0001f600" * (max_string // 4)]
+        nested_object, nested_array = {}, []
+        for _ in range(nesting_depth):
+            nested_object, nested_array = {"a": nested_object}, [nested_array]
+        self._nested_values = [nested_object, nested_array]
+
+    def cases(self, tools):
+        """Yield ``(tool, argument, category, payload, arguments)`` for each case."""
+        for tool in tools:
+            schema = tool.get("inputSchema") or {}
+            base = sample_args(schema)
+            for prop, details in (schema.get("properties") or {}).items():
+                details = details if isinstance(details, dict) else {}
+                for category in self.categories:
+                    for value in self.payloads(category, details):
+                        args = dict(base)
+                        if value is _OMIT:
+                            args.pop(prop, None)
+                        else:
+                            args[prop] = value
+                        yield tool.get("name"), prop, category, value, args
+
+    def payloads(self, category, details):
+        return getattr(self, "_" + category)(details, _schema_type(details))
+
+    def _boundary(self, details, prop_type):
+        values = [_OMIT, None]
+        if prop_type in ("number", "integer"):
+            values += [0, -1, 1, 2 ** 31 - 1, -2 ** 31, 2 ** 31, 2 ** 53 + 1, -2 ** 63, 2 ** 64]
+            if prop_type == "number":
+                values += [0.5, -0.0, 1e308, 5e-324]
+            else:
+                values.append(1.5)
+            for key, step in (("minimum", -1), ("exclusiveMinimum", 0), ("maximum", 1), ("exclusiveMaximum", 0)):
+                limit = details.get(key)
+                if isinstance(limit, (int, float)) and not isinstance(limit, bool):
+                    values += [limit, limit + step] if step else [limit]
+        elif prop_type == "string":
+            values += ["", " ", "\x00", u"\uffff"]
+            if isinstance(details.get("minLength"), int):
+                values.append("A" * max(details["minLength"] - 1, 0))
+            if isinstance(details.get("maxLength"), int):
+                values.append("A" * (details["maxLength"] + 1))
+        elif prop_type == "array":
+            item = sample_args({"properties": {"item": details.get("items") or {}}}).get("item")
+            values.append([])
+            if isinstance(details.get("minItems"), int):
+                values.append([item] * max(details["minItems"] - 1, 0))
+            if isinstance(details.get("maxItems"), int):
+                values.append([item] * (details["maxItems"] + 1))
+        elif prop_type == "object":
+            values.append({})
+        return values
+
+    def _enum(self, details, prop_type):
+        enum = details.get("enum")
+        if not isinstance(enum, list) or not enum:
+            return []
+        return list(enum) + ["__not_in_enum__"]
+
+    def _type(self, details, prop_type):
+        declared = ("number", "integer") if prop_type in ("number", "integer") else (prop_type,)
+        return [v for v in self.TYPE_SAMPLES if _json_type(v) not in declared]
+
+    def _oversized(self, details, prop_type):
+        values = list(self._long_strings)
+        if prop_type == "array":
+            values.append([0] * 10000)
+        elif prop_type == "object":
+            values.append(dict(("k%d" % i, i) for i in range(10000)))
+        elif prop_type in ("number", "integer"):
+            values += [10 ** 100, -10 ** 100]
+        return values
+
+    def _nested(self, details, prop_type):
+        return self._nested_values
+
+    def _wordlist(self, details, prop_type):
+        return self.wordlist
+
+
+class FuzzCampaign(object):
+    """Sends generated cases as tools/call with at most ``concurrency`` in flight.
+
+    Every finished call becomes a result tuple in ``RESULT_FIELDS`` order,
+    handed to ``on_result`` on the thread that received the response;
+    ``on_done(stats)`` runs once, after the last call or after ``cancel``.
+    Calls go through the client's usual async path on the current session,
+    so the server sets the pace.
+    """
+
+    RESULT_FIELDS = ("seq", "tool", "argument", "category", "payload", "outcome", "detail",
+                     "latency_ms", "response_bytes", "arguments", "response")
+
+    def __init__(self, client, cases, concurrency=8, on_result=None, on_done=None, timeout=None):
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.on_result = on_result
+        self.on_done = on_done
+        self.timeout = timeout
+        self.sent = 0
+        self.completed = 0
+        self.in_flight = 0
+        self.outcomes = {}
+        self.cancelled = False
+        self.started = None
+        self._cases = iter(cases)
+        self._exhausted = False
+        self._pumping = False
+        self._done = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.started = time.time()
+        self._pump()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+        self._pump()
+
+    def is_done(self):
+        return self._done
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.time() - (self.started or time.time())
+            return {"sent": self.sent, "completed": self.completed, "in_flight": self.in_flight,
+                    "outcomes": dict(self.outcomes), "seconds": round(elapsed, 1),
+                    "per_second": round(self.completed / elapsed, 1) if elapsed else 0.0,
+                    "cancelled": self.cancelled}
+
+    def _pump(self):
+        """Top up to ``concurrency`` calls in flight; re-entrant calls leave it to the running loop."""
+        with self._lock:
+            if self._pumping:
+                return
+            self._pumping = True
+        finished = False
+        while True:
+            launch = []
+            with self._lock:
+                while not self.cancelled and not self._exhausted and self.in_flight < self.concurrency:
+                    case = next(self._cases, None)
+                    if case is None:
+                        self._exhausted = True
+                        break
+                    self.in_flight += 1
+                    self.sent += 1
+                    launch.append((self.sent, case))
+                if not launch:
+                    self._pumping = False
+                    if self.in_flight == 0 and (self._exhausted or self.cancelled) and not self._done:
+                        self._done = finished = True
+                    break
+            for seq, case in launch:
+                self._send(seq, case)
+        if finished and self.on_done:
+            self.on_done(self.stats())
+
+    def _send(self, seq, case):
+        tool, prop, category, value, args = case
+        started = time.time()
+
+        def on_response(resp):
+            self._on_response(seq, case, time.time() - started, resp)
+        self.client.send_request_async("tools/call", {"name": tool, "arguments": args}, on_response,
+                                       self.timeout, use_cache=False)
+
+    def _on_response(self, seq, case, elapsed, resp):
+        tool, prop, category, value, args = case
+        outcome, detail = self.classify(resp)
+        try:
+            text = json.dumps(resp)
+        except (TypeError, ValueError):
+            text = str(resp)
+        result = (seq, tool, prop, category, self.preview(value), outcome, detail,
+                  round(elapsed * 1000.0, 1), len(text), args, text[:4096])
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if self.on_result:
+            self.on_result(result)
+        self._pump()
+
+    def classify(self, resp):
+        """``(outcome, detail)``: ok, tool error (result.isError), error or timeout."""
+        if not isinstance(resp, dict):
+            return "error", "no response"
+        error = resp.get("error")
+        if error is not None:
+            if self.client.is_local_timeout(resp):
+                return "timeout", ""
+            if isinstance(error, dict):
+                return "error", ("%s %s" % (error.get("code", ""), error.get("message", "")))[:200]
+            return "error", str(error)[:200]
+        result = resp.get("result")
+        if isinstance(result, dict) and result.get("isError"):
+            for item in result.get("content") or []:
+                if isinstance(item, dict) and item.get("text"):
+                    return "tool error", item["text"][:200]
+            return "tool error", ""
+        return "ok", ""
+
+    @staticmethod
+    def preview(value, limit=80):
+        if value is _OMIT:
+            return "<omitted>"
+        text = json.dumps(value)
+        if len(text) > limit:
+            return "%s... (%d chars)" % (text[:limit], len(text))
+        return text
+
+
+def parse_url(url):
+    """Split an endpoint URL into (is_https, host, port, path)."""
+    is_https = url.lower().startswith("https://")
+    scheme_end = url.find("://")
+    if scheme_end >= 0:
+        rest = url[scheme_end + 3:]
+    else:
+        rest = url
+
+    slash_pos = rest.find("/")
+    if slash_pos >= 0:
+        host_port = rest[:slash_pos]
+        path = rest[slash_pos:]
+    else:
+        host_port = rest
+        path = "/"
+
+    if ":" in host_port:
+        parts = host_port.rsplit(":", 1)
+        host = parts[0]
+        try:
+            port = int(parts[1])
+        except:
+            port = 443 if is_https else 80
+    else:
+        host = host_port
+        port = 443 if is_https else 80
+
+    return is_https, host, port, path
+
+
+class MCPConfig(object):
+    """Plain settings shared by the client, the Virtual Proxy and the UI.
+
+    The Swing tab edits these attributes from its widgets and dialogs;
+    headless callers pass overrides as keyword arguments.
+    """
+
+    def __init__(self, url="", **overrides):
+        self.url = url
+        self.custom_headers = {}
+
+        self.request_timeout = 30
+        self.reset_on_progress = True
+        self.max_total_timeout = 300
+        self.sse_idle_timeout = 300
+
+        self.use_connection_pool = True
+        self.pool_size = 8
+        self.pool_idle_timeout = 30
+        self.executor_workers = 16
+        self.executor_queue_depth = 1000
+        self.batch_requests = False
+
+        self.proxy_max_connections = 256
+        self.proxy_idle_timeout = 15
+        self.proxy_backlog = 1024
+        self.proxy_max_body_bytes = 64 * 1024 * 1024
+
+        # Seconds to keep each method's successful responses; unlisted methods are never cached
+        self.cache_enabled = True
+        self.cache_ttls = {"tools/list": 60, "resources/list": 60, "prompts/list": 60,
+                           "resources/templates/list": 60, "resources/read": 30}
+        self.cache_max_entries = 256
+
+        self.list_prefetch = True
+        self.max_list_pages = 1000
+
+        # Proxied exchanges kept in memory; older ones are appended to the spill file
+        self.journal_capacity = 2000
+        self.journal_spill_path = ""
+
+        # Request Editor history; entries past history_memory_entries live in history_path
+        self.history_max_entries = 100000
+        self.history_memory_entries = 50
+        self.history_path = os.path.join(os.path.expanduser("~"), ".mcp_inspector_history")
+
+        self.fuzz_concurrency = 8
+
+        # Extra sessions opened after connecting; independent calls are spread across them
+        self.session_pool_size = 1
+        self.session_pool_strategy = "least-loaded"
+
+        # AIMD limit on requests in flight and their start rate, adjusted from server feedback
+        self.adaptive_concurrency = True
+        self.adaptive_max_limit = 256
+
+        # Handle X-MCP-Bridge requests from Burp's tools in-process instead of via the proxy socket
+        self.burp_bridge = False
+        # Seconds the bridge holds Burp's listener thread waiting for an SSE reply
+        self.bridge_wait_timeout = 5
+
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise AttributeError("Unknown MCP setting: %s" % name)
+            setattr(self, name, value)
+
+    # Settings that belong to one server rather than to the whole extension
+    PER_SERVER = ("url", "custom_headers")
+
+    def for_server(self, url):
+        """A copy of these settings for another server, with its own url and headers."""
+        config = MCPConfig(url)
+        config.update_shared(self)
+        config.custom_headers = dict(self.custom_headers)
+        return config
+
+    def update_shared(self, other):
+        """Take every setting except the per-server ones from ``other``."""
+        for name, value in other.__dict__.items():
+            if name not in self.PER_SERVER:
+                setattr(self, name, value)
+
+
+class MCPClient(object):
+    """Headless MCP client: session state, send paths, SSE and pending requests.
+
+    ``callbacks`` is Burp's IBurpExtenderCallbacks (or ``fake_burp.FakeCallbacks``)
+    and is only used when the connection pool is disabled. ``log(msg, force, args)``
+    receives diagnostics (``msg % args`` is left to the log) and ``on_change()`` is called when session details
+    shown in the UI change outside a request, e.g. a new SSE endpoint.
+    """
+
+    CLIENT_INFO = {"name": "Burp MCP Inspector", "version": "2.0"}
+
+    def __init__(self, config, callbacks=None, log=None, on_change=None):
+        self.config = config
+        self._callbacks = callbacks
+        self._helpers = callbacks.getHelpers() if callbacks else None
+        self.log = log or (lambda msg, force=False, args=None: None)
+        self.on_change = on_change
+
+        self.session_id = None
+        self.sse_endpoint = None
+        self.protocol_version = None
+        self.server_capabilities = {}
+        self.server_info = {}
+        self.sse_thread = None
+        self.sse_running = False
+        self.sse_socket = None
+        self.pending_requests = {}
+        self._lock = threading.Lock()
+
+        self.http_pool = HttpConnectionPool(config.pool_size, config.pool_idle_timeout)
+        self.request_executor = BoundedExecutor("mcp-request", config.executor_workers,
+                                                config.executor_queue_depth,
+                                                lambda msg: self.log(msg, True))
+        self.timeout_scheduler = TimeoutScheduler(self._on_request_timeout)
+        self.id_allocator = RequestIdAllocator()
+        self.cache = ResponseCache(self._cache_ttls(), config.cache_max_entries)
+        self.limiter = AdaptiveLimiter(config.adaptive_concurrency, config.executor_workers,
+                                       max_limit=config.adaptive_max_limit,
+                                       queue_depth=config.executor_queue_depth,
+                                       on_error=lambda msg: self.log(msg, True))
+
+        self.metrics = MetricsRegistry()
+        self.register_gauges()
+
+    def register_gauges(self, server=None):
+        """Sample this client's state as gauges on ``metrics``, labelled by ``server`` if given."""
+        for name, fn in self._gauges():
+            self.metrics.register_gauge(name, fn, server)
+
+    def unregister_gauges(self, server=None):
+        self.metrics.unregister_gauges(server, [name for name, _ in self._gauges()])
+
+    def _gauges(self):
+        return (
+            ("pending_requests", self.pending_count),
+            ("awaiting_sse", self.timeout_scheduler.pending_count),
+            ("request_queue_depth", self.request_executor.queue_depth),
+            ("request_workers_active", self.request_executor.active_count),
+            ("pool_idle_connections", self.http_pool.idle_count),
+            ("sse_connected", lambda: 1 if self.sse_socket is not None else 0),
+            ("cache_entries", self.cache.__len__),
+            ("adaptive_limit", lambda: int(self.limiter.limit)),
+            ("adaptive_rate", lambda: round(self.limiter.rate or 0, 1)),
+            ("adaptive_queued", self.limiter.queued_count),
+        )
+
+    def apply_config(self):
+        """Push pool and executor settings from ``config`` to the live objects."""
+        self.http_pool.configure(self.config.pool_size, self.config.pool_idle_timeout)
+        if not self.config.use_connection_pool:
+            self.http_pool.close_all()
+        self.request_executor.configure(self.config.executor_workers, self.config.executor_queue_depth)
+        self.cache.configure(self._cache_ttls(), self.config.cache_max_entries)
+        self.limiter.configure(self.config.adaptive_concurrency, self.config.adaptive_max_limit,
+                               self.config.executor_queue_depth)
+
+    def _cache_ttls(self):
+        return self.config.cache_ttls if self.config.cache_enabled else {}
+
+    def _notify_change(self):
+        if self.on_change:
+            self.on_change()
+
+    def initialize(self):
+        """Run the initialize handshake and start the SSE listener.
+
+        Returns the initialize response (or an error dict).
+        """
+        resp = self.send_request_sync("initialize", {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {"roots": {"listChanged": True}, "sampling": {}},
+            "clientInfo": self.CLIENT_INFO
+        })
+        if resp and "result" in resp:
+            result = resp["result"]
+            self.protocol_version = result.get("protocolVersion")
+            self.server_capabilities = result.get("capabilities", {})
+            self.server_info = result.get("serverInfo", {})
+            if self.session_id:
+                self.start_sse_listener()
+        return resp
+
+    def stop_sse_listener(self):
+        self.sse_running = False
+        if self.sse_thread and self.sse_thread.is_alive():
+            self.sse_thread.join(2)
+
+    def disconnect(self):
+        """Drop the session; pending callbacks are discarded without being called."""
+        self.log("Closing SSE connection...")
+        self.stop_sse_listener()
+
+        self.log("Clearing session data...")
+        self.session_id = None
+        self.sse_endpoint = None
+        self.protocol_version = None
+        self.server_capabilities = {}
+        self.server_info = {}
+        with self._lock:
+            self.pending_requests.clear()
+        self.timeout_scheduler.clear()
+        self.limiter.reset()
+        self.cache.clear()
+        self.http_pool.close_all()
+
+    def spawn(self, config=None, on_change=None):
+        """A client for another session to the same server, e.g. for a SessionPool,
+        or, given its own ``config``, to another server.
+
+        It has its own session, SSE listener, pending map, connections and
+        limiter, but shares request ids and metrics with this client. Its
+        gauges are not registered on the shared metrics; a ServerRegistry
+        does that for the clients of the servers it holds.
+        """
+        member = MCPClient(config or self.config, self._callbacks, self.log, on_change)
+        member.id_allocator = self.id_allocator
+        member.metrics = self.metrics
+        return member
+
+    def shutdown(self):
+        self.stop_sse_listener()
+        with self._lock:
+            self.pending_requests.clear()
+        self.timeout_scheduler.shutdown()
+        self.limiter.shutdown()
+        self.http_pool.close_all()
+        self.request_executor.shutdown()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self.pending_requests)
+
+    def http_post(self, url, headers, payload):
+        """POST a JSON-RPC payload, returning (status, [(name, value)], body).
+
+        Uses the keep-alive connection pool unless it is disabled in Settings,
+        in which case every request goes through Burp with Connection: close.
+        Status is None when Burp returned no response.
+        """
+        is_https, host, port, path = parse_url(url)
+        payload_bytes = payload.encode("utf-8")
+        self.metrics.incr("bytes_out", len(payload_bytes))
+
+        if self.config.use_connection_pool:
+            status, resp_headers, data = self.http_pool.request(
+                is_https, host, port, "POST", path, headers, payload_bytes,
+                timeout=self.config.max_total_timeout)
+            self.metrics.incr("bytes_in", len(data))
+            return status, resp_headers, data.decode("utf-8", "replace")
+
+        http_request = "POST %s HTTP/1.1\r\n" % path
+        http_request += "Host: %s:%d\r\n" % (host, port)
+        for k, v in headers.items():
+            http_request += "%s: %s\r\n" % (k, v)
+        http_request += "Content-Length: %d\r\n" % len(payload_bytes)
+        http_request += "Connection: close\r\n"
+        http_request += "\r\n"
+        http_request += payload
+
+        http_service = self._helpers.buildHttpService(host, port, is_https)
+        response = self._callbacks.makeHttpRequest(http_service,
+            self._helpers.stringToBytes(http_request))
+
+        resp_bytes = response.getResponse() if hasattr(response, 'getResponse') else response
+        if resp_bytes is None:
+            return None, [], ""
+        self.metrics.incr("bytes_in", len(resp_bytes))
+
+        resp_info = self._helpers.analyzeResponse(resp_bytes)
+        resp_headers = []
+        for header in resp_info.getHeaders()[1:]:
+            if ":" in header:
+                name, value = header.split(":", 1)
+                resp_headers.append((name.strip(), value.strip()))
+        body = self._helpers.bytesToString(resp_bytes[resp_info.getBodyOffset():])
+        return resp_info.getStatusCode(), resp_headers, body
+
+    def _capture_session_id(self, resp_headers):
+        for name, value in resp_headers:
+            if name.lower() == "mcp-session-id":
+                if not self.session_id:
+                    self.session_id = value
+                    self.log("Session ID: %s..." % self.session_id[:30])
+                break
+
+    def _build_post_headers(self):
+        headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+        headers.update(self.config.custom_headers)
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        return headers
+
+    def send_request_sync(self, method, params=None, req_id=None):
+        if not req_id:
+            req_id = self.id_allocator.next_id()
+        payload = json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params or {}})
+        url = self.config.url
+        started = time.time()
+        
+        try:
+            status, resp_headers, body = self.http_post(url, self._build_post_headers(), payload)
+            if status is None:
+                resp = {"error": {"code": -1, "message": "No response from server"}}
+            else:
+                self._capture_session_id(resp_headers)
+                resp = self.parse_sse_body(body, req_id) or {"error": {"code": -32700, "message": "Parse error"}}
+        except Exception as e:
+            resp = {"error": {"code": -1, "message": str(e)}}
+        self.metrics.observe_call(method, time.time() - started, "error" if "error" in resp else "ok")
+        return resp
+
+    def send_request_async(self, method, params, callback, timeout=None, req_id=None, use_cache=True):
+        if not req_id:
+            req_id = self.id_allocator.next_id()
+        if use_cache and self.cache.cacheable(method):
+            cache_key = self.cache_key(method, params)
+            cached = self.cached_response(cache_key, req_id)
+            if cached is not None:
+                if not self.request_executor.submit(callback, cached):
+                    callback(cached)
+                return req_id
+            callback = self._caching(callback, cache_key)
+        callback = self.metrics.timed_callback(method, callback, self.is_local_timeout)
+        
+        with self._lock:
+            self.pending_requests[req_id] = callback
+        
+        payload = {"jsonrpc": "2.0", "id": req_id, "method": method, "params": params or {}}
+        self._dispatch_post(payload, [req_id], timeout)
+        return req_id
+
+    def send_as_client(self, method, params, callback, client_id, timeout=None, use_cache=True):
+        """Send a call on behalf of a client that chose its own id.
+
+        The request goes upstream under a freshly allocated id, so clients
+        reusing ids cannot collide in pending_requests, and the reply is
+        handed back carrying the client's original id. A None client_id (a
+        client that sent no id) leaves the allocated id in the reply.
+        Returns the upstream id.
+        """
+        if client_id is not None:
+            callback = self.restoring_client_id(callback, client_id)
+        return self.send_request_async(method, params, callback, timeout, use_cache=use_cache)
+
+    def list_all(self, method, result_key, on_page, on_done, start=True):
+        """Enumerate a paginated list method, e.g. ("tools/list", "tools").
+
+        Returns the PagedListing; pass ``start=False`` to feed it the first
+        page yourself through ``listing.on_response``.
+        """
+        listing = PagedListing(self, method, result_key, on_page, on_done,
+                               self.config.list_prefetch, self.config.max_list_pages)
+        return listing.start() if start else listing
+
+    def cache_key(self, method, params):
+        return self.cache.make_key(self.config.url, self.session_id, method, params)
+
+    def cached_response(self, cache_key, req_id=None):
+        """Cached response for ``cache_key`` addressed to ``req_id``, or None; counts the hit or miss."""
+        cached = self.cache.get(cache_key, req_id)
+        self.metrics.incr("cache_hits" if cached is not None else "cache_misses")
+        return cached
+
+    def _caching(self, callback, cache_key):
+        def on_response(resp):
+            self.cache.put(cache_key, resp)
+            callback(resp)
+        return on_response
+
+    def restoring_client_id(self, callback, client_id):
+        def on_response(resp):
+            if isinstance(resp, dict) and "id" in resp:
+                resp = dict(resp)
+                resp["id"] = client_id
+            callback(resp)
+        return on_response
+
+    def send_batch_async(self, calls, timeout=None, use_cache=True):
+        """Send several JSON-RPC calls as one batch POST.
+
+        ``calls`` is a list of (method, params, callback, req_id) tuples. A
+        None req_id is assigned automatically; a None callback sends the entry
+        as a notification. Each response is routed to its caller by id,
+        whether it comes back in the POST body or later over SSE. Entries
+        answered from the response cache are left out of the POST.
+        """
+        payload = []
+        req_ids = []
+        cache_hits = []
+        with self._lock:
+            for method, params, callback, req_id in calls:
+                message = {"jsonrpc": "2.0", "method": method, "params": params or {}}
+                if callback is not None:
+                    if req_id is None:
+                        req_id = self.id_allocator.next_id("batch")
+                    if use_cache and self.cache.cacheable(method):
+                        cache_key = self.cache_key(method, params)
+                        cached = self.cached_response(cache_key, req_id)
+                        if cached is not None:
+                            cache_hits.append((callback, cached))
+                            continue
+                        callback = self._caching(callback, cache_key)
+                    message["id"] = req_id
+                    self.pending_requests[req_id] = self.metrics.timed_callback(
+                        method, callback, self.is_local_timeout)
+                    req_ids.append(req_id)
+                payload.append(message)
+        for callback, cached in cache_hits:
+            if not self.request_executor.submit(callback, cached):
+                callback(cached)
+        if payload:
+            self._dispatch_post(payload, req_ids, timeout)
+
+    def _dispatch_post(self, payload, req_ids, timeout=None):
+        """POST one message or a batch on the request executor.
+
+        Responses in the body are delivered by id; ids left unanswered by a
+        202 wait for SSE under the timeout scheduler. POSTs expecting replies
+        wait for a permit from the adaptive limiter, returned with the last reply.
+        """
+        if not timeout:
+            timeout = self.config.request_timeout
+        payload_text = json.dumps(payload)
+        url = self.config.url
+        
+        def req_thread():
+            try:
+                status, resp_headers, body = self.http_post(url, self._build_post_headers(), payload_text)
+                self.complete_post(status, resp_headers, body, req_ids, timeout)
+            except Exception as e:
+                self._fail_pending(req_ids, {"code": -1, "message": str(e)})
+
+        if not req_ids:
+            self.request_executor.submit(req_thread)
+            return
+
+        permit = [None, None]
+        self._track_permit(req_ids, permit)
+
+        def start(token):
+            permit[0], permit[1] = token, time.time()
+            if not self.request_executor.submit(req_thread):
+                self._fail_pending(req_ids, {"code": -32000, "message": "Request queue full"})
+
+        if not self.limiter.submit(start):
+            self._fail_pending(req_ids, {"code": -32000, "message": "Request queue full"})
+
+    def _track_permit(self, req_ids, permit):
+        """Wrap the pending callbacks of one POST to release its permit ``[token, sent_at]``.
+
+        The permit goes back when the last id is settled, with the worst
+        outcome seen, before that reply's callback runs.
+        """
+        state = {"left": len(req_ids), "outcome": "ok"}
+        lock = threading.Lock()
+
+        def releasing(callback):
+            def on_response(resp):
+                outcome = self.limiter.outcome(resp, self.is_local_timeout)
+                with lock:
+                    state["left"] -= 1
+                    if outcome != "ok":
+                        state["outcome"] = outcome
+                    done = state["left"] == 0
+                if done:
+                    self.limiter.release(permit[0], time.time() - (permit[1] or time.time()), state["outcome"])
+                callback(resp)
+            return on_response
+
+        with self._lock:
+            for req_id in req_ids:
+                callback = self.pending_requests.get(req_id)
+                if callback is not None:
+                    self.pending_requests[req_id] = releasing(callback)
+
+    def _retry_after(self, resp_headers):
+        """Seconds from a Retry-After header (delta or HTTP date), or None."""
+        for name, value in resp_headers:
+            if name.lower() != "retry-after":
+                continue
+            try:
+                return max(0, int(value.strip()))
+            except ValueError:
+                parsed = email.utils.parsedate_tz(value)
+                if parsed:
+                    return max(0, int(email.utils.mktime_tz(parsed) - time.time()))
+        return None
+
+    def complete_post(self, status, resp_headers, body, req_ids, timeout=None):
+        """Settle the pending ``req_ids`` from the HTTP response to their POST.
+
+        Replies in a 200 body are delivered inline; after a 202 the ids wait
+        for SSE under the timeout scheduler; anything else fails them. Also
+        used for POSTs that were sent by someone else, e.g. the Burp bridge.
+        """
+        if status is None:
+            self._fail_pending(req_ids, {"code": -1, "message": "No response from server"})
+            return
+
+        self._capture_session_id(resp_headers)
+
+        if status == 202:
+            for req_id in req_ids:
+                with self._lock:
+                    still_pending = req_id in self.pending_requests
+                if still_pending:
+                    self.timeout_scheduler.schedule(req_id, timeout or self.config.request_timeout,
+                                                    self.config.max_total_timeout, self.config.reset_on_progress)
+        elif status == 200:
+            messages = self.parse_sse_messages(body)
+            delivered = self._deliver_messages(messages, inline=True)
+            leftover = [r for r in req_ids if r not in delivered]
+            if not leftover:
+                return
+            unmatched = [m for m in messages if m.get("id") not in delivered]
+            replies = [m for m in unmatched if "result" in m or "error" in m]
+            if len(leftover) == 1 and unmatched:
+                # Server did not echo our id; fall back to the first reply
+                with self._lock:
+                    callback = self.pending_requests.pop(leftover[0], None)
+                if callback:
+                    callback((replies or unmatched)[0])
+            elif replies and replies[0].get("error"):
+                # A single error for the whole batch, e.g. batching unsupported
+                self._fail_pending(leftover, replies[0]["error"])
+            else:
+                self._fail_pending(leftover, {"code": -32700, "message": "Parse error"})
+        else:
+            if status in self.limiter.OVERLOAD_STATUSES:
+                retry_after = self._retry_after(resp_headers)
+                self.limiter.backoff(retry_after)
+                self.log("HTTP %d from server, backing off (Retry-After %s): %s", True,
+                         args=(status, retry_after, self.limiter.stats()))
+            self._fail_pending(req_ids, {"code": status, "message": body[:200]})
+
+    def expect_response(self, req_id, method, callback):
+        """Route the reply to ``req_id`` to ``callback`` for a POST sent outside this client.
+
+        The request is held no longer than ``max_total_timeout`` even if
+        ``complete_post`` is never called for it.
+        """
+        callback = self.metrics.timed_callback(method, callback, self.is_local_timeout)
+        with self._lock:
+            self.pending_requests[req_id] = callback
+        self.timeout_scheduler.schedule(req_id, self.config.max_total_timeout,
+                                        self.config.max_total_timeout, False)
+
+    def parse_sse_body(self, body, req_id=None):
+        messages = self.parse_sse_messages(body)
+        for msg in messages:
+            if req_id is not None and msg.get("id") == req_id:
+                return msg
+        return messages[0] if messages else None
+
+    def parse_sse_messages(self, body):
+        """Return every JSON-RPC message in a JSON or text/event-stream body.
+
+        Batch (array) responses and multiple SSE events are flattened into one
+        list of message dicts, in the order they were received.
+        """
+        if not body or not body.strip():
+            return []
+        try:
+            return self._flatten_messages(json.loads(body))
+        except:
+            pass
+        parser = SSEParser()
+        messages = []
+        for event_type, event_data in parser.feed(body.encode("utf-8") + b"\n\n"):
+            try:
+                messages.extend(self._flatten_messages(json.loads('\n'.join(event_data))))
+            except:
+                continue
+        return messages
+
+    def _flatten_messages(self, parsed):
+        if isinstance(parsed, list):
+            return [m for m in parsed if isinstance(m, dict)]
+        if isinstance(parsed, dict):
+            return [parsed]
+        return []
+
+    def _deliver_messages(self, messages, inline=False):
+        """Hand each response to the callback waiting on its id.
+
+        Callbacks run on the request executor unless ``inline`` is set.
+        Returns the ids that were delivered.
+        """
+        delivered = []
+        for msg in messages:
+            if "id" not in msg and "method" in msg:
+                if self.cache.handle_notification(msg):
+                    self.log("Response cache invalidated by %s" % msg["method"])
+                continue
+            if "id" not in msg or ("result" not in msg and "error" not in msg):
+                continue
+            req_id = msg["id"]
+            with self._lock:
+                callback = self.pending_requests.pop(req_id, None)
+            if not callback:
+                continue
+            self.timeout_scheduler.cancel(req_id)
+            delivered.append(req_id)
+            if inline or not self.request_executor.submit(callback, msg):
+                callback(msg)
+        return delivered
+
+    def _fail_pending(self, req_ids, error):
+        for req_id in req_ids:
+            with self._lock:
+                callback = self.pending_requests.pop(req_id, None)
+            self.timeout_scheduler.cancel(req_id)
+            if callback:
+                callback({"error": error})
+
+    def start_sse_listener(self):
+        if self.sse_running:
+            return
+        self.sse_running = True
+        
+        def sse_listener():
+            sse_url = self.sse_endpoint if self.sse_endpoint else self.config.url
+            self.log("Starting SSE stream: %s" % sse_url)
+            parser = SSEParser()
+            retry_count = 0
+            while self.sse_running and retry_count < 5:
+                delay = 2
+                try:
+                    self.metrics.incr("sse_connects")
+                    status = self._read_sse_stream(sse_url, parser)
+                    if status == 200:
+                        retry_count = 0
+                        delay = 1
+                    elif status == 405:
+                        self.log("SSE endpoint returned 405, stopping SSE stream")
+                        break
+                    else:
+                        retry_count += 1
+                except Exception as e:
+                    if self.sse_running:
+                        self.log("SSE stream error: %s" % str(e))
+                    retry_count += 1
+                if parser.retry_ms is not None:
+                    delay = parser.retry_ms / 1000.0
+                if self.sse_running:
+                    time.sleep(delay)
+            self.sse_running = False
+        
+        t = threading.Thread(target=sse_listener)
+        t.daemon = True
+        t.start()
+        self.sse_thread = t
+
+    def _read_sse_stream(self, sse_url, parser):
+        """Hold one GET text/event-stream open, dispatching events as they arrive.
+
+        Returns the HTTP status once the stream ends or the listener stops.
+        """
+        is_https, host, port, path = parse_url(sse_url)
+
+        http_request = "GET %s HTTP/1.1\r\n" % path
+        http_request += "Host: %s:%d\r\n" % (host, port)
+        http_request += "Accept: text/event-stream\r\n"
+        http_request += "Cache-Control: no-cache\r\n"
+        if self.session_id:
+            http_request += "Mcp-Session-Id: %s\r\n" % self.session_id
+        if parser.last_event_id:
+            http_request += "Last-Event-ID: %s\r\n" % parser.last_event_id
+        for k, v in self.config.custom_headers.items():
+            http_request += "%s: %s\r\n" % (k, v)
+        http_request += "\r\n"
+
+        # Short reads let the loop notice a disconnect without closing the socket
+        sock = self.http_pool.open_stream(is_https, host, port, 1.0)
+        self.sse_socket = sock
+        try:
+            sock.sendall(http_request.encode("utf-8"))
+
+            buf = b""
+            last_data = time.time()
+            while b"\r\n\r\n" not in buf:
+                chunk = self._recv_sse(sock)
+                if chunk is None:
+                    if not self.sse_running or time.time() - last_data > self.config.request_timeout:
+                        return None
+                    continue
+                if not chunk:
+                    return None
+                self.metrics.incr("bytes_in", len(chunk))
+                buf += chunk
+                last_data = time.time()
+
+            head, body = buf.split(b"\r\n\r\n", 1)
+            head_lines = head.decode("iso-8859-1").split("\r\n")
+            status = int(head_lines[0].split(" ")[1])
+            headers = {}
+            for line in head_lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            if status != 200:
+                return status
+
+            chunked = "chunked" in headers.get("transfer-encoding", "").lower()
+            decoder = ChunkedDecoder() if chunked else None
+            while self.sse_running:
+                if body:
+                    data = decoder.feed(body) if decoder else body
+                    for event_type, event_data in parser.feed(data):
+                        self.process_sse_event(event_type, event_data)
+                    if decoder and decoder.finished:
+                        break
+                    last_data = time.time()
+                body = self._recv_sse(sock)
+                if body is None:
+                    if time.time() - last_data > self.config.sse_idle_timeout:
+                        self.log("SSE stream idle for %ds, reconnecting" % self.config.sse_idle_timeout)
+                        break
+                    body = b""
+                    continue
+                if not body:
+                    break
+                self.metrics.incr("bytes_in", len(body))
+            return status
+        finally:
+            self.sse_socket = None
+            try:
+                sock.close()
+            except:
+                pass
+
+    def _recv_sse(self, sock):
+        """Read what is available from the stream; None on a read timeout."""
+        try:
+            return sock.recv(65536)
+        except socket.timeout:
+            return None
+
+    def process_sse_event(self, event_type, event_data):
+        if not event_data:
+            return
+        try:
+            self.metrics.mark("sse_events")
+            data_str = '\n'.join(event_data)
+            if event_type == "endpoint":
+                self.sse_endpoint = data_str
+                self.log("SSE Endpoint updated: %s" % self.sse_endpoint)
+                self._notify_change()
+                return
+            if event_type == "progress":
+                parsed = json.loads(data_str)
+                if "id" in parsed:
+                    self.timeout_scheduler.touch(parsed["id"])
+                return
+            messages = self._flatten_messages(json.loads(data_str))
+            self._deliver_messages([m for m in messages if "jsonrpc" in m])
+        except:
+            pass
+
+    def is_local_timeout(self, resp):
+        """True for the Timeout error raised here, as opposed to one from the server."""
+        error = resp.get("error")
+        return "jsonrpc" not in resp and isinstance(error, dict) and error.get("message") == "Timeout"
+
+    def _on_request_timeout(self, req_id):
+        with self._lock:
+            cb = self.pending_requests.pop(req_id, None)
+        if cb:
+            error = {"error": {"code": -32000, "message": "Timeout"}}
+            if not self.request_executor.submit(cb, error):
+                cb(error)
+
+
+class SessionPool(object):
+    """The connected client plus extra sessions to the same server.
+
+    ``open(size)`` runs ``initialize`` on ``size - 1`` spawned clients, each
+    with its own SSE listener and pending map, next to the already
+    connected primary. ``pick`` chooses a member round-robin or by fewest
+    requests in flight, or by a pin: a 1-based member number or a session
+    id. ``send_request_async``, ``send_as_client`` and ``is_local_timeout``
+    match MCPClient, so callers that only send calls can take a pool
+    instead of a client.
+    """
+
+    STRATEGIES = ("least-loaded", "round-robin")
+
+    def __init__(self, client, strategy="least-loaded", log=None):
+        self.primary = client
+        self.strategy = strategy
+        self.log = log or (lambda msg, force=False, args=None: None)
+        self.members = [client]
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    def open(self, size):
+        """Bring the pool to ``size`` sessions; returns how many are open."""
+        members = list(self.members)
+        if size <= len(members) or not self.primary.session_id:
+            return len(members)
+        spawned = [self.primary.spawn() for _ in range(size - len(members))]
+        results = [None] * len(spawned)
+
+        def init(i):
+            try:
+                results[i] = spawned[i].initialize()
+            except Exception as e:
+                results[i] = {"error": {"code": -1, "message": str(e)}}
+
+        threads = [threading.Thread(target=init, args=(i,), name="mcp-session-init") for i in range(len(spawned))]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+        for member, resp in zip(spawned, results):
+            if isinstance(resp, dict) and "result" in resp and member.session_id:
+                members.append(member)
+            else:
+                self.log("Extra session failed to initialize: %s", True, args=(json.dumps(resp),))
+                member.shutdown()
+        with self._lock:
+            self.members = members
+        self.log("Session pool: %d sessions (%s)", True, args=(len(members), self.strategy))
+        return len(members)
+
+    def close(self):
+        """Drop every session except the primary."""
+        with self._lock:
+            extra, self.members = self.members[1:], [self.primary]
+        for member in extra:
+            member.disconnect()
+            member.shutdown()
+
+    def apply_config(self):
+        for member in self.members[1:]:
+            member.apply_config()
+
+    def size(self):
+        return len(self.members)
+
+    def load(self, member):
+        return member.limiter.in_flight + member.limiter.queued_count()
+
+    def pick(self, pin=None):
+        """The member to send on; None when ``pin`` names no open session."""
+        members = self.members
+        if pin:
+            pin = pin.strip()
+            if pin.isdigit():
+                n = int(pin)
+                return members[n - 1] if 0 < n <= len(members) else None
+            for member in members:
+                if member.session_id == pin:
+                    return member
+            return None
+        if len(members) == 1:
+            return members[0]
+        if self.strategy == "round-robin":
+            return members[next(self._turn) % len(members)]
+        return min(members, key=self.load)
+
+    def number(self, member):
+        """1-based position of ``member``, as accepted by ``pick``."""
+        try:
+            return self.members.index(member) + 1
+        except ValueError:
+            return None
+
+    def send_request_async(self, method, params, callback, timeout=None, req_id=None, use_cache=True):
+        return self.pick().send_request_async(method, params, callback, timeout, req_id, use_cache)
+
+    def send_as_client(self, method, params, callback, client_id, timeout=None, use_cache=True):
+        return self.pick().send_as_client(method, params, callback, client_id, timeout, use_cache)
+
+    def is_local_timeout(self, resp):
+        return self.primary.is_local_timeout(resp)
+
+    def stats(self):
+        members = self.members
+        if len(members) == 1:
+            return "1 session"
+        return "%d sessions, %s: %s" % (len(members), self.strategy, ", ".join(
+            "#%d %s... (%d in flight)" % (i + 1, (m.session_id or "?")[:8], self.load(m))
+            for i, m in enumerate(members)))
+
+
+class ServerConnection(object):
+    """One MCP server: its own settings, client, session pool and inventory.
+
+    Connections never share a session, SSE listener or pending map, so any
+    number of them can be connected at once. The inventory lists are the
+    ones the UI shows while this server is selected.
+    """
+
+    def __init__(self, name, config, client):
+        self.name = name
+        self.config = config
+        self.client = client
+        self.sessions = SessionPool(client, config.session_pool_strategy, client.log)
+        self.tools = []
+        self.tool_index = ToolIndex()
+        self.resources = []
+        self.prompts = []
+        self.listings = {}
+
+    def connected(self):
+        return self.client.session_id is not None
+
+    def connect(self):
+        """Initialize, then open the configured number of pool sessions; returns the response."""
+        resp = self.client.initialize()
+        if resp and "result" in resp and self.config.session_pool_size > 1:
+            self.sessions.open(self.config.session_pool_size)
+        return resp
+
+    def disconnect(self):
+        for listing in self.listings.values():
+            listing.cancel()
+        self.listings = {}
+        self.sessions.close()
+        self.client.disconnect()
+        self.tools = []
+        self.tool_index = ToolIndex()
+        self.resources = []
+        self.prompts = []
+
+    def apply_config(self, shared):
+        """Take the extension-wide settings from ``shared`` and push them to the live objects."""
+        self.config.update_shared(shared)
+        self.client.apply_config()
+        self.sessions.strategy = self.config.session_pool_strategy
+        self.sessions.apply_config()
+
+    def shutdown(self):
+        self.sessions.close()
+        self.client.shutdown()
+
+
+class ServerRegistry(object):
+    """Named ServerConnections in the order they were added.
+
+    ``selected`` is the server the UI shows; requests reach any server
+    through a ``/srv/<name>/`` path prefix and the selected one otherwise.
+    Each server's client gauges are registered on the shared metrics under
+    its name, and the unlabelled gauges follow the selected server.
+    """
+
+    PREFIX = "/srv/"
+
+    def __init__(self):
+        self._servers = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.selected = None
+
+    def add(self, server):
+        with self._lock:
+            self._servers[server.name] = server
+            first = self.selected is None
+        server.client.register_gauges(server.name)
+        if first:
+            self.select(server)
+        return server
+
+    def select(self, server):
+        """Make ``server`` the default route and point the unlabelled gauges at it."""
+        self.selected = server
+        if server is not None:
+            server.client.register_gauges()
+
+    def remove(self, name):
+        with self._lock:
+            server = self._servers.pop(name, None)
+            reselect = server is not None and server is self.selected
+        if server is not None:
+            server.client.metrics.unregister_gauges(name)
+        if reselect:
+            self.select(next(iter(self._servers.values()), None))
+            if self.selected is None:
+                # Nothing left to follow; don't keep reporting (and holding) this client
+                server.client.unregister_gauges()
+        return server
+
+    def rename(self, server, name):
+        with self._lock:
+            items = [(name if key == server.name else key, value) for key, value in self._servers.items()]
+            self._servers = collections.OrderedDict(items)
+            old_name, server.name = server.name, name
+        server.client.metrics.unregister_gauges(old_name)
+        server.client.register_gauges(name)
+
+    def get(self, name):
+        return self._servers.get(name)
+
+    def names(self):
+        return list(self._servers.keys())
+
+    def find_url(self, url):
+        """The first server configured for ``url``, or None."""
+        for server in self.all():
+            if server.config.url == url:
+                return server
+        return None
+
+    def all(self):
+        return list(self._servers.values())
+
+    def name_for(self, url, exclude=None):
+        """An unused, path-safe name derived from ``url``'s host and port."""
+        _, host, port, _ = parse_url(url)
+        base = re.sub(r"[^A-Za-z0-9._-]", "-", "%s-%d" % (host, port)) or "server"
+        name, n = base, 1
+        while name in self._servers and self._servers[name] is not exclude:
+            n += 1
+            name = "%s-%d" % (base, n)
+        return name
+
+    def route(self, path):
+        """The server a request path addresses, or None for an unknown ``/srv/<name>/``."""
+        if not path.startswith(self.PREFIX):
+            return self.selected
+        name = path[len(self.PREFIX):].split("/", 1)[0].split("?", 1)[0]
+        return self._servers.get(name)
+
+    def path_for(self, server):
+        return "%s%s/" % (self.PREFIX, server.name)
+
+
+class VirtualProxyServer(object):
+    """HTTP/1.1 front end that turns JSON-RPC POSTs into MCP calls.
+
+    Each accepted connection is served by the proxy handler pool, with
+    keep-alive and in-order pipelining, until the client closes it or it
+    sits idle past ``proxy_idle_timeout``. ``GET /metrics`` returns the
+    client's MetricsRegistry instead of forwarding. ``log(msg, force, args)``
+    receives the proxy's activity log. With a SessionPool, calls are spread
+    over its sessions; a client pins one with an ``X-MCP-Session`` header
+    (member number or session id) and every response names the member used.
+    With a ServerRegistry, ``/srv/<name>/`` paths go to that server and
+    other paths to the selected one.
+    """
+
+    SESSION_HEADER = "X-MCP-Session"
+
+    def __init__(self, client, config, log=None, sessions=None, servers=None):
+        self.client = client
+        self.sessions = sessions
+        self.servers = servers
+        self.config = config
+        self.log = log or (lambda msg, force=False, args=None: None)
+        self.server = None
+        self.port = None
+        self.running = False
+        self.clients = set()
+        self._lock = threading.Lock()
+        self.executor = BoundedExecutor("mcp-proxy", config.proxy_max_connections,
+                                        config.proxy_backlog, lambda msg: self.log(msg, True))
+        self.metrics = client.metrics
+        self.metrics.register_gauge("proxy_connections_open", self.open_connections)
+        self.journal = TrafficJournal(config.journal_capacity, config.journal_spill_path)
+
+    def apply_config(self):
+        self.executor.configure(self.config.proxy_max_connections, self.config.proxy_backlog)
+        self.journal.configure(self.config.journal_capacity, self.config.journal_spill_path)
+
+    def start(self, port, host="127.0.0.1"):
+        """Bind the listener and start accepting; raises if the port is unavailable.
+
+        Pass port 0 to pick a free port, then read it back from ``self.port``.
+        """
+        if self.running:
+            return
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            server.bind((host, port))
+            server.listen(self.config.proxy_backlog)
+        except Exception:
+            server.close()
+            raise
+        server.settimeout(1.0)
+        self.server = server
+        self.port = server.getsockname()[1]
+        self.running = True
+
+        t = threading.Thread(target=self._accept_loop, args=(server,), name="mcp-proxy-accept")
+        t.daemon = True
+        t.start()
+
+    def stop(self):
+        self.running = False
+        if self.server:
+            try:
+                self.server.close()
+            except:
+                pass
+            self.server = None
+        with self._lock:
+            clients = list(self.clients)
+            self.clients.clear()
+        for client in clients:
+            try:
+                client.close()
+            except:
+                pass
+
+    def shutdown(self):
+        self.stop()
+        self.executor.shutdown()
+        self.journal.flush()
+
+    def open_connections(self):
+        with self._lock:
+            return len(self.clients)
+
+    def _accept_loop(self, server):
+        while self.running:
+            try:
+                client, _ = server.accept()
+            except socket.timeout:
+                continue
+            except Exception as e:
+                if self.running:
+                    self.log("Accept error: %s" % str(e))
+                break
+            with self._lock:
+                accepted = len(self.clients) < self.config.proxy_max_connections
+                if accepted:
+                    self.clients.add(client)
+            if not accepted or not self.executor.submit(self._handle_connection, client):
+                with self._lock:
+                    self.clients.discard(client)
+                self.metrics.incr("proxy_connections_rejected")
+                self._reject(client)
+            else:
+                self.metrics.incr("proxy_connections_accepted")
+
+    def _handle_connection(self, client):
+        """Serve HTTP/1.1 requests on one client connection until it closes.
+
+        Requests are answered in arrival order, so pipelined requests work;
+        the connection is dropped after ``proxy_idle_timeout`` seconds idle.
+        """
+        try:
+            client.settimeout(self.config.proxy_idle_timeout)
+            try:
+                client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except Exception:
+                pass
+            reader = HttpRequestReader(client, self.config.proxy_max_body_bytes)
+            while self.running:
+                try:
+                    request = reader.read_request()
+                except HttpParseError as e:
+                    self.log("Bad request: %s" % str(e))
+                    self._send_response(client, e.status, {"error": str(e)}, False)
+                    break
+                if request is None:
+                    break
+                method, path, version, headers, body = request
+                self.log("Request: %s %s %s", args=(method, path, version))
+
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.0":
+                    keep_alive = "keep-alive" in connection
+                else:
+                    keep_alive = "close" not in connection
+
+                server = self.servers.route(path) if self.servers is not None else None
+                if method == "GET" and path.split("?", 1)[0] == "/metrics":
+                    self._send_metrics(client, path, headers, keep_alive)
+                elif self.servers is not None and server is None:
+                    self._send_response(client, 404, {"error": "Unknown MCP server: %s" % path}, keep_alive)
+                else:
+                    self.metrics.incr("proxy_requests")
+                    self.metrics.incr("proxy_bytes_in", len(body or ""))
+                    started = time.time()
+                    exchange = {}
+                    status, response_body, extra_headers = self.handle_request(
+                        body, exchange, headers.get(self.SESSION_HEADER.lower()), server)
+                    sent = self._send_response(client, status, response_body, keep_alive,
+                                               extra_headers=extra_headers)
+                    self.journal.record(exchange.get("client_id"), exchange.get("upstream_id"),
+                                        exchange.get("method"), exchange.get("tool"), status,
+                                        time.time() - started, len(body or ""), sent,
+                                        extra_headers.get("X-MCP-Cache"))
+                if not keep_alive:
+                    break
+        except socket.timeout:
+            pass
+        except Exception as e:
+            if self.running:
+                self.log("Handler error: %s" % str(e))
+        finally:
+            with self._lock:
+                self.clients.discard(client)
+            try:
+                client.close()
+            except:
+                pass
+
+    def handle_request(self, body, exchange=None, pin=None, server=None):
+        """Forward one JSON-RPC body upstream; returns (status, response_body, headers).
+
+        Calls to cacheable methods are answered from the client's response
+        cache when possible; ``headers`` then carries ``X-MCP-Cache: HIT``
+        (or ``MISS`` when the call went upstream). ``exchange``, if given, is
+        filled with the method, tool name and client/upstream ids for the
+        traffic journal. ``pin`` selects a pool session as for SessionPool.pick;
+        ``server``, a ServerConnection, replaces the proxy's own client and pool.
+        """
+        if exchange is None:
+            exchange = {}
+        if not body:
+            return 400, {"error": "No JSON-RPC body"}, {}
+
+        try:
+            request_json = json.loads(body)
+        except:
+            return 400, {"error": "Invalid JSON"}, {}
+        if not isinstance(request_json, dict):
+            return 400, {"error": "Expected a JSON-RPC request object"}, {}
+
+        method = request_json.get("method")
+        params = request_json.get("params", {})
+        exchange["method"] = method
+        exchange["client_id"] = request_json.get("id")
+        if method == "tools/call" and isinstance(params, dict):
+            exchange["tool"] = params.get("name")
+        self.log("JSON-RPC: method=%s id=%s", args=(method or "?", request_json.get("id", "?")))
+
+        headers = {}
+        client, sessions = (server.client, server.sessions) if server else (self.client, self.sessions)
+        target = client
+        if sessions is not None:
+            target = sessions.pick(pin)
+            if target is None:
+                return 400, {"error": "Unknown MCP session: %s" % pin}, {}
+            headers[self.SESSION_HEADER] = str(sessions.number(target))
+
+        cache_key = None
+        if client.cache.cacheable(method):
+            cache_key = client.cache_key(method, params)
+            cached = client.cached_response(cache_key, request_json.get("id"))
+            if cached is not None:
+                self.log("Cache hit for id=%s", args=(request_json.get("id", "?"),))
+                headers["X-MCP-Cache"] = "HIT"
+                return 200, cached, headers
+            headers["X-MCP-Cache"] = "MISS"
+
+        future = ResponseFuture()
+        exchange["upstream_id"] = target.send_as_client(
+            method,
+            params,
+            future,
+            request_json.get("id"),
+            timeout=self.config.request_timeout,
+            use_cache=False
+        )
+
+        # The timeout scheduler (or the POST's own read timeout) completes the
+        # future when the request's real deadline passes; this bound is a backstop
+        response = future.result(self.config.max_total_timeout + 5)
+
+        if response and not client.is_local_timeout(response):
+            self.log("Response received for id=%s", args=(request_json.get("id", "?"),))
+            if cache_key:
+                client.cache.put(cache_key, response)
+            return 200, response, headers
+
+        self.log("Timeout for request id=%s", args=(request_json.get("id", "?"),))
+        return 504, {
+            "jsonrpc": "2.0",
+            "id": request_json.get("id"),
+            "error": {"code": -32000, "message": "MCP request timeout"}
+        }, headers
+
+    def _reject(self, client):
+        self.log("Proxy connection limit reached, rejecting connection")
+        try:
+            self._send_response(client, 503, {"error": "Proxy busy, too many concurrent connections"}, False)
+        except Exception:
+            pass
+        try:
+            client.close()
+        except:
+            pass
+
+    def _send_metrics(self, client, path, headers, keep_alive):
+        """Answer GET /metrics: Prometheus text, or JSON for ?format=json / Accept: application/json."""
+        if "format=json" in path or "application/json" in headers.get("accept", ""):
+            self._send_response(client, 200, self.metrics.snapshot(), keep_alive)
+        else:
+            self._send_response(client, 200, self.metrics.render_text(), keep_alive,
+                                "text/plain; version=0.0.4")
+
+    def _send_response(self, client, status_code, response_body, keep_alive=False,
+                       content_type="application/json", extra_headers=None):
+        if isinstance(response_body, (dict, list)):
+            response_body = json.dumps(response_body, indent=2)
+        body_bytes = response_body.encode("utf-8")
+        self.metrics.incr("proxy_bytes_out", len(body_bytes))
+
+        status_text = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+                       431: "Request Header Fields Too Large", 503: "Service Unavailable",
+                       504: "Gateway Timeout"}.get(status_code, "Error")
+
+        response = "HTTP/1.1 %d %s\r\n" % (status_code, status_text)
+        response += "Content-Type: %s\r\n" % content_type
+        response += "Content-Length: %d\r\n" % len(body_bytes)
+        response += "Connection: %s\r\n" % ("keep-alive" if keep_alive else "close")
+        for name, value in (extra_headers or {}).items():
+            response += "%s: %s\r\n" % (name, value)
+        response += "\r\n"
+
+        client.sendall(response.encode("utf-8") + body_bytes)
+        return len(body_bytes)
+
+
+class BurpBridge(object):
+    """In-process path from Burp's tools to the MCP server, bypassing the proxy socket.
+
+    ``process_http_message`` is fed by an IHttpListener. Requests carrying
+    the ``X-MCP-Bridge`` header are rewritten on their way out into the real
+    MCP POST (upstream URL, session and custom headers, a fresh upstream id),
+    so Burp sends them straight to the server. On the way back the reply,
+    taken from the body or, after a 202, from the SSE listener, replaces the
+    response with the caller's original id. Burp's extender API cannot
+    answer a request without sending it, so the bridge redirects the request
+    rather than answering it locally. With a ServerRegistry the request
+    path picks the server as it does for the Virtual Proxy.
+
+    Waiting for an SSE reply holds the Burp thread that called the listener,
+    which Burp shares across its tools, and the message cannot be completed
+    after the listener returns. The wait is therefore capped at the short
+    ``bridge_wait_timeout``; a reply that has not arrived by then is
+    answered with a 504.
+    """
+
+    MARKER = "X-MCP-Bridge"
+
+    def __init__(self, client, config, helpers, log=None, servers=None):
+        self.client = client
+        self.servers = servers
+        self.config = config
+        self.helpers = helpers
+        self.log = log or (lambda msg, force=False, args=None: None)
+        self.metrics = client.metrics
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def process_http_message(self, tool_flag, is_request, message_info):
+        try:
+            if is_request:
+                if self.config.burp_bridge:
+                    self._on_request(message_info)
+            elif self._calls:
+                self._on_response(message_info)
+        except Exception as e:
+            self.log("Bridge error: %s" % str(e), True)
+
+    def _marker(self, headers):
+        prefix = self.MARKER.lower() + ":"
+        for header in headers[1:]:
+            if header.lower().startswith(prefix):
+                return header.split(":", 1)[1].strip()
+        return None
+
+    def _decode(self, data):
+        text = self.helpers.bytesToString(data)
+        try:
+            return text.encode("iso-8859-1").decode("utf-8")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            return text
+
+    def _on_request(self, message_info):
+        request = message_info.getRequest()
+        info = self.helpers.analyzeRequest(request)
+        if self._marker(info.getHeaders()) is None:
+            return
+        client = self.client
+        if self.servers is not None:
+            server = self.servers.route(info.getHeaders()[0].split(" ")[1])
+            if server is None:
+                self.log("Bridge: no MCP server for %s", args=(info.getHeaders()[0],))
+                return
+            client = server.client
+        body = self._decode(request[info.getBodyOffset():])
+        try:
+            message = json.loads(body)
+        except ValueError:
+            message = None
+
+        upstream_id = client.id_allocator.next_id("bridge")
+        if isinstance(message, dict) and message.get("method") and message.get("id") is not None:
+            future = ResponseFuture()
+            with self._lock:
+                if len(self._calls) > 256:
+                    # Requests Burp never got a response for; their futures timed out
+                    for key, call in list(self._calls.items()):
+                        if call[1].done():
+                            del self._calls[key]
+                self._calls[upstream_id] = (message["id"], future, client)
+            client.expect_response(upstream_id, message["method"], future)
+            message["id"] = upstream_id
+            body = json.dumps(message)
+
+        is_https, host, port, path = parse_url(client.config.url)
+        headers = client._build_post_headers()
+        headers[self.MARKER] = upstream_id
+        payload = body.encode("utf-8")
+        head = "POST %s HTTP/1.1\r\nHost: %s:%d\r\n" % (path, host, port)
+        for name, value in headers.items():
+            head += "%s: %s\r\n" % (name, value)
+        head += "Content-Length: %d\r\n\r\n" % len(payload)
+        message_info.setHttpService(self.helpers.buildHttpService(host, port, is_https))
+        message_info.setRequest(self.helpers.stringToBytes(head.encode("utf-8") + payload))
+        self.log("Bridge: %s id=%s -> %s", args=(message and message.get("method"), upstream_id, client.config.url))
+
+    def _on_response(self, message_info):
+        upstream_id = self._marker(self.helpers.analyzeRequest(message_info.getRequest()).getHeaders())
+        if upstream_id is None:
+            return
+        with self._lock:
+            call = self._calls.pop(upstream_id, None)
+        if call is None:
+            return
+        client_id, future, client = call
+        self.metrics.incr("bridge_requests")
+
+        response = message_info.getResponse()
+        if response is None:
+            client.complete_post(None, [], "", [upstream_id])
+        else:
+            info = self.helpers.analyzeResponse(response)
+            resp_headers = []
+            for header in info.getHeaders()[1:]:
+                if ":" in header:
+                    name, value = header.split(":", 1)
+                    resp_headers.append((name.strip(), value.strip()))
+            client.complete_post(info.getStatusCode(), resp_headers,
+                                 self._decode(response[info.getBodyOffset():]), [upstream_id])
+
+        # Inline replies are already in; an SSE reply blocks this Burp thread
+        reply = future.result(self.config.bridge_wait_timeout)
+        if reply is None or client.is_local_timeout(reply):
+            status, reply = 504, {"jsonrpc": "2.0", "id": client_id,
+                                  "error": {"code": -32000, "message": "MCP request timeout"}}
+        else:
+            status = 200
+            if "id" in reply:
+                reply = dict(reply)
+                reply["id"] = client_id
+        payload = json.dumps(reply, indent=2).encode("utf-8")
+        head = "HTTP/1.1 %d %s\r\n" % (status, "OK" if status == 200 else "Gateway Timeout")
+        head += "Content-Type: application/json\r\n"
+        head += "Content-Length: %d\r\n" % len(payload)
+        head += "%s: in-process\r\n\r\n" % self.MARKER
+        message_info.setResponse(self.helpers.stringToBytes(head.encode("utf-8") + payload))
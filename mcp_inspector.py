@@ -2,112 +2,345 @@
 # MCP Inspector - Burp Suite extension for MCP security testing
 # Author: Manjesh S
 
-from burp import IBurpExtender, ITab, IMessageEditorController, IExtensionStateListener
+from burp import IBurpExtender, ITab, IMessageEditorController, IExtensionStateListener, IHttpListener
 from javax.swing import (JPanel, JButton, JTextField, JLabel,
                          JScrollPane, JTable, JOptionPane, JTextArea,
                          JTabbedPane, JCheckBox, JSpinner, SpinnerNumberModel, 
                          BorderFactory, JSplitPane, JComboBox,
-                         SwingUtilities, JPopupMenu, JMenuItem, Box, UIManager)
+                         SwingUtilities, JPopupMenu, JMenuItem, Box, UIManager, Timer,
+                         JFileChooser)
 from java.awt import BorderLayout, FlowLayout, Font, Color, GridBagLayout, GridBagConstraints, Insets, Cursor
-from javax.swing.table import DefaultTableModel
-from java.awt.event import MouseAdapter
+from javax.swing.table import AbstractTableModel
+from javax.swing.event import DocumentListener
+from javax.swing.text import DefaultCaret
+from java.awt.event import MouseAdapter, ActionListener
 import json
 import threading
 import traceback
 import re
 import time
+import os
+import sys
+import inspect
+
+# Burp does not put the extension's folder on sys.path; mcp_core.py sits beside this file
+_EXTENSION_DIR = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+if _EXTENSION_DIR not in sys.path:
+    sys.path.insert(0, _EXTENSION_DIR)
+
+from mcp_core import (MCPConfig, MCPClient, VirtualProxyServer, ToolIndex,
+                      NestedJsonUnescaper, UnescapeCancelled, LogRing, HistoryStore,
+                      BurpBridge, PayloadGenerator, FuzzCampaign, SessionPool, ServerConnection,
+                      ServerRegistry, sample_args)
+
+
+class InventoryTableModel(AbstractTableModel):
+    """Read-only table over a list of tools, resources or prompts.
+
+    The table shows the first ``count`` entries of the backing list, which
+    other threads may keep appending to; ``rows_appended`` (on the EDT)
+    exposes new entries with one insert event. Cells come from
+    ``row_fn(item)`` on first use and are memoized. Sorting and filtering
+    run on a worker thread and swap in the new row order with one event.
+
+    ``search_fn(text)``, when given, replaces the substring filter: it
+    returns matching item indices directly (e.g. from a ToolIndex) and is
+    fast enough to call on the EDT as the user types.
+    """
+
+    def __init__(self, columns, row_fn, search_fn=None):
+        self.columns = columns
+        self.row_fn = row_fn
+        self.search_fn = search_fn
+        self._items = []
+        self._count = 0
+        self._cells = {}
+        self._order = None
+        self._filter = ""
+        self._sort_column = None
+        self._sort_reverse = False
+        self._generation = 0
+
+    def getRowCount(self):
+        if self._order is not None:
+            return len(self._order)
+        return self._count
+
+    def getColumnCount(self):
+        return len(self.columns)
+
+    def getColumnName(self, column):
+        return self.columns[column]
+
+    def isCellEditable(self, row, column):
+        return False
+
+    def getValueAt(self, row, column):
+        return self._row(self._index(row), self._items, self._cells)[column]
+
+    def _index(self, row):
+        return self._order[row] if self._order is not None else row
+
+    def _row(self, index, items, cells):
+        row = cells.get(index)
+        if row is None:
+            row = cells[index] = self.row_fn(items[index])
+        return row
+
+    def set_items(self, items):
+        """Show a new backing list (EDT only)."""
+        self._items = items
+        self._count = len(items)
+        self._cells = {}
+        self._order = None
+        self.fireTableDataChanged()
+        if self._filter or self._sort_column is not None:
+            self._refresh_view()
+
+    def rows_appended(self):
+        """Expose entries appended to the backing list since the last call (EDT only)."""
+        first, self._count = self._count, len(self._items)
+        if self._count == first:
+            return
+        if self._filter or self._sort_column is not None:
+            self._refresh_view()
+        else:
+            self.fireTableRowsInserted(first, self._count - 1)
+
+    def set_filter(self, text):
+        self._filter = text.strip().lower()
+        self._refresh_view()
+
+    def sort_by(self, column):
+        """Sort on ``column``; a second click on the same column reverses the order."""
+        if self._sort_column == column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column, self._sort_reverse = column, False
+        self._refresh_view()
+
+    def _refresh_view(self):
+        self._generation += 1
+        generation = self._generation
+        items, count, cells = self._items, self._count, self._cells
+        text, column, reverse = self._filter, self._sort_column, self._sort_reverse
+        if not text and column is None:
+            self._order = None
+            self.fireTableDataChanged()
+            return
+
+        order = range(count)
+        if text and self.search_fn:
+            order = [i for i in self.search_fn(text) if i < count]
+            text = None
+            if column is None:
+                self._order = order
+                self.fireTableDataChanged()
+                return
+
+        def compute(order=order):
+            if text:
+                order = [i for i in order
+                         if any(text in (u"%s" % cell).lower() for cell in self._row(i, items, cells))]
+            if column is not None:
+                order = sorted(order, key=lambda i: _sort_key(self._row(i, items, cells)[column]),
+                               reverse=reverse)
+            order = list(order)
+
+            def apply():
+                if generation == self._generation:
+                    self._order = order
+                    self.fireTableDataChanged()
+            SwingUtilities.invokeLater(apply)
+
+        t = threading.Thread(target=compute, name="mcp-table-view")
+        t.daemon = True
+        t.start()
+
+
+def _sort_key(cell):
+    """Numbers sort by value, everything else case-insensitively as text, numbers first."""
+    if isinstance(cell, (int, long, float)) and not isinstance(cell, bool):
+        return (0, cell, u"")
+    return (1, 0, (u"%s" % cell).lower())
+
+
+class TableFilterListener(DocumentListener):
+    """Re-filters an InventoryTableModel as the filter field is edited."""
+
+    def __init__(self, field, model):
+        self.field = field
+        self.model = model
+
+    def insertUpdate(self, event):
+        self.model.set_filter(self.field.getText())
+
+    def removeUpdate(self, event):
+        self.model.set_filter(self.field.getText())
+
+    def changedUpdate(self, event):
+        pass
+
+
+class HeaderSortHandler(MouseAdapter):
+    """Sorts an InventoryTableModel when its column header is clicked."""
+
+    def __init__(self, table, model):
+        self.table = table
+        self.model = model
+
+    def mouseClicked(self, event):
+        column = self.table.columnAtPoint(event.getPoint())
+        if column >= 0:
+            self.model.sort_by(self.table.convertColumnIndexToModel(column))
+
+
+class LogView(object):
+    """Shows a LogRing in a JTextArea, appending new records in batches.
+
+    ``flush`` runs on the EDT from a Swing Timer. It formats only records
+    added since the previous flush (the newest ``max_lines`` of them),
+    appends them with one document insert and removes whole lines from the
+    top once the document holds more than ``max_lines``.
+    """
+
+    def __init__(self, ring, area, max_lines, timestamps=False, echo=None):
+        self.ring = ring
+        self.area = area
+        self.max_lines = max_lines
+        self.timestamps = timestamps
+        self.echo = echo
+        self.seq = ring.seq
+        self.placeholder = False
+
+    def show_placeholder(self, text):
+        self.area.setText(text)
+        self.placeholder = True
+
+    def clear(self):
+        self.area.setText("")
+        self.placeholder = False
+
+    def flush(self):
+        if self.ring.seq == self.seq:
+            return
+        records, self.seq, dropped = self.ring.since(self.seq, self.max_lines)
+        lines = [LogRing.format(record, self.timestamps) for record in records]
+        if self.echo:
+            self.echo(lines)
+        if dropped:
+            lines.insert(0, "... %d log lines dropped ..." % dropped)
+        if self.placeholder:
+            self.clear()
+
+        doc = self.area.getDocument()
+        doc.insertString(doc.getLength(), "\n".join(lines) + "\n", None)
+        root = doc.getDefaultRootElement()
+        # The trailing newline leaves an empty last element
+        excess = root.getElementCount() - 1 - self.max_lines
+        if excess > 0:
+            doc.remove(0, root.getElement(excess - 1).getEndOffset())
+        self.area.setCaretPosition(doc.getLength())
+
+
+class BridgeListener(IHttpListener):
+    """Feeds Burp's HTTP traffic to the in-process BurpBridge."""
+
+    def __init__(self, bridge):
+        self.bridge = bridge
+
+    def processHttpMessage(self, toolFlag, messageIsRequest, messageInfo):
+        self.bridge.process_http_message(toolFlag, messageIsRequest, messageInfo)
+
+
+class ServerSelectListener(ActionListener):
+    """Switches the UI to the server picked in the selector."""
+
+    def __init__(self, extender):
+        self.extender = extender
+
+    def actionPerformed(self, event):
+        if not self.extender._syncing_servers:
+            self.extender._on_server_selected()
+
 
 class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStateListener):
     
     VERSION = "2.1"
+    METRICS_REFRESH_MS = 2000
+    LOG_FLUSH_MS = 250
+    LOG_RING_CAPACITY = 5000
+    FUZZ_COLUMNS = ["#", "Tool", "Argument", "Category", "Payload", "Outcome", "Detail",
+                    "Latency (ms)", "Resp Bytes"]
+    JOURNAL_COLUMNS = ["#", "Time", "Client ID", "Upstream ID", "Method", "Tool", "Status",
+                       "Latency (ms)", "Req Bytes", "Resp Bytes", "Cache"]
     
+    DEFAULT_URL = "https://localhost/mcp"
+
     def __init__(self):
-        self.session_id = None
         self.initializing = False
-        self.tools = []
-        self.resources = []
-        self.prompts = []
-        self.server_capabilities = {}
-        self.protocol_version = None
-        self.sse_thread = None
-        self.sse_running = False
-        self.pending_requests = {}
-        self._lock = threading.Lock()
-        self.sse_endpoint = None
-        self.custom_headers = {}
-        self.last_progress_time = {}
-        self.request_history = []
+        self.servers = ServerRegistry()
+        self.server = None
+        self._syncing_servers = False
+        self._unescape_cancel = None
+        self.history = None
         self.history_index = -1
         
         self.verbose_logging = False
         self.max_log_lines = 1000
-        self._log_line_count = 0
-        
-        # Settings
-        self.request_timeout = 30
-        self.reset_on_progress = True
-        self.max_total_timeout = 300
+        self.log_ring = LogRing(self.LOG_RING_CAPACITY)
+        self.proxy_log_ring = LogRing(self.LOG_RING_CAPACITY)
+        self.log_view = None
+        self.proxy_log_view = None
+        self.log_timer = None
+        self._journal_items = []
+        self.fuzz_campaign = None
+        self.fuzz_wordlist = []
+        self._fuzz_results = []
+        self._journal_seq = 0
+        
+        self.config = MCPConfig()
+        self.client = None
+        self.sessions = None
+        self.proxy = None
+        self.metrics_timer = None
 
     def registerExtenderCallbacks(self, callbacks):
         self._callbacks = callbacks
         self._helpers   = callbacks.getHelpers()
         callbacks.setExtensionName("MCP Inspector v" + self.VERSION)
         callbacks.registerExtensionStateListener(self)
+
+        config = self.config.for_server(self.DEFAULT_URL)
+        client = MCPClient(config, callbacks, log=self._log, on_change=self._update_server_info)
+        self._activate(self.servers.add(ServerConnection(self.servers.name_for(config.url), config, client)))
+        self.proxy = VirtualProxyServer(self.client, self.config, log=self._proxy_log, servers=self.servers)
+        self.bridge = BurpBridge(self.client, self.config, self._helpers, log=self._proxy_log,
+                                 servers=self.servers)
+        callbacks.registerHttpListener(BridgeListener(self.bridge))
+        self.history = HistoryStore(self.config.history_path, self.config.history_max_entries,
+                                    self.config.history_memory_entries)
+
         self._init_ui()
         callbacks.addSuiteTab(self)
         
         self._log("MCP Inspector v%s loaded successfully" % self.VERSION)
+        self._load_history()
 
     def extensionUnloaded(self):
         self._callbacks.printOutput("MCP Inspector: Unloading extension, cleaning up...")
 
-        self.sse_running = False
-        if self.sse_thread and self.sse_thread.is_alive():
-            self.sse_thread.join(2)
-
-        self.proxy_running = False
-        if hasattr(self, 'proxy_server') and self.proxy_server:
-            try:
-                self.proxy_server.close()
-            except:
-                pass
-            self.proxy_server = None
-
-        with self._lock:
-            self.pending_requests.clear()
-            self.last_progress_time.clear()
+        if self.metrics_timer:
+            self.metrics_timer.stop()
+        if self.log_timer:
+            self.log_timer.stop()
+        self.proxy.shutdown()
+        for server in self.servers.all():
+            server.shutdown()
+        self.history.close()
         
         self._callbacks.printOutput("MCP Inspector: Extension unloaded successfully")
 
-    def _parse_url(self, url):
-        is_https = url.lower().startswith("https://")
-        scheme_end = url.find("://")
-        if scheme_end >= 0:
-            rest = url[scheme_end + 3:]
-        else:
-            rest = url
-
-        slash_pos = rest.find("/")
-        if slash_pos >= 0:
-            host_port = rest[:slash_pos]
-            path = rest[slash_pos:]
-        else:
-            host_port = rest
-            path = "/"
-
-        if ":" in host_port:
-            parts = host_port.rsplit(":", 1)
-            host = parts[0]
-            try:
-                port = int(parts[1])
-            except:
-                port = 443 if is_https else 80
-        else:
-            host = host_port
-            port = 443 if is_https else 80
-        
-        return is_https, host, port, path
-
     def _get_error_message(self, error):
         if isinstance(error, dict):
             return error.get("message", str(error))
@@ -155,7 +388,13 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         top_panel = JPanel(BorderLayout())
 
         conn_panel = JPanel(FlowLayout(FlowLayout.LEFT))
-        self.url_field = JTextField("https://localhost/mcp", 35)
+        self.url_field = JTextField(self.DEFAULT_URL, 35)
+
+        self.server_combo = JComboBox([self.server.name])
+        self.server_combo.setToolTipText("Connected servers stay connected; pick one to show it here")
+        self.server_combo.addActionListener(ServerSelectListener(self))
+        self.remove_server_btn = JButton("Remove", actionPerformed=self._on_remove_server_click)
+        self.remove_server_btn.setToolTipText("Disconnect the selected server and drop it from the list")
         
         self.connect_btn = JButton("Connect", actionPerformed=self._on_connect_click)
         self.connect_btn.setBackground(Color(46, 139, 87))
@@ -165,10 +404,13 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         self.disconnect_btn = JButton("Disconnect", actionPerformed=self._on_disconnect_click)
         self.disconnect_btn.setEnabled(False)
         
+        conn_panel.add(JLabel("Server:"))
+        conn_panel.add(self.server_combo)
         conn_panel.add(JLabel("Endpoint:"))
         conn_panel.add(self.url_field)
         conn_panel.add(self.connect_btn)
         conn_panel.add(self.disconnect_btn)
+        conn_panel.add(self.remove_server_btn)
 
         settings_panel = JPanel(FlowLayout(FlowLayout.LEFT))
         self.headers_btn = JButton("Headers", actionPerformed=self._edit_headers)
@@ -239,6 +481,9 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         proxy_panel = self._create_proxy_tab()
         main_tabs.addTab("Virtual Proxy", proxy_panel)
 
+        fuzzer_panel = self._create_fuzzer_tab()
+        main_tabs.addTab("Fuzzer", fuzzer_panel)
+
         info_panel = self._create_info_tab()
         main_tabs.addTab("Server Info", info_panel)
 
@@ -256,10 +501,13 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         self.refresh_tools_btn = JButton("Refresh", actionPerformed=self._list_tools)
         btn_panel.add(self.list_tools_btn)
         btn_panel.add(self.refresh_tools_btn)
-        btn_panel.add(JLabel("  Right-click a tool to send to Request Editor"))
         
-        self.tools_model = DefaultTableModel(["Name", "Parameters", "Description"], 0)
-        self.tools_table = JTable(self.tools_model)
+        self.tools_model = InventoryTableModel(["Name", "Parameters", "Description"],
+                                               lambda item: self._inventory_row("tools", item),
+                                               lambda text: self.server.tool_index.search(text))
+        self.tools_table = self._create_inventory_table(self.tools_model, btn_panel,
+            "Words or word prefixes from tool names, descriptions and parameter names")
+        btn_panel.add(JLabel("  Right-click a tool to send to Request Editor"))
         self.tools_table.getColumnModel().getColumn(0).setPreferredWidth(200)
         self.tools_table.getColumnModel().getColumn(1).setPreferredWidth(250)
         self.tools_table.getColumnModel().getColumn(2).setPreferredWidth(400)
@@ -290,6 +538,10 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
                     repeater_item = JMenuItem("Send to Repeater")
                     repeater_item.addActionListener(lambda e: self.extender._send_to_repeater(tool_name))
                     popup.add(repeater_item)
+
+                    fuzz_item = JMenuItem("Fuzz Tool")
+                    fuzz_item.addActionListener(lambda e: self.extender._fuzz_tool(tool_name))
+                    popup.add(fuzz_item)
                     
                     copy_item = JMenuItem("Copy Tool Name")
                     copy_item.addActionListener(lambda e: self.extender._copy_to_clipboard(tool_name))
@@ -305,6 +557,19 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         
         return panel
 
+    def _create_inventory_table(self, model, btn_panel, filter_tip=None):
+        """JTable over an InventoryTableModel, with a filter box added to ``btn_panel``."""
+        table = JTable(model)
+        table.getTableHeader().addMouseListener(HeaderSortHandler(table, model))
+        table.getTableHeader().setToolTipText("Click a column to sort")
+
+        filter_field = JTextField(18)
+        filter_field.setToolTipText(filter_tip or "Show rows containing this text")
+        filter_field.getDocument().addDocumentListener(TableFilterListener(filter_field, model))
+        btn_panel.add(JLabel("  Filter:"))
+        btn_panel.add(filter_field)
+        return table
+
     def _create_editor_tab(self):
         panel = JPanel(BorderLayout())
 
@@ -347,6 +612,11 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         self.prettify_btn.setForeground(Color.WHITE)
         self.prettify_btn.setOpaque(True)
         top.add(self.prettify_btn)
+
+        self.unescape_cancel_btn = JButton("Cancel", actionPerformed=self._cancel_unescape)
+        self.unescape_cancel_btn.setToolTipText("Stop a running unescape")
+        self.unescape_cancel_btn.setEnabled(False)
+        top.add(self.unescape_cancel_btn)
         
         panel.add(top, BorderLayout.NORTH)
         
@@ -385,10 +655,11 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         btn_panel = JPanel(FlowLayout(FlowLayout.LEFT))
         self.list_resources_btn = JButton("List Resources", actionPerformed=self._list_resources)
         btn_panel.add(self.list_resources_btn)
-        btn_panel.add(JLabel("  Right-click a resource to send to Request Editor"))
         
-        self.resources_model = DefaultTableModel(["URI", "Name", "Description", "MIME"], 0)
-        self.resources_table = JTable(self.resources_model)
+        self.resources_model = InventoryTableModel(["URI", "Name", "Description", "MIME"],
+                                                   lambda item: self._inventory_row("resources", item))
+        self.resources_table = self._create_inventory_table(self.resources_model, btn_panel)
+        btn_panel.add(JLabel("  Right-click a resource to send to Request Editor"))
         
         class ResourceMouseHandler(MouseAdapter):
             def __init__(self, extender):
@@ -434,8 +705,9 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         self.list_prompts_btn = JButton("List Prompts", actionPerformed=self._list_prompts)
         btn_panel.add(self.list_prompts_btn)
         
-        self.prompts_model = DefaultTableModel(["Name", "Description", "Arguments"], 0)
-        self.prompts_table = JTable(self.prompts_model)
+        self.prompts_model = InventoryTableModel(["Name", "Description", "Arguments"],
+                                                 lambda item: self._inventory_row("prompts", item))
+        self.prompts_table = self._create_inventory_table(self.prompts_model, btn_panel)
         prompts_scroll = JScrollPane(self.prompts_table)
         
         panel.add(btn_panel, BorderLayout.NORTH)
@@ -448,8 +720,21 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         self.info_area = JTextArea()
         self.info_area.setEditable(False)
         self.info_area.setFont(Font("Monospaced", Font.PLAIN, 12))
+        # Periodic refreshes replace the text; keep the reader's scroll position
+        self.info_area.getCaret().setUpdatePolicy(DefaultCaret.NEVER_UPDATE)
         info_scroll = JScrollPane(self.info_area)
         panel.add(info_scroll, BorderLayout.CENTER)
+        self.info_panel = panel
+
+        class MetricsRefreshListener(ActionListener):
+            def __init__(self, extender):
+                self.extender = extender
+            def actionPerformed(self, event):
+                tabs = self.extender.main_tabs
+                if tabs and tabs.getSelectedComponent() is self.extender.info_panel:
+                    self.extender._update_server_info()
+        self.metrics_timer = Timer(self.METRICS_REFRESH_MS, MetricsRefreshListener(self))
+        self.metrics_timer.start()
         return panel
 
     def _create_logs_tab(self):
@@ -470,30 +755,48 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         self.logs_area.setEditable(False)
         self.logs_area.setFont(Font("Monospaced", Font.PLAIN, 11))
 
+        def echo(lines):
+            self._callbacks.printOutput("\n".join("MCP: " + line for line in lines))
+        self.log_view = LogView(self.log_ring, self.logs_area, self.max_log_lines, echo=echo)
         if not self.verbose_logging:
-            self.logs_area.setText("=== LOGGING DISABLED ===\n\nTo save memory, logging is OFF.\n\nTo enable logs:\n- Check 'Verbose Logging' checkbox above\n\nProxy status is shown in the status bar below.")
+            self.log_view.show_placeholder("=== LOGGING DISABLED ===\n\nTo save memory, logging is OFF.\n\nTo enable logs:\n- Check 'Verbose Logging' checkbox above\n\nProxy status is shown in the status bar below.")
         logs_scroll = JScrollPane(self.logs_area)
         
         panel.add(btn_panel, BorderLayout.NORTH)
         panel.add(logs_scroll, BorderLayout.CENTER)
-        
+
+        class LogFlushListener(ActionListener):
+            def __init__(self, extender):
+                self.extender = extender
+            def actionPerformed(self, event):
+                self.extender._flush_logs()
+        self.log_timer = Timer(self.LOG_FLUSH_MS, LogFlushListener(self))
+        self.log_timer.start()
         return panel
     
+    def _flush_logs(self):
+        for flush in (self.log_view.flush, self.proxy_log_view.flush, self._refresh_journal,
+                      self._refresh_fuzz):
+            try:
+                flush()
+            except:
+                pass
+
     def _toggle_verbose(self):
         self.verbose_logging = self.verbose_checkbox.isSelected()
 
         if self.verbose_logging:
             self._callbacks.printOutput("MCP: Verbose logging ENABLED - all logs active")
-            self.logs_area.setText("")  # Clear placeholder
-            self.proxy_log_area.setText("")  # Clear placeholder
+            self.log_view.clear()
+            self.proxy_log_view.clear()
             self._log("Verbose logging ENABLED", force=True)
         else:
             self._callbacks.printOutput("MCP: Verbose logging DISABLED - all logs OFF to save memory")
 
             placeholder = "=== LOGGING DISABLED ===\n\nTo save memory, logging is OFF.\n\nTo enable logs:\n1. Go to 'Logs' tab\n2. Check 'Verbose Logging' checkbox\n\nProxy status is shown in the status bar below."
             def update_logs():
-                self.logs_area.setText(placeholder)
-                self.proxy_log_area.setText(placeholder)
+                self.log_view.show_placeholder(placeholder)
+                self.proxy_log_view.show_placeholder(placeholder)
             SwingUtilities.invokeLater(update_logs)
 
     def getTabCaption(self):   
@@ -519,115 +822,82 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         self._log("Copied: %s" % text[:50])
 
     def _prettify_response(self, event):
-        try:
-            response_bytes = self.response_editor.getMessage()
-            if not response_bytes or len(response_bytes) == 0:
-                self._log("No response to unescape")
-                return
-                
-            response_text = self._helpers.bytesToString(response_bytes)
-            original_length = len(response_text)
+        if self._unescape_cancel is not None:
+            return
+        response_bytes = self.response_editor.getMessage()
+        if not response_bytes or len(response_bytes) == 0:
+            self._log("No response to unescape")
+            return
+        response_text = self._helpers.bytesToString(response_bytes)
+
+        cancel = threading.Event()
+        self._unescape_cancel = cancel
+        self.prettify_btn.setEnabled(False)
+        self.unescape_cancel_btn.setEnabled(True)
+        self._update_status("Unescaping JSON...", "working")
 
+        def run():
+            started = time.time()
             try:
-                response_json = json.loads(response_text)
-            except Exception as e:
-                self._log("Response is not valid JSON: %s" % str(e))
-                return
-            
-            self._log("Processing response for nested JSON...")
+                try:
+                    response_json = json.loads(response_text)
+                except ValueError as e:
+                    self._update_status("Response is not valid JSON", "error")
+                    self._log("Response is not valid JSON: %s" % str(e))
+                    return
 
-            prettified = self._deep_unescape_json(response_json)
+                prettified, stats = NestedJsonUnescaper().unescape(response_json, cancel)
+                if not stats["unwrapped"]:
+                    self._update_status("No escaped JSON found in response", "info")
+                    return
 
-            pretty_text = json.dumps(prettified, indent=2, ensure_ascii=False)
-            new_length = len(pretty_text)
+                pretty_text = json.dumps(prettified, indent=2, ensure_ascii=False)
+                if cancel.is_set():
+                    raise UnescapeCancelled()
 
-            if pretty_text == response_text:
-                self._log("No escaped JSON found in response")
-                return
+                summary = "Unwrapped %d nested JSON strings (depth %d) in %d ms, %d -> %d bytes" % (
+                    stats["unwrapped"], stats["max_depth"], (time.time() - started) * 1000,
+                    len(response_text), len(pretty_text))
+                if stats["budget_exhausted"]:
+                    summary += ", stopped at %s budget" % stats["budget_exhausted"]
+                if stats["skipped_large"]:
+                    summary += ", %d oversized strings left escaped" % stats["skipped_large"]
 
-            self.response_editor.setMessage(self._helpers.stringToBytes(pretty_text), False)
-            self._log("Response unescaped successfully (was %d bytes, now %d bytes)" % (original_length, new_length))
-            
-        except Exception as e:
-            self._log("Unescape failed: %s" % str(e))
-            self._log(traceback.format_exc())
+                def update():
+                    if not cancel.is_set():
+                        self.response_editor.setMessage(self._helpers.stringToBytes(pretty_text), False)
+                SwingUtilities.invokeLater(update)
+                self._update_status(summary, "success")
+                self._log(summary)
+            except UnescapeCancelled:
+                self._update_status("Unescape cancelled", "info")
+            except Exception as e:
+                self._update_status("Unescape failed: %s" % str(e), "error")
+                self._log(traceback.format_exc(), level=LogRing.ERROR)
+            finally:
+                self._unescape_cancel = None
+                def restore():
+                    self.prettify_btn.setEnabled(True)
+                    self.unescape_cancel_btn.setEnabled(False)
+                SwingUtilities.invokeLater(restore)
 
-    def _deep_unescape_json(self, obj, depth=0):
-        if depth > 10:
-            return obj
-            
-        if isinstance(obj, dict):
-            result = {}
-            for key, value in obj.items():
-                result[key] = self._deep_unescape_json(value, depth + 1)
-            return result
-            
-        elif isinstance(obj, list):
-            return [self._deep_unescape_json(item, depth + 1) for item in obj]
-            
-        elif isinstance(obj, basestring):
-            stripped = obj.strip()
-
-            has_escapes = ('\\n' in stripped or '\\"' in stripped or '\\t' in stripped)
-            looks_like_json = (
-                (stripped.startswith('{') and stripped.endswith('}')) or
-                (stripped.startswith('[') and stripped.endswith(']'))
-            )
-            
-            if has_escapes or (looks_like_json and len(stripped) > 10):
-                try:
+        t = threading.Thread(target=run, name="mcp-unescape")
+        t.daemon = True
+        t.start()
 
-                    try:
-                        parsed = json.loads(stripped)
-                        self._log("Found nested JSON (already unescaped) at depth %d" % depth)
-                        return self._deep_unescape_json(parsed, depth + 1)
-                    except:
-                        pass
-
-                    unescaped = stripped
-                    if has_escapes:
-
-                        unescaped = unescaped.replace('\\n', '\n')
-                        unescaped = unescaped.replace('\\"', '"')
-                        unescaped = unescaped.replace('\\t', '\t')
-                        unescaped = unescaped.replace('\\r', '\r')
-                        unescaped = unescaped.replace('\\/', '/')
-                        unescaped = unescaped.replace('\\b', '\b')
-                        unescaped = unescaped.replace('\\f', '\f')
-
-                        unescaped = unescaped.replace('\\\\', '\\')
-                    
-                    parsed = json.loads(unescaped)
-                    self._log("Found and unescaped nested JSON at depth %d" % depth)
-                    return self._deep_unescape_json(parsed, depth + 1)
-                    
-                except (ValueError, TypeError):
-                    return obj
-            
-            return obj
-        else:
-            return obj
+    def _cancel_unescape(self, event):
+        cancel = self._unescape_cancel
+        if cancel is not None:
+            cancel.set()
 
-    def _log(self, msg, force=False):
+    def _log(self, msg, force=False, args=None, level=None):
+        """Queue ``msg % args`` for the Logs tab; formatting waits for the flush."""
         if not self.verbose_logging and not force:
             return
-        self._callbacks.printOutput("MCP: " + msg)
-        try:
-            self._log_line_count += 1
-            def update():
-                self.logs_area.append(msg + "\n")
-                if self._log_line_count % 100 == 0:
-                    text = self.logs_area.getText()
-                    lines = text.split('\n')
-                    if len(lines) > self.max_log_lines:
-                        self.logs_area.setText('\n'.join(lines[-self.max_log_lines:]))
-                self.logs_area.setCaretPosition(self.logs_area.getDocument().getLength())
-            SwingUtilities.invokeLater(update)
-        except:
-            pass
+        self.log_ring.append(level or (LogRing.INFO if force else LogRing.DEBUG), msg, args)
 
     def _clear_logs(self, event):
-        self.logs_area.setText("")
+        self.log_view.clear()
 
     def _update_status(self, msg, status_type="info"):
         def update():
@@ -659,33 +929,80 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
     def _update_server_info(self):
         info = []
         info.append("=== MCP Server Information ===\n")
-        info.append("Endpoint: %s\n" % self.url_field.getText())
-        info.append("Session ID: %s\n" % (self.session_id[:50] + "..." if self.session_id and len(self.session_id) > 50 else self.session_id or "None"))
-        info.append("SSE Endpoint: %s\n" % (self.sse_endpoint or "Same as MCP endpoint"))
-        info.append("Protocol Version: %s\n" % (self.protocol_version or "Unknown"))
-        info.append("SSE Connection: %s\n" % ("Active" if self.sse_running else "Inactive"))
+        info.append("Server: %s (proxy path %s)\n" % (self.server.name, self.servers.path_for(self.server)))
+        info.append("Endpoint: %s\n" % self.server.config.url)
+        info.append("Session ID: %s\n" % (self.client.session_id[:50] + "..." if self.client.session_id and len(self.client.session_id) > 50 else self.client.session_id or "None"))
+        info.append("SSE Endpoint: %s\n" % (self.client.sse_endpoint or "Same as MCP endpoint"))
+        info.append("Protocol Version: %s\n" % (self.client.protocol_version or "Unknown"))
+        info.append("SSE Connection: %s\n" % ("Active" if self.client.sse_running else "Inactive"))
         info.append("\n=== Transport Settings ===\n")
-        info.append("Request Timeout: %d seconds\n" % self.request_timeout)
-        info.append("Reset on Progress: %s\n" % self.reset_on_progress)
-        info.append("Max Total Timeout: %d seconds\n" % self.max_total_timeout)
+        info.append("Request Timeout: %d seconds\n" % self.config.request_timeout)
+        info.append("Reset on Progress: %s\n" % self.config.reset_on_progress)
+        info.append("Max Total Timeout: %d seconds\n" % self.config.max_total_timeout)
+        if self.config.use_connection_pool:
+            info.append("Connection Pool: %d per host, %ds idle timeout (%d idle, %d opened, %d reused)\n" % (
+                self.config.pool_size, self.config.pool_idle_timeout, self.client.http_pool.idle_count(),
+                self.client.http_pool.created, self.client.http_pool.reused))
+        else:
+            info.append("Connection Pool: Disabled (Connection: close via Burp)\n")
+        info.append("Batch Bulk Requests: %s\n" % self.config.batch_requests)
+        if self.config.cache_enabled:
+            info.append("Response Cache: %s\n" % self.client.cache.stats())
+        else:
+            info.append("Response Cache: Disabled\n")
+        info.append("Request Executor: %s\n" % self.client.request_executor.stats())
+        info.append("Adaptive Concurrency: %s\n" % self.client.limiter.stats())
+        info.append("Session Pool: %s\n" % self.sessions.stats())
+        info.append("All Servers: %s\n" % ", ".join(
+            "%s (%s)" % (server.name, "connected" if server.connected() else "idle") for server in self.servers.all()))
+        info.append("Proxy Connections: %d open (max %d, %ds keep-alive idle timeout)\n" % (
+            self.proxy.open_connections(), self.config.proxy_max_connections, self.config.proxy_idle_timeout))
+        info.append("Proxy Executor: %s\n" % self.proxy.executor.stats())
+        info.append("Awaiting SSE Response: %d requests\n" % self.client.timeout_scheduler.pending_count())
+        info.extend(self._format_metrics(self.client.metrics.snapshot()))
         info.append("\n=== Custom Headers ===\n")
-        if self.custom_headers:
-            for k, v in self.custom_headers.items():
+        if self.server.config.custom_headers:
+            for k, v in self.server.config.custom_headers.items():
                 display_val = v if len(v) < 50 else v[:47] + "..."
                 info.append("%s: %s\n" % (k, display_val))
         else:
             info.append("None\n")
         info.append("\n=== Server Capabilities ===\n")
-        info.append(json.dumps(self.server_capabilities, indent=2, ensure_ascii=False))
+        info.append(json.dumps(self.client.server_capabilities, indent=2, ensure_ascii=False))
         
         def update():
-            self.info_area.setText("".join(info))
+            text = "".join(info)
+            if text != self.info_area.getText():
+                self.info_area.setText(text)
         SwingUtilities.invokeLater(update)
 
+    def _format_metrics(self, snap):
+        counters = snap["counters"]
+        gauges = snap["gauges"]
+        sse = snap["rates"].get("sse_events", {"per_second": 0, "total": 0})
+        lines = ["\n=== Live Metrics (every %ds, GET /metrics on the proxy) ===\n" % (self.METRICS_REFRESH_MS // 1000)]
+        lines.append("Uptime: %ds\n" % snap["uptime_seconds"])
+        lines.append("Bytes In / Out: %d / %d\n" % (counters.get("bytes_in", 0), counters.get("bytes_out", 0)))
+        lines.append("Pending Requests: %s\n" % gauges.get("pending_requests"))
+        lines.append("SSE Events: %.1f/s (%d total, %d stream connects)\n" % (
+            sse["per_second"], sse["total"], counters.get("sse_connects", 0)))
+        lines.append("Proxy Connections: %s open, %d accepted, %d rejected, %d requests\n" % (
+            gauges.get("proxy_connections_open"), counters.get("proxy_connections_accepted", 0),
+            counters.get("proxy_connections_rejected", 0), counters.get("proxy_requests", 0)))
+        if snap["methods"]:
+            lines.append("\n%-32s %8s %7s %8s %9s %9s %9s\n" % (
+                "Method", "Requests", "Errors", "Timeouts", "p50 ms", "p95 ms", "p99 ms"))
+            for method, m in sorted(snap["methods"].items()):
+                latency = m["latency"]
+                lines.append("%-32s %8d %7d %8d %9.0f %9.0f %9.0f\n" % (
+                    method[:32], m["requests"], m["errors"], m["timeouts"],
+                    latency["p50_ms"], latency["p95_ms"], latency["p99_ms"]))
+        return lines
+
     def _edit_headers(self, event):
         panel = JPanel(BorderLayout())
         
-        headers_text = "\n".join(["%s: %s" % (k, v) for k, v in self.custom_headers.items()])
+        headers_text = "\n".join(["%s: %s" % (k, v) for k, v in self.server.config.custom_headers.items()])
         if not headers_text:
             headers_text = "# Custom HTTP Headers (one per line)\n# Format: Header-Name: Value\n# Example:\n# Authorization: Bearer your-token-here\n# X-API-Key: your-key"
         
@@ -711,8 +1028,8 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
                     if len(parts) == 2:
                         new_headers[parts[0].strip()] = parts[1].strip()
             
-            self.custom_headers = new_headers
-            self._log("Custom headers updated: %d headers" % len(new_headers))
+            self.server.config.custom_headers = new_headers
+            self._log("Custom headers updated for %s: %d headers" % (self.server.name, len(new_headers)))
             self._update_server_info()
 
     def _edit_settings(self, event):
@@ -725,35 +1042,238 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         gbc.gridy = 0
         panel.add(JLabel("Request Timeout (seconds):"), gbc)
         gbc.gridx = 1
-        timeout_spinner = JSpinner(SpinnerNumberModel(self.request_timeout, 5, 300, 5))
+        timeout_spinner = JSpinner(SpinnerNumberModel(self.config.request_timeout, 5, 300, 5))
         panel.add(timeout_spinner, gbc)
         
         gbc.gridx = 0
         gbc.gridy = 1
         panel.add(JLabel("Reset Timeout on Progress:"), gbc)
         gbc.gridx = 1
-        reset_checkbox = JCheckBox("", self.reset_on_progress)
+        reset_checkbox = JCheckBox("", self.config.reset_on_progress)
         panel.add(reset_checkbox, gbc)
         
         gbc.gridx = 0
         gbc.gridy = 2
         panel.add(JLabel("Maximum Total Timeout (seconds):"), gbc)
         gbc.gridx = 1
-        max_spinner = JSpinner(SpinnerNumberModel(self.max_total_timeout, 30, 3600, 30))
+        max_spinner = JSpinner(SpinnerNumberModel(self.config.max_total_timeout, 30, 3600, 30))
         panel.add(max_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 3
+        panel.add(JLabel("Keep-Alive Connection Pool:"), gbc)
+        gbc.gridx = 1
+        pool_checkbox = JCheckBox("", self.config.use_connection_pool)
+        pool_checkbox.setToolTipText("Disable to send every request through Burp with Connection: close")
+        panel.add(pool_checkbox, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 4
+        panel.add(JLabel("Pool Size (connections per host):"), gbc)
+        gbc.gridx = 1
+        pool_size_spinner = JSpinner(SpinnerNumberModel(self.config.pool_size, 1, 256, 1))
+        panel.add(pool_size_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 5
+        panel.add(JLabel("Pool Idle Timeout (seconds):"), gbc)
+        gbc.gridx = 1
+        pool_idle_spinner = JSpinner(SpinnerNumberModel(self.config.pool_idle_timeout, 1, 600, 5))
+        panel.add(pool_idle_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 6
+        panel.add(JLabel("Request Worker Threads:"), gbc)
+        gbc.gridx = 1
+        workers_spinner = JSpinner(SpinnerNumberModel(self.config.executor_workers, 1, 512, 1))
+        panel.add(workers_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 7
+        panel.add(JLabel("Request Queue Depth:"), gbc)
+        gbc.gridx = 1
+        queue_spinner = JSpinner(SpinnerNumberModel(self.config.executor_queue_depth, 10, 100000, 100))
+        panel.add(queue_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 8
+        panel.add(JLabel("Proxy Max Connections:"), gbc)
+        gbc.gridx = 1
+        proxy_conns_spinner = JSpinner(SpinnerNumberModel(self.config.proxy_max_connections, 1, 4096, 16))
+        panel.add(proxy_conns_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 9
+        panel.add(JLabel("Proxy Keep-Alive Idle Timeout (seconds):"), gbc)
+        gbc.gridx = 1
+        proxy_idle_spinner = JSpinner(SpinnerNumberModel(self.config.proxy_idle_timeout, 1, 600, 5))
+        panel.add(proxy_idle_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 10
+        panel.add(JLabel("Batch Bulk Requests:"), gbc)
+        gbc.gridx = 1
+        batch_checkbox = JCheckBox("", self.config.batch_requests)
+        batch_checkbox.setToolTipText("Coalesce list calls into one JSON-RPC batch POST (servers on protocol 2025-06-18+ may reject batches)")
+        panel.add(batch_checkbox, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 11
+        panel.add(JLabel("Response Cache:"), gbc)
+        gbc.gridx = 1
+        cache_checkbox = JCheckBox("", self.config.cache_enabled)
+        cache_checkbox.setToolTipText("Answer repeated list/read calls from a TTL cache (cleared on list_changed and disconnect)")
+        panel.add(cache_checkbox, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 12
+        panel.add(JLabel("Cached Methods (method=seconds):"), gbc)
+        gbc.gridx = 1
+        cache_ttls_field = JTextField(", ".join(
+            "%s=%d" % (m, t) for m, t in sorted(self.config.cache_ttls.items())), 30)
+        panel.add(cache_ttls_field, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 13
+        panel.add(JLabel("Cache Max Entries:"), gbc)
+        gbc.gridx = 1
+        cache_size_spinner = JSpinner(SpinnerNumberModel(self.config.cache_max_entries, 1, 100000, 64))
+        panel.add(cache_size_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 14
+        panel.add(JLabel("Prefetch Next List Page:"), gbc)
+        gbc.gridx = 1
+        prefetch_checkbox = JCheckBox("", self.config.list_prefetch)
+        prefetch_checkbox.setToolTipText("Request the next nextCursor page while the current page renders")
+        panel.add(prefetch_checkbox, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 15
+        panel.add(JLabel("Traffic Journal Size (in memory):"), gbc)
+        gbc.gridx = 1
+        journal_size_spinner = JSpinner(SpinnerNumberModel(self.config.journal_capacity, 100, 1000000, 500))
+        panel.add(journal_size_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 16
+        panel.add(JLabel("Traffic Journal Spill File:"), gbc)
+        gbc.gridx = 1
+        journal_path_field = JTextField(self.config.journal_spill_path, 30)
+        journal_path_field.setToolTipText("Older proxy exchanges are appended here as JSON lines (empty: a file in the temp directory)")
+        panel.add(journal_path_field, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 17
+        panel.add(JLabel("Request History Depth (entries):"), gbc)
+        gbc.gridx = 1
+        history_spinner = JSpinner(SpinnerNumberModel(self.config.history_max_entries, 10, 1000000, 1000))
+        history_spinner.setToolTipText("Entries beyond the newest %d are kept compressed in %s"
+                                       % (self.config.history_memory_entries, self.config.history_path))
+        panel.add(history_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 18
+        panel.add(JLabel("Adaptive Concurrency:"), gbc)
+        gbc.gridx = 1
+        adaptive_checkbox = JCheckBox("", self.config.adaptive_concurrency)
+        adaptive_checkbox.setToolTipText("Raise or lower requests in flight and their rate from latency, 429/503, Retry-After and error rates")
+        panel.add(adaptive_checkbox, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 19
+        panel.add(JLabel("Adaptive Max In Flight:"), gbc)
+        gbc.gridx = 1
+        adaptive_max_spinner = JSpinner(SpinnerNumberModel(self.config.adaptive_max_limit, 1, 4096, 8))
+        panel.add(adaptive_max_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 20
+        panel.add(JLabel("Session Pool Size:"), gbc)
+        gbc.gridx = 1
+        pool_sessions_spinner = JSpinner(SpinnerNumberModel(self.config.session_pool_size, 1, 64, 1))
+        pool_sessions_spinner.setToolTipText("Sessions to initialize; proxy and fuzzer calls are spread across them (pin one with X-MCP-Session)")
+        panel.add(pool_sessions_spinner, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 21
+        panel.add(JLabel("Session Selection:"), gbc)
+        gbc.gridx = 1
+        strategy_combo = JComboBox(list(SessionPool.STRATEGIES))
+        strategy_combo.setSelectedItem(self.config.session_pool_strategy)
+        panel.add(strategy_combo, gbc)
+
+        gbc.gridx = 0
+        gbc.gridy = 22
+        panel.add(JLabel("Bridge SSE Wait (seconds):"), gbc)
+        gbc.gridx = 1
+        bridge_wait_spinner = JSpinner(SpinnerNumberModel(self.config.bridge_wait_timeout, 1, 60, 1))
+        bridge_wait_spinner.setToolTipText("How long the in-process bridge waits for a 202 reply over SSE. "
+                                           "The wait blocks Burp's HTTP listener thread, stalling every tool's traffic; "
+                                           "slower replies get a 504")
+        panel.add(bridge_wait_spinner, gbc)
         
         result = JOptionPane.showConfirmDialog(
-            self.panel, panel, "Timeout Settings",
+            self.panel, panel, "Transport Settings",
             JOptionPane.OK_CANCEL_OPTION
         )
         
         if result == JOptionPane.OK_OPTION:
-            self.request_timeout = timeout_spinner.getValue()
-            self.reset_on_progress = reset_checkbox.isSelected()
-            self.max_total_timeout = max_spinner.getValue()
-            self._log("Timeout settings updated")
+            self.config.request_timeout = timeout_spinner.getValue()
+            self.config.reset_on_progress = reset_checkbox.isSelected()
+            self.config.max_total_timeout = max_spinner.getValue()
+            self.config.use_connection_pool = pool_checkbox.isSelected()
+            self.config.pool_size = pool_size_spinner.getValue()
+            self.config.pool_idle_timeout = pool_idle_spinner.getValue()
+            self.config.executor_workers = workers_spinner.getValue()
+            self.config.executor_queue_depth = queue_spinner.getValue()
+            self.config.proxy_max_connections = proxy_conns_spinner.getValue()
+            self.config.proxy_idle_timeout = proxy_idle_spinner.getValue()
+            self.config.batch_requests = batch_checkbox.isSelected()
+            self.config.cache_enabled = cache_checkbox.isSelected()
+            self.config.cache_ttls = self._parse_cache_ttls(cache_ttls_field.getText())
+            self.config.cache_max_entries = cache_size_spinner.getValue()
+            self.config.list_prefetch = prefetch_checkbox.isSelected()
+            self.config.journal_capacity = journal_size_spinner.getValue()
+            self.config.journal_spill_path = journal_path_field.getText().strip()
+            self.config.history_max_entries = history_spinner.getValue()
+            self.config.adaptive_concurrency = adaptive_checkbox.isSelected()
+            self.config.adaptive_max_limit = adaptive_max_spinner.getValue()
+            pool_resized = pool_sessions_spinner.getValue() != self.config.session_pool_size
+            self.config.session_pool_size = pool_sessions_spinner.getValue()
+            self.config.session_pool_strategy = strategy_combo.getSelectedItem()
+            self.config.bridge_wait_timeout = bridge_wait_spinner.getValue()
+            for server in self.servers.all():
+                server.apply_config(self.config)
+            if pool_resized:
+                threading.Thread(target=self._resize_session_pools).start()
+            self.history.configure(self.config.history_max_entries, self.config.history_memory_entries)
+            self.proxy.apply_config()
+            self._log("Transport settings updated")
             self._update_server_info()
 
+    def _resize_session_pools(self):
+        for server in self.servers.all():
+            if not server.connected():
+                continue
+            if self.config.session_pool_size < server.sessions.size():
+                server.sessions.close()
+            server.sessions.open(self.config.session_pool_size)
+        self._update_status("Session pool: %s" % self.sessions.stats(), "success")
+        self._update_server_info()
+
+    def _parse_cache_ttls(self, text):
+        ttls = {}
+        for item in text.split(","):
+            if "=" not in item:
+                continue
+            method, seconds = item.split("=", 1)
+            try:
+                ttls[method.strip()] = int(seconds.strip())
+            except ValueError:
+                self._log("Ignoring cache TTL '%s'" % item.strip())
+        return ttls
+
     def _get_param_summary(self, schema):
         props = schema.get("properties", {})
         required = schema.get("required", [])
@@ -771,36 +1291,10 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         return ", ".join(params[:5]) + ("..." if len(params) > 5 else "")
 
     def _generate_sample_args(self, schema):
-        args = {}
-        props = schema.get("properties", {})
-        
-        for prop, details in props.items():
-            prop_type = details.get("type", "string")
-            default = details.get("default")
-            example = details.get("example")
-            enum = details.get("enum")
-            
-            if default is not None:
-                args[prop] = default
-            elif example is not None:
-                args[prop] = example
-            elif enum:
-                args[prop] = enum[0]
-            elif prop_type == "number":
-                args[prop] = 0
-            elif prop_type == "boolean":
-                args[prop] = False
-            elif prop_type == "array":
-                args[prop] = []
-            elif prop_type == "object":
-                args[prop] = {}
-            else:
-                args[prop] = ""
-        
-        return args
+        return sample_args(schema)
 
     def _send_tool_to_editor(self, tool_name):
-        tool = next((t for t in self.tools if t["name"] == tool_name), None)
+        tool = self.server.tool_index.get(tool_name)
         if not tool:
             return
         
@@ -809,7 +1303,7 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         
         request = {
             "jsonrpc": "2.0",
-            "id": "req_%d" % int(time.time() * 1000),
+            "id": self.client.id_allocator.next_id("editor"),
             "method": "tools/call",
             "params": {
                 "name": tool_name,
@@ -834,7 +1328,7 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
     def _send_resource_to_editor(self, uri):
         request = {
             "jsonrpc": "2.0",
-            "id": "req_%d" % int(time.time() * 1000),
+            "id": self.client.id_allocator.next_id("editor"),
             "method": "resources/read",
             "params": {"uri": uri}
         }
@@ -868,33 +1362,59 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
             request_text = json.dumps(templates[method], indent=2)
             self.request_editor.setMessage(self._helpers.stringToBytes(request_text), True)
 
+    def _load_history(self):
+        """Index history saved by earlier sessions without holding up the UI."""
+        def run():
+            try:
+                loaded = self.history.load()
+            except Exception as e:
+                self._log("Could not load request history: %s" % str(e), force=True)
+                return
+            if not loaded:
+                return
+            def update():
+                # Entries added meanwhile moved up by the number loaded
+                if self.history_index == -1:
+                    self.history_index = len(self.history)
+                else:
+                    self.history_index += loaded
+                self._update_history_buttons()
+            SwingUtilities.invokeLater(update)
+            self._log("Loaded %d history entries from %s", args=(loaded, self.history.path))
+        t = threading.Thread(target=run, name="mcp-history-load")
+        t.daemon = True
+        t.start()
+
     def _add_to_history(self, request_text, response_text):
-        self.request_history.append({"request": request_text, "response": response_text, "timestamp": time.strftime("%H:%M:%S")})
-        if len(self.request_history) > 50:
-            self.request_history = self.request_history[-50:]
-        self.history_index = len(self.request_history) - 1
+        self.history.add(request_text, response_text)
+        self.history_index = len(self.history) - 1
         self._update_history_buttons()
 
     def _history_back(self, event):
         if self.history_index > 0:
             self.history_index -= 1
-            item = self.request_history[self.history_index]
-            self.request_editor.setMessage(self._helpers.stringToBytes(item["request"]), True)
-            self.response_editor.setMessage(self._helpers.stringToBytes(item["response"]), False)
-            self._update_history_buttons()
+            self._show_history_entry()
 
     def _history_forward(self, event):
-        if self.history_index < len(self.request_history) - 1:
+        if self.history_index < len(self.history) - 1:
             self.history_index += 1
-            item = self.request_history[self.history_index]
-            self.request_editor.setMessage(self._helpers.stringToBytes(item["request"]), True)
-            self.response_editor.setMessage(self._helpers.stringToBytes(item["response"]), False)
-            self._update_history_buttons()
+            self._show_history_entry()
+
+    def _show_history_entry(self):
+        try:
+            timestamp, request_text, response_text = self.history.get(self.history_index)
+        except Exception as e:
+            self._update_status("Could not read history entry: %s" % str(e), "error")
+            return
+        self.request_editor.setMessage(self._helpers.stringToBytes(request_text), True)
+        self.response_editor.setMessage(self._helpers.stringToBytes(response_text), False)
+        self._update_status("History %d/%d (%s)" % (self.history_index + 1, len(self.history), timestamp))
+        self._update_history_buttons()
 
     def _update_history_buttons(self):
         def update():
             self.history_back_btn.setEnabled(self.history_index > 0)
-            self.history_forward_btn.setEnabled(self.history_index < len(self.request_history) - 1)
+            self.history_forward_btn.setEnabled(self.history_index < len(self.history) - 1)
         SwingUtilities.invokeLater(update)
 
     def _send_editor_request(self, event):
@@ -909,6 +1429,10 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
         
         self._update_status("Sending request...", "working")
         self.response_editor.setMessage(self._helpers.stringToBytes("Sending request..."), False)
+
+        if isinstance(request_json, list):
+            self._send_editor_batch(request_text, request_json)
+            return
         
         def handle_response(resp):
             response_text = json.dumps(resp, indent=2, ensure_ascii=False)
@@ -924,159 +1448,72 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
             
             SwingUtilities.invokeLater(update)
         
-        self._send_request_async(
+        self.client.send_as_client(
             request_json.get("method"),
             request_json.get("params", {}),
             handle_response,
-            req_id=request_json.get("id", "editor_req")
+            request_json.get("id", "editor_req"),
+            use_cache=False
         )
 
+    def _send_editor_batch(self, request_text, entries):
+        """Send a JSON array from the editor as one batch and show all replies."""
+        calls = []
+        order = []
+        replies = {}
+        state = {"remaining": 0}
+        lock = threading.Lock()
+
+        def show():
+            results = [replies[i] for i in order]
+            response_text = json.dumps(results, indent=2, ensure_ascii=False)
+            failed = any(r.get("error") for r in results)
+            def update():
+                self.response_editor.setMessage(self._helpers.stringToBytes(response_text), False)
+                self._add_to_history(request_text, response_text)
+                if failed:
+                    self._update_status("Batch finished with errors", "error")
+                else:
+                    self._update_status("Batch successful (%d responses)" % len(results), "success")
+            SwingUtilities.invokeLater(update)
+
+        def make_callback(index):
+            def on_reply(resp):
+                with lock:
+                    replies[index] = resp
+                    state["remaining"] -= 1
+                    done = state["remaining"] == 0
+                if done:
+                    show()
+            return on_reply
+
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                continue
+            if "id" in entry:
+                order.append(index)
+                callback = self.client.restoring_client_id(make_callback(index), entry["id"])
+                calls.append((entry.get("method"), entry.get("params", {}), callback, None))
+            else:
+                calls.append((entry.get("method"), entry.get("params", {}), None, None))
+        state["remaining"] = len(order)
+
+        self.client.send_batch_async(calls, use_cache=False)
+        if not order:
+            response_text = "Batch of notifications sent (no responses expected)"
+            self.response_editor.setMessage(self._helpers.stringToBytes(response_text), False)
+            self._update_status("Batch sent", "success")
+
     def _clear_editor(self, event):
         self.request_editor.setMessage(self._helpers.stringToBytes(""), True)
         self.response_editor.setMessage(self._helpers.stringToBytes(""), False)
 
     def _clear_history(self, event):
-        self.request_history = []
+        self.history.clear()
         self.history_index = -1
         self._update_history_buttons()
         self._log("Request history cleared")
 
-    def _parse_sse_body(self, body):
-        if not body or not body.strip():
-            return None
-        try:
-            return json.loads(body)
-        except:
-            pass
-        events = re.split(r'\n\n+', body.strip())
-        for ev in events:
-            if not ev.strip():
-                continue
-            data_lines = []
-            for line in ev.split('\n'):
-                line = line.strip()
-                if line.startswith('data:'):
-                    data_content = line[5:].strip()
-                    if data_content and data_content != "ping":
-                        data_lines.append(data_content)
-            if data_lines:
-                try:
-                    return json.loads('\n'.join(data_lines))
-                except:
-                    continue
-        return None
-
-    def _start_sse_listener(self):
-        if self.sse_running:
-            return
-        self.sse_running = True
-        
-        def sse_listener():
-            sse_url = self.sse_endpoint if self.sse_endpoint else self.url_field.getText().strip()
-            self._log("Starting SSE polling: %s" % sse_url)
-            retry_count = 0
-            while self.sse_running and retry_count < 5:
-                try:
-                    is_https, host, port, path = self._parse_url(sse_url)
-
-                    http_request = "GET %s HTTP/1.1\r\n" % path
-                    http_request += "Host: %s:%d\r\n" % (host, port)
-                    http_request += "Accept: text/event-stream\r\n"
-                    if self.session_id:
-                        http_request += "Mcp-Session-Id: %s\r\n" % self.session_id
-                    for k, v in self.custom_headers.items():
-                        http_request += "%s: %s\r\n" % (k, v)
-                    http_request += "Connection: close\r\n"
-                    http_request += "\r\n"
-                    
-                    http_service = self._helpers.buildHttpService(host, port, is_https)
-                    response = self._callbacks.makeHttpRequest(http_service,
-                        self._helpers.stringToBytes(http_request))
-                    
-                    if response is None:
-                        retry_count += 1
-                        time.sleep(2)
-                        continue
-                    
-                    resp_bytes = response.getResponse() if hasattr(response, 'getResponse') else response
-                    if resp_bytes is None:
-                        retry_count += 1
-                        time.sleep(2)
-                        continue
-                    
-                    resp_info = self._helpers.analyzeResponse(resp_bytes)
-                    status = resp_info.getStatusCode()
-                    body_offset = resp_info.getBodyOffset()
-                    body = self._helpers.bytesToString(resp_bytes[body_offset:])
-                    
-                    if status == 200:
-                        retry_count = 0
-
-                        event_type = None
-                        event_data = []
-                        for line in body.split('\n'):
-                            line = line.strip()
-                            if not line:
-                                if event_data:
-                                    self._process_sse_event(event_type, event_data)
-                                    event_type = None
-                                    event_data = []
-                                continue
-                            if line.startswith("event:"):
-                                event_type = line[6:].strip()
-                            elif line.startswith("data:"):
-                                data = line[5:].strip()
-                                if data and data != "ping":
-                                    event_data.append(data)
-
-                        if event_data:
-                            self._process_sse_event(event_type, event_data)
-
-                        if self.sse_running:
-                            time.sleep(1)
-                    elif status == 405:
-                        self._log("SSE endpoint returned 405, stopping SSE polling")
-                        break
-                    else:
-                        retry_count += 1
-                        time.sleep(2)
-                except Exception as e:
-                    self._log("SSE poll error: %s" % str(e))
-                    retry_count += 1
-                    time.sleep(2)
-            self.sse_running = False
-        
-        t = threading.Thread(target=sse_listener)
-        t.daemon = True
-        t.start()
-        self.sse_thread = t
-
-    def _process_sse_event(self, event_type, event_data):
-        if not event_data:
-            return
-        try:
-            data_str = '\n'.join(event_data)
-            if event_type == "endpoint":
-                self.sse_endpoint = data_str
-                self._log("SSE Endpoint updated: %s" % self.sse_endpoint)
-                self._update_server_info()
-                return
-            if event_type == "progress":
-                parsed = json.loads(data_str)
-                if "id" in parsed:
-                    with self._lock:
-                        self.last_progress_time[parsed["id"]] = time.time()
-                return
-            parsed = json.loads(data_str)
-            if "jsonrpc" in parsed and "id" in parsed:
-                req_id = parsed["id"]
-                with self._lock:
-                    callback = self.pending_requests.pop(req_id, None)
-                if callback:
-                    callback(parsed)
-        except:
-            pass
-
     def _on_connect_click(self, event):
         if self.initializing:
             return
@@ -1085,44 +1522,61 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
             self._update_status("Enter endpoint URL", "error")
             return
         
+        server = self.server
+        existing = self.servers.find_url(url)
+        if existing is not None and existing is not server:
+            # Already in the list: show it rather than open a second connection
+            self._activate(existing)
+            server = existing
+            if server.connected():
+                self._update_status("Showing %s (connected)" % server.name, "info")
+                return
+
         self.initializing = True
         self.connect_btn.setEnabled(False)
         self._update_status("Connecting...", "working")
 
-        needs_disconnect = self.session_id is not None
+        if server.connected() and url != server.config.url:
+            # Another endpoint: connect it alongside instead of tearing this one down
+            config = self.config.for_server(url)
+            config.custom_headers = dict(server.config.custom_headers)
+            client = self.client.spawn(config, on_change=self._update_server_info)
+            server = self.servers.add(ServerConnection(self.servers.name_for(url), config, client))
+            self._log("Added server %s for %s" % (server.name, url))
+            self._activate(server)
+        needs_disconnect = server.connected()
 
         def init():
             try:
 
                 if needs_disconnect:
-                    self._log("Disconnecting previous endpoint before connecting to new one...")
-                    self._disconnect_internal()
+                    self._log("Reconnecting %s..." % server.name)
+                    server.disconnect()
                     time.sleep(0.5)
                 
-                resp = self._send_request_sync("initialize", {
-                    "protocolVersion": "2024-11-05",
-                    "capabilities": {"roots": {"listChanged": True}, "sampling": {}},
-                    "clientInfo": {"name": "Burp MCP Inspector", "version": "2.0"}
-                })
+                if url != server.config.url:
+                    self.servers.rename(server, self.servers.name_for(url, exclude=server))
+                    server.config.url = url
+                    SwingUtilities.invokeLater(self._sync_server_combo)
+                if self.config.session_pool_size > 1:
+                    self._update_status("Connecting with %d sessions..." % self.config.session_pool_size, "working")
+                resp = server.connect()
                 if resp and "result" in resp:
-                    result = resp["result"]
-                    self.protocol_version = result.get("protocolVersion")
-                    self.server_capabilities = result.get("capabilities", {})
-                    server_info = result.get("serverInfo", {})
+                    server_info = server.client.server_info
                     
-                    if self.session_id:
-                        self._start_sse_listener()
+                    if server.client.session_id:
                         time.sleep(1)
                     
                     self._update_status("Connected: %s" % server_info.get("name", "MCP"), "success")
                     self._update_server_info()
                     
                     def enable():
-                        self.disconnect_btn.setEnabled(True)
+                        if server is self.server:
+                            self.disconnect_btn.setEnabled(True)
                     SwingUtilities.invokeLater(enable)
 
                     time.sleep(0.5)
-                    self._list_tools(None)
+                    self._refresh_inventory(server)
                     
                 elif resp and "error" in resp:
                     self._update_status("Error: %s" % self._get_error_message(resp["error"]), "error")
@@ -1130,7 +1584,7 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
                     self._update_status("Connection failed", "error")
             except Exception as e:
                 self._update_status("Error: %s" % str(e), "error")
-                self._log(traceback.format_exc())
+                self._log(traceback.format_exc(), level=LogRing.ERROR)
             finally:
                 def restore_btn():
                     self.connect_btn.setEnabled(True)
@@ -1139,238 +1593,170 @@ class BurpExtender(IBurpExtender, ITab, IMessageEditorController, IExtensionStat
                 
         threading.Thread(target=init).start()
 
-    def _disconnect_internal(self):
-        self._log("Closing SSE connection...")
-        self.sse_running = False
-        if self.sse_thread and self.sse_thread.is_alive():
-            self.sse_thread.join(2)
-        
-        self._log("Clearing session data...")
-        self.session_id = None
-        self.sse_endpoint = None
-        self.protocol_version = None
-        self.server_capabilities = {}
-        self.tools = []
-        self.resources = []
-        self.prompts = []
-        with self._lock:
-            self.pending_requests.clear()
-            self.last_progress_time.clear()
+    def _activate(self, server):
+        """Show ``server`` in the UI and make it the proxy's default route (any thread)."""
+        self.servers.select(server)
+        self.server = server
+        self.client = server.client
+        self.sessions = server.sessions
+        if not hasattr(self, "tools_model"):
+            return
+
+        def update():
+            self._sync_server_combo()
+            self.url_field.setText(server.config.url)
+            self.tools_model.set_items(server.tools)
+            self.resources_model.set_items(server.resources)
+            self.prompts_model.set_items(server.prompts)
+            self.disconnect_btn.setEnabled(server.connected())
+            self.remove_server_btn.setEnabled(len(self.servers.names()) > 1)
+        SwingUtilities.invokeLater(update)
+        self._update_server_info()
+
+    def _sync_server_combo(self):
+        """Rebuild the server selector from the registry (EDT only)."""
+        self._syncing_servers = True
+        try:
+            self.server_combo.removeAllItems()
+            for name in self.servers.names():
+                self.server_combo.addItem(name)
+            self.server_combo.setSelectedItem(self.server.name)
+        finally:
+            self._syncing_servers = False
+
+    def _on_server_selected(self):
+        name = self.server_combo.getSelectedItem()
+        server = self.servers.get(name) if name else None
+        if server is not None and server is not self.server:
+            self._activate(server)
+            self._update_status("Showing %s (%s)" % (server.name, "connected" if server.connected() else "not connected"), "info")
+
+    def _on_remove_server_click(self, event):
+        server = self.server
+        if len(self.servers.names()) < 2:
+            return
+        self.servers.remove(server.name)
+        self._activate(self.servers.selected)
+        self._log("Removed server %s" % server.name)
+        threading.Thread(target=server.shutdown).start()
 
     def _on_disconnect_click(self, event):
+        server = self.server
+
         def do_disconnect():
-            self._disconnect_internal()
+            server.disconnect()
             
             def update():
-                self.tools_model.setRowCount(0)
-                self.resources_model.setRowCount(0)
-                self.prompts_model.setRowCount(0)
+                if server is not self.server:
+                    return
+                self.tools_model.set_items(server.tools)
+                self.resources_model.set_items(server.resources)
+                self.prompts_model.set_items(server.prompts)
                 self.disconnect_btn.setEnabled(False)
             SwingUtilities.invokeLater(update)
             
-            self._update_status("Disconnected", "info")
+            self._update_status("Disconnected %s" % server.name, "info")
             self._update_server_info()
         
         threading.Thread(target=do_disconnect).start()
 
-    def _send_request_sync(self, method, params=None, req_id=None):
-        if not req_id:
-            req_id = "req_%s" % threading.currentThread().ident
-        payload = json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params or {}})
-        url = self.url_field.getText().strip()
-        
-        headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
-        headers.update(self.custom_headers)
-        if self.session_id:
-            headers["Mcp-Session-Id"] = self.session_id
-        
-        try:
-            is_https, host, port, path = self._parse_url(url)
-
-            payload_bytes = payload.encode("utf-8")
-            http_request = "POST %s HTTP/1.1\r\n" % path
-            http_request += "Host: %s:%d\r\n" % (host, port)
-            for k, v in headers.items():
-                http_request += "%s: %s\r\n" % (k, v)
-            http_request += "Content-Length: %d\r\n" % len(payload_bytes)
-            http_request += "Connection: close\r\n"
-            http_request += "\r\n"
-            http_request += payload
-            
-            http_service = self._helpers.buildHttpService(host, port, is_https)
-            response = self._callbacks.makeHttpRequest(http_service,
-                self._helpers.stringToBytes(http_request))
-            
-            resp_bytes = response.getResponse() if hasattr(response, 'getResponse') else response
-            if resp_bytes is None:
-                return {"error": {"code": -1, "message": "No response from server"}}
-            
-            resp_info = self._helpers.analyzeResponse(resp_bytes)
-            body_offset = resp_info.getBodyOffset()
-            body = self._helpers.bytesToString(resp_bytes[body_offset:])
-
-            for header in resp_info.getHeaders():
-                if header.lower().startswith("mcp-session-id:"):
-                    sid = header.split(":", 1)[1].strip()
-                    if not self.session_id:
-                        self.session_id = sid
-                        self._log("Session ID: %s..." % self.session_id[:30])
-                    break
-            
-            return self._parse_sse_body(body) or {"error": {"code": -32700, "message": "Parse error"}}
-        except Exception as e:
-            return {"error": {"code": -1, "message": str(e)}}
-
-    def _send_request_async(self, method, params, callback, timeout=None, req_id=None):
-        if not timeout:
-            timeout = self.request_timeout
-        if not req_id:
-            req_id = "req_%d" % int(time.time() * 1000)
-        
-        with self._lock:
-            self.pending_requests[req_id] = callback
-            self.last_progress_time[req_id] = time.time()
-        
-        payload = json.dumps({"jsonrpc": "2.0", "id": req_id, "method": method, "params": params or {}})
-        url = self.url_field.getText().strip()
-        
-        def req_thread():
-            try:
-                is_https, host, port, path = self._parse_url(url)
-
-                payload_bytes = payload.encode("utf-8")
-                http_request = "POST %s HTTP/1.1\r\n" % path
-                http_request += "Host: %s:%d\r\n" % (host, port)
-                http_request += "Content-Type: application/json\r\n"
-                http_request += "Accept: application/json, text/event-stream\r\n"
-                for k, v in self.custom_headers.items():
-                    http_request += "%s: %s\r\n" % (k, v)
-                if self.session_id:
-                    http_request += "Mcp-Session-Id: %s\r\n" % self.session_id
-                http_request += "Content-Length: %d\r\n" % len(payload_bytes)
-                http_request += "Connection: close\r\n"
-                http_request += "\r\n"
-                http_request += payload
-                
-                http_service = self._helpers.buildHttpService(host, port, is_https)
-                response = self._callbacks.makeHttpRequest(http_service,
-                    self._helpers.stringToBytes(http_request))
-                
-                resp_bytes = response.getResponse() if hasattr(response, 'getResponse') else response
-                if resp_bytes is None:
-                    with self._lock:
-                        self.pending_requests.pop(req_id, None)
-                    callback({"error": {"code": -1, "message": "No response from server"}})
-                    return
-                
-                resp_info = self._helpers.analyzeResponse(resp_bytes)
-                status = resp_info.getStatusCode()
-                body_offset = resp_info.getBodyOffset()
-                body = self._helpers.bytesToString(resp_bytes[body_offset:])
-
-                for header in resp_info.getHeaders():
-                    if header.lower().startswith("mcp-session-id:"):
-                        sid = header.split(":", 1)[1].strip()
-                        if not self.session_id:
-                            self.session_id = sid
-                        break
-                
-                if status == 202:
-
-                    def monitor():
-                        start = time.time()
-                        while True:
-                            with self._lock:
-                                still_pending = req_id in self.pending_requests
-                                last_progress = self.last_progress_time.get(req_id, start)
-                            if not still_pending:
-                                break
-                            now = time.time()
-                            if now - start > self.max_total_timeout:
-                                break
-                            if self.reset_on_progress:
-                                if now - last_progress > self.request_timeout:
-                                    break
-                            else:
-                                if now - start > self.request_timeout:
-                                    break
-                            time.sleep(1)
-                        with self._lock:
-                            cb = self.pending_requests.pop(req_id, None)
-                            self.last_progress_time.pop(req_id, None)
-                        if cb:
-                            cb({"error": {"code": -32000, "message": "Timeout"}})
-                    t = threading.Thread(target=monitor)
-                    t.daemon = True
-                    t.start()
-                elif status == 200:
-                    with self._lock:
-                        self.pending_requests.pop(req_id, None)
-                    parsed = self._parse_sse_body(body)
-                    callback(parsed if parsed else {"error": {"code": -32700, "message": "Parse error"}})
-                else:
-                    with self._lock:
-                        self.pending_requests.pop(req_id, None)
-                    callback({"error": {"code": status, "message": body[:200]}})
-            except Exception as e:
-                with self._lock:
-                    self.pending_requests.pop(req_id, None)
-                callback({"error": {"code": -1, "message": str(e)}})
-        t = threading.Thread(target=req_thread)
-        t.daemon = True
-        t.start()
-
     def _list_tools(self, event):
-        self._update_status("Listing tools...", "working")
-        def handle(resp):
-            if resp and "result" in resp and "tools" in resp["result"]:
-                self.tools = resp["result"]["tools"]
-                def update():
-                    self.tools_model.setRowCount(0)
-                    for t in self.tools:
-                        name = t.get("name", "")
-                        params = self._get_param_summary(t.get("inputSchema", {}))
-                        desc = t.get("description", "")
-                        if len(desc) > 150:
-                            desc = desc[:147] + "..."
-                        self.tools_model.addRow([name, params, desc])
-                SwingUtilities.invokeLater(update)
-                self._update_status("Found %d tools" % len(self.tools), "success")
-            else:
-                self._update_status("Failed to list tools", "error")
-        self._send_request_async("tools/list", {}, handle)
+        self._list_inventory("tools")
 
     def _list_resources(self, event):
-        self._update_status("Listing resources...", "working")
-        def handle(resp):
-            if resp and "result" in resp:
-                self.resources = resp["result"].get("resources", [])
-                def update():
-                    self.resources_model.setRowCount(0)
-                    for r in self.resources:
-                        self.resources_model.addRow([r.get("uri", ""), r.get("name", ""),
-                            r.get("description", ""), r.get("mimeType", "")])
-                SwingUtilities.invokeLater(update)
-                self._update_status("Found %d resources" % len(self.resources), "success")
-            else:
-                self._update_status("No resources", "info")
-        self._send_request_async("resources/list", {}, handle)
+        self._list_inventory("resources")
 
     def _list_prompts(self, event):
-        self._update_status("Listing prompts...", "working")
-        def handle(resp):
-            if resp and "result" in resp:
-                self.prompts = resp["result"].get("prompts", [])
-                def update():
-                    self.prompts_model.setRowCount(0)
-                    for p in self.prompts:
-                        args = json.dumps(p.get("arguments", [])) if p.get("arguments") else "None"
-                        self.prompts_model.addRow([p.get("name", ""), p.get("description", ""), args])
-                SwingUtilities.invokeLater(update)
-                self._update_status("Found %d prompts" % len(self.prompts), "success")
+        self._list_inventory("prompts")
+
+    def _inventory_row(self, kind, item):
+        if kind == "tools":
+            desc = item.get("description", "")
+            if len(desc) > 150:
+                desc = desc[:147] + "..."
+            return [item.get("name", ""), self._get_param_summary(item.get("inputSchema", {})), desc]
+        if kind == "resources":
+            return [item.get("uri", ""), item.get("name", ""),
+                    item.get("description", ""), item.get("mimeType", "")]
+        args = json.dumps(item.get("arguments", [])) if item.get("arguments") else "None"
+        return [item.get("name", ""), item.get("description", ""), args]
+
+    def _list_inventory(self, kind, start=True, server=None):
+        """Enumerate tools, resources or prompts page by page.
+
+        Each page is appended to the server's list and, while that server
+        is selected, shown with a single insert event as it arrives. A new
+        listing of the same kind supersedes one still in progress. Returns
+        the PagedListing (unstarted with ``start=False``, for batching).
+        """
+        server = server or self.server
+        previous = server.listings.get(kind)
+        if previous:
+            previous.cancel()
+
+        items = []
+        setattr(server, kind, items)
+        index = None
+        if kind == "tools":
+            index = server.tool_index = ToolIndex()
+        model = getattr(self, kind + "_model")
+
+        def show():
+            if server is self.server:
+                model.set_items(items)
+        SwingUtilities.invokeLater(show)
+        self._update_status("Listing %s..." % kind, "working")
+
+        def appended():
+            if server is self.server:
+                model.rows_appended()
+
+        def on_page(page):
+            # Index positions must line up with the list, so extend both together
+            if index is not None:
+                index.add(page)
+            items.extend(page)
+            SwingUtilities.invokeLater(appended)
+            self._update_status("Listing %s... %d so far" % (kind, len(items)), "working")
+
+        def on_done(total, error):
+            if error and not items:
+                if kind == "tools":
+                    self._update_status("Failed to list tools", "error")
+                else:
+                    self._update_status("No %s" % kind, "info")
+            elif error:
+                self._update_status("Found %d %s (listing stopped: %s)" % (
+                    total, kind, self._get_error_message(error)), "error")
             else:
-                self._update_status("No prompts", "info")
-        self._send_request_async("prompts/list", {}, handle)
+                self._update_status("Found %d %s" % (total, kind), "success")
+
+        listing = server.client.list_all(kind + "/list", kind, on_page, on_done, start=False)
+        server.listings[kind] = listing
+        if start:
+            listing.start()
+        return listing
+
+    def _refresh_inventory(self, server=None):
+        """Load tools, plus resources and prompts when batching is enabled.
+
+        With batching on, the first page of every list call the server's
+        capabilities allow goes out in a single POST; later pages follow
+        their cursors individually.
+        """
+        server = server or self.server
+        if not self.config.batch_requests:
+            self._list_inventory("tools", server=server)
+            return
+        kinds = ["tools"]
+        if "resources" in server.client.server_capabilities:
+            kinds.append("resources")
+        if "prompts" in server.client.server_capabilities:
+            kinds.append("prompts")
+        calls = [(kind + "/list", {}, self._list_inventory(kind, False, server).on_response, None)
+                 for kind in kinds]
+        self._update_status("Listing server inventory...", "working")
+        server.client.send_batch_async(calls)
 
     
     def _create_proxy_tab(self):
@@ -1399,7 +1785,16 @@ HOW TO USE:
 5. Responses will be returned synchronously
 
 TIP: Right-click a tool in the Tools tab -> 'Send to Repeater'
-     This will create a request pointing to the virtual proxy."""
+     This will create a request pointing to the virtual proxy.
+
+SEVERAL SERVERS: every server in the Server list stays connected.
+POST to /srv/<name>/ to reach a specific one; any other path goes to
+the server currently selected. 'Send to Repeater' uses the /srv/ path.
+
+IN-PROCESS BRIDGE: requests with an 'X-MCP-Bridge' header are rewritten
+inside Burp into the real MCP call and answered without the proxy socket.
+Tick the box before 'Send to Repeater' to add the header; untick it to
+compare against the proxy path."""
         
         info_area = JTextArea(info_text)
         info_area.setEditable(False)
@@ -1424,57 +1819,241 @@ TIP: Right-click a tool in the Tools tab -> 'Send to Repeater'
         self.stop_proxy_btn.setEnabled(False)
         control_panel.add(self.stop_proxy_btn)
         
+        self.bridge_checkbox = JCheckBox("In-process bridge", self.config.burp_bridge)
+        self.bridge_checkbox.setToolTipText("Send Repeater/Intruder/Scanner requests straight to the MCP server "
+                                            "from Burp instead of through the proxy socket")
+        self.bridge_checkbox.addActionListener(lambda e: self._toggle_bridge())
+        control_panel.add(self.bridge_checkbox)
+
         self.proxy_status_label = JLabel("Proxy: Stopped")
         self.proxy_status_label.setFont(Font("SansSerif", Font.BOLD, 12))
         control_panel.add(self.proxy_status_label)
 
+        journal_panel = JPanel(BorderLayout())
+        journal_panel.setBorder(BorderFactory.createTitledBorder("Traffic Journal"))
+        journal_btns = JPanel(FlowLayout(FlowLayout.LEFT))
+        self.journal_model = InventoryTableModel(self.JOURNAL_COLUMNS, self._journal_row)
+        journal_table = self._create_inventory_table(self.journal_model, journal_btns)
+        self.journal_label = JLabel("")
+        journal_btns.add(self.journal_label)
+        journal_panel.add(journal_btns, BorderLayout.NORTH)
+        journal_panel.add(JScrollPane(journal_table), BorderLayout.CENTER)
+
         log_panel = JPanel(BorderLayout())
         log_panel.setBorder(BorderFactory.createTitledBorder("Proxy Log"))
         self.proxy_log_area = JTextArea(10, 60)
         self.proxy_log_area.setEditable(False)
         self.proxy_log_area.setFont(Font("Monospaced", Font.PLAIN, 11))
 
+        self.proxy_log_view = LogView(self.proxy_log_ring, self.proxy_log_area, self.max_log_lines,
+                                      timestamps=True)
         if not self.verbose_logging:
-            self.proxy_log_area.setText("=== LOGGING DISABLED ===\n\nTo save memory, logging is OFF.\n\nTo enable logs:\n- Go to 'Logs' tab\n- Check 'Verbose Logging' checkbox\n\nProxy status is shown above and in the status bar.")
+            self.proxy_log_view.show_placeholder("=== LOGGING DISABLED ===\n\nTo save memory, logging is OFF.\n\nTo enable logs:\n- Go to 'Logs' tab\n- Check 'Verbose Logging' checkbox\n\nProxy status is shown above and in the status bar.")
         log_panel.add(JScrollPane(self.proxy_log_area), BorderLayout.CENTER)
 
         top_panel = JPanel(BorderLayout())
         top_panel.add(info_panel, BorderLayout.CENTER)
         top_panel.add(control_panel, BorderLayout.SOUTH)
         
+        split = JSplitPane(JSplitPane.VERTICAL_SPLIT, journal_panel, log_panel)
+        split.setResizeWeight(0.6)
+
         panel.add(top_panel, BorderLayout.NORTH)
-        panel.add(log_panel, BorderLayout.CENTER)
+        panel.add(split, BorderLayout.CENTER)
 
-        self.proxy_server = None
-        self.proxy_running = False
-        
         return panel
-    
-    def _proxy_log(self, message, force=False):
-        if not self.verbose_logging and not force:
+
+    def _create_fuzzer_tab(self):
+        panel = JPanel(BorderLayout())
+
+        controls = JPanel(FlowLayout(FlowLayout.LEFT))
+        controls.add(JLabel("Tools:"))
+        self.fuzz_tools_field = JTextField(20)
+        self.fuzz_tools_field.setToolTipText("Comma-separated tool names; leave empty to fuzz every listed tool")
+        controls.add(self.fuzz_tools_field)
+
+        self.fuzz_category_boxes = []
+        for category in PayloadGenerator.CATEGORIES:
+            box = JCheckBox(category, True)
+            self.fuzz_category_boxes.append((category, box))
+            controls.add(box)
+
+        controls.add(JLabel("  Concurrency:"))
+        self.fuzz_concurrency_spinner = JSpinner(SpinnerNumberModel(self.config.fuzz_concurrency, 1, 256, 1))
+        self.fuzz_concurrency_spinner.setToolTipText("Calls kept in flight on the current session")
+        controls.add(self.fuzz_concurrency_spinner)
+
+        wordlist_btn = JButton("Wordlist...", actionPerformed=self._load_fuzz_wordlist)
+        wordlist_btn.setToolTipText("One payload per line, tried against every argument")
+        controls.add(wordlist_btn)
+        self.fuzz_wordlist_label = JLabel("(no wordlist)")
+        controls.add(self.fuzz_wordlist_label)
+
+        self.fuzz_start_btn = JButton("Start", actionPerformed=self._start_fuzz)
+        self.fuzz_start_btn.setBackground(Color(255, 140, 0))
+        self.fuzz_start_btn.setForeground(Color.WHITE)
+        self.fuzz_start_btn.setOpaque(True)
+        controls.add(self.fuzz_start_btn)
+        self.fuzz_stop_btn = JButton("Stop", actionPerformed=self._stop_fuzz)
+        self.fuzz_stop_btn.setEnabled(False)
+        controls.add(self.fuzz_stop_btn)
+
+        results_btns = JPanel(FlowLayout(FlowLayout.LEFT))
+        self.fuzz_model = InventoryTableModel(self.FUZZ_COLUMNS, lambda result: list(result[:9]))
+        self.fuzz_table = self._create_inventory_table(self.fuzz_model, results_btns)
+        self.fuzz_status_label = JLabel("  Double-click a result to open it in the Request Editor")
+        results_btns.add(self.fuzz_status_label)
+
+        class FuzzResultMouseHandler(MouseAdapter):
+            def __init__(self, extender):
+                self.extender = extender
+            def mouseClicked(self, event):
+                if event.getClickCount() == 2:
+                    row = self.extender.fuzz_table.rowAtPoint(event.getPoint())
+                    if row >= 0:
+                        self.extender._open_fuzz_result(row)
+        self.fuzz_table.addMouseListener(FuzzResultMouseHandler(self))
+
+        north = JPanel(BorderLayout())
+        north.add(controls, BorderLayout.NORTH)
+        north.add(results_btns, BorderLayout.SOUTH)
+        panel.add(north, BorderLayout.NORTH)
+        panel.add(JScrollPane(self.fuzz_table), BorderLayout.CENTER)
+        self.fuzzer_panel = panel
+        return panel
+
+    def _fuzz_tool(self, tool_name):
+        self.fuzz_tools_field.setText(tool_name)
+        self.main_tabs.setSelectedComponent(self.fuzzer_panel)
+
+    def _load_fuzz_wordlist(self, event):
+        chooser = JFileChooser()
+        if chooser.showOpenDialog(self.panel) != JFileChooser.APPROVE_OPTION:
             return
-        def update():
-            try:
+        path = chooser.getSelectedFile().getAbsolutePath()
+        try:
+            with open(path, "rb") as f:
+                text = f.read().decode("utf-8", "replace")
+        except Exception as e:
+            self._update_status("Could not read wordlist: %s" % str(e), "error")
+            return
+        self.fuzz_wordlist = [line.strip() for line in text.splitlines() if line.strip()]
+        self.fuzz_wordlist_label.setText("%d words" % len(self.fuzz_wordlist))
+        self._log("Loaded %d fuzzing words from %s", args=(len(self.fuzz_wordlist), path))
 
-                current_text = self.proxy_log_area.getText()
-                if force and "=== LOGGING DISABLED ===" in current_text:
-                    self.proxy_log_area.setText("")
-                self.proxy_log_area.append(time.strftime("[%H:%M:%S] ") + message + "\n")
+    def _start_fuzz(self, event):
+        if self.fuzz_campaign and not self.fuzz_campaign.is_done():
+            return
+        if not self.client.session_id:
+            self._update_status("Connect to an MCP server before fuzzing", "error")
+            return
+        names = [n.strip() for n in self.fuzz_tools_field.getText().split(",") if n.strip()]
+        tools = [self.server.tool_index.get(n) for n in names] if names else list(self.server.tools)
+        missing = [n for n, tool in zip(names, tools) if tool is None]
+        if missing:
+            self._update_status("Unknown tool: %s" % ", ".join(missing), "error")
+            return
+        if not tools:
+            self._update_status("No tools to fuzz", "error")
+            return
+        categories = [c for c, box in self.fuzz_category_boxes if box.isSelected()]
+        if not categories:
+            self._update_status("Select at least one payload category", "error")
+            return
 
-                text = self.proxy_log_area.getText()
-                lines = text.split('\n')
-                if len(lines) > self.max_log_lines:
-                    self.proxy_log_area.setText('\n'.join(lines[-self.max_log_lines:]))
-                self.proxy_log_area.setCaretPosition(self.proxy_log_area.getDocument().getLength())
-            except Exception as e:
-                self._callbacks.printOutput("MCP: Proxy log error: %s" % str(e))
+        self.config.fuzz_concurrency = self.fuzz_concurrency_spinner.getValue()
+        generator = PayloadGenerator(categories, self.fuzz_wordlist)
+        self._fuzz_results = []
+        self.fuzz_model.set_items(self._fuzz_results)
+        self.fuzz_start_btn.setEnabled(False)
+        self.fuzz_stop_btn.setEnabled(True)
+        self._update_status("Fuzzing %d tools..." % len(tools), "working")
+        self._log("Fuzz campaign: %d tools, categories %s, concurrency %d",
+                  force=True, args=(len(tools), ", ".join(categories), self.config.fuzz_concurrency))
+        self.fuzz_campaign = FuzzCampaign(self.sessions, generator.cases(tools), self.config.fuzz_concurrency,
+                                          self._fuzz_results.append, self._on_fuzz_done).start()
+
+    def _stop_fuzz(self, event):
+        if self.fuzz_campaign:
+            self.fuzz_campaign.cancel()
+
+    def _on_fuzz_done(self, stats):
+        summary = "Fuzz campaign %s: %d calls in %ss (%s/s), %s" % (
+            "stopped" if stats["cancelled"] else "finished", stats["completed"], stats["seconds"],
+            stats["per_second"], ", ".join("%s %d" % item for item in sorted(stats["outcomes"].items())))
+        def update():
+            self.fuzz_start_btn.setEnabled(True)
+            self.fuzz_stop_btn.setEnabled(False)
+            self.fuzz_model.rows_appended()
+            self.fuzz_status_label.setText("  " + summary)
         SwingUtilities.invokeLater(update)
+        self._update_status(summary, "success")
+        self._log(summary, force=True)
+
+    def _refresh_fuzz(self):
+        """Show results that arrived since the last tick (EDT only)."""
+        campaign = self.fuzz_campaign
+        if campaign is None or campaign.is_done():
+            return
+        self.fuzz_model.rows_appended()
+        stats = campaign.stats()
+        self.fuzz_status_label.setText("  %d sent, %d done, %d in flight, %s/s" % (
+            stats["sent"], stats["completed"], stats["in_flight"], stats["per_second"]))
+
+    def _open_fuzz_result(self, row):
+        result = self._fuzz_results[self.fuzz_model._index(row)]
+        request = {
+            "jsonrpc": "2.0",
+            "id": self.client.id_allocator.next_id("editor"),
+            "method": "tools/call",
+            "params": {"name": result[1], "arguments": result[9]}
+        }
+        self.editor_method.setSelectedItem("tools/call")
+        self.request_editor.setMessage(self._helpers.stringToBytes(json.dumps(request, indent=2)), True)
+        self.response_editor.setMessage(self._helpers.stringToBytes(result[10]), False)
+        self.main_tabs.setSelectedIndex(1)
+
+    def _journal_row(self, record):
+        seq, stamp, client_id, upstream_id, method, tool, status, latency, req_bytes, resp_bytes, cache = record
+        return [seq, time.strftime("%H:%M:%S", time.localtime(stamp)) + ".%03d" % (stamp % 1 * 1000),
+                "" if client_id is None else client_id, "" if upstream_id is None else upstream_id,
+                method or "", tool or "", status, latency, req_bytes, resp_bytes, cache or ""]
+
+    def _refresh_journal(self):
+        """Append journal records added since the last refresh to the table (EDT only)."""
+        journal = self.proxy.journal
+        records = journal.since(self._journal_seq)
+        if not records:
+            return
+        self._journal_seq = records[-1][0]
+        self._journal_items.extend(records)
+        # Trim in chunks so the table is rebuilt once per quarter-capacity, not per record
+        if len(self._journal_items) > journal.capacity * 5 // 4:
+            self._journal_items = self._journal_items[-journal.capacity:]
+            self.journal_model.set_items(self._journal_items)
+        else:
+            self.journal_model.rows_appended()
+        text = "  %d exchanges" % journal.seq
+        if journal.spilled:
+            text += ", %d older ones in %s" % (journal.spilled, journal.spill_file)
+        if journal.spill_error:
+            text += " (spill failed: %s)" % journal.spill_error
+        self.journal_label.setText(text)
     
+    def _proxy_log(self, message, force=False, args=None, level=None):
+        if not self.verbose_logging and not force:
+            return
+        self.proxy_log_ring.append(level or (LogRing.INFO if force else LogRing.DEBUG), message, args)
+    
+    def _toggle_bridge(self):
+        self.config.burp_bridge = self.bridge_checkbox.isSelected()
+        self._proxy_log("In-process bridge %s" % ("enabled" if self.config.burp_bridge else "disabled"), force=True)
+
     def _start_proxy(self, event):
-        if self.proxy_running:
+        if self.proxy.running:
             return
         
-        if not self.session_id:
+        if not self.client.session_id:
             JOptionPane.showMessageDialog(self.panel, 
                 "Please connect to an MCP server first before starting the proxy.",
                 "Not Connected", JOptionPane.WARNING_MESSAGE)
@@ -1487,169 +2066,28 @@ TIP: Right-click a tool in the Tools tab -> 'Send to Repeater'
                 "Error", JOptionPane.ERROR_MESSAGE)
             return
         
-        def run_proxy():
-            from java.net import ServerSocket, InetAddress, InetSocketAddress
-            
-            try:
-
-                if self.proxy_server:
-                    try:
-                        self.proxy_server.close()
-                    except:
-                        pass
-                    self.proxy_server = None
-                
-                self.proxy_server = ServerSocket()
-                self.proxy_server.setReuseAddress(True)
-                self.proxy_server.bind(InetSocketAddress(InetAddress.getByName("127.0.0.1"), port), 50)
-                self.proxy_running = True
-                
-                def update_ui():
-                    self.start_proxy_btn.setEnabled(False)
-                    self.stop_proxy_btn.setEnabled(True)
-                    self.proxy_status_label.setText("Proxy: Running on 127.0.0.1:%d" % port)
-                    self.proxy_status_label.setForeground(Color(0, 128, 0))
-
-                    self.proxy_indicator.setText("  PROXY: ON (:%d)  " % port)
-                    self.proxy_indicator.setVisible(True)
-                SwingUtilities.invokeLater(update_ui)
-
-                self._proxy_log("Proxy started on 127.0.0.1:%d" % port, force=True)
-                self._proxy_log("Send JSON-RPC requests to: http://127.0.0.1:%d/" % port, force=True)
-                
-                while self.proxy_running:
-                    try:
-                        client = self.proxy_server.accept()
-                        handler_thread = threading.Thread(target=self._handle_proxy_request, args=(client,))
-                        handler_thread.setDaemon(True)
-                        handler_thread.start()
-                    except Exception as e:
-                        if self.proxy_running:
-                            self._proxy_log("Accept error: %s" % str(e))
-                        break
-                        
-            except Exception as e:
-                self._callbacks.printOutput("MCP: Failed to start proxy: %s" % str(e))
-                self._proxy_log("Failed to start proxy: %s" % str(e), force=True)
-                self.proxy_running = False
-        
-        t = threading.Thread(target=run_proxy)
-        t.setDaemon(True)
-        t.start()
-    
-    def _handle_proxy_request(self, client):
-        from java.io import BufferedReader, InputStreamReader, BufferedOutputStream
-        
         try:
-            reader = BufferedReader(InputStreamReader(client.getInputStream()))
-            out = BufferedOutputStream(client.getOutputStream())
-
-            request_line = reader.readLine()
-            if not request_line:
-                client.close()
-                return
-            
-            self._proxy_log("Request: %s" % request_line)
-
-            headers = {}
-            content_length = 0
-            while True:
-                line = reader.readLine()
-                if not line or line.strip() == "":
-                    break
-                if ":" in line:
-                    key, val = line.split(":", 1)
-                    headers[key.strip().lower()] = val.strip()
-                    if key.strip().lower() == "content-length":
-                        content_length = int(val.strip())
-
-            body = ""
-            if content_length > 0:
-                chars = []
-                for i in range(content_length):
-                    c = reader.read()
-                    if c == -1:
-                        break
-                    chars.append(chr(c))
-                body = "".join(chars)
-            
-            if not body:
-                self._send_proxy_response(out, 400, {"error": "No JSON-RPC body"})
-                client.close()
-                return
-            
-            try:
-                request_json = json.loads(body)
-            except:
-                self._send_proxy_response(out, 400, {"error": "Invalid JSON"})
-                client.close()
-                return
-            
-            self._proxy_log("JSON-RPC: method=%s id=%s" % (
-                request_json.get("method", "?"), request_json.get("id", "?")))
-
-            response_holder = {"response": None, "done": False}
-            
-            def on_response(resp):
-                response_holder["response"] = resp
-                response_holder["done"] = True
-            
-            self._send_request_async(
-                request_json.get("method"),
-                request_json.get("params", {}),
-                on_response,
-                timeout=self.request_timeout,
-                req_id=request_json.get("id", "proxy_req_%d" % int(time.time() * 1000))
-            )
-
-            start = time.time()
-            while not response_holder["done"] and time.time() - start < self.request_timeout:
-                time.sleep(0.1)
-            
-            if response_holder["response"]:
-                self._proxy_log("Response received for id=%s" % request_json.get("id", "?"))
-                self._send_proxy_response(out, 200, response_holder["response"])
-            else:
-                self._proxy_log("Timeout for request id=%s" % request_json.get("id", "?"))
-                self._send_proxy_response(out, 504, {
-                    "jsonrpc": "2.0",
-                    "id": request_json.get("id"),
-                    "error": {"code": -32000, "message": "MCP request timeout"}
-                })
-            
-            client.close()
-            
+            self.proxy.start(port)
         except Exception as e:
-            self._proxy_log("Handler error: %s" % str(e))
-            try:
-                client.close()
-            except:
-                pass
-    
-    def _send_proxy_response(self, out, status_code, response_body):
-        body_json = json.dumps(response_body, indent=2)
-        body_bytes = body_json.encode("utf-8")
-        
-        status_text = {200: "OK", 400: "Bad Request", 504: "Gateway Timeout"}.get(status_code, "Error")
-        
-        response = "HTTP/1.1 %d %s\r\n" % (status_code, status_text)
-        response += "Content-Type: application/json\r\n"
-        response += "Content-Length: %d\r\n" % len(body_bytes)
-        response += "Connection: close\r\n"
-        response += "\r\n"
+            self._callbacks.printOutput("MCP: Failed to start proxy: %s" % str(e))
+            self._proxy_log("Failed to start proxy: %s" % str(e), force=True)
+            return
         
-        out.write(response.encode("utf-8"))
-        out.write(body_bytes)
-        out.flush()
+        def update_ui():
+            self.start_proxy_btn.setEnabled(False)
+            self.stop_proxy_btn.setEnabled(True)
+            self.proxy_status_label.setText("Proxy: Running on 127.0.0.1:%d" % port)
+            self.proxy_status_label.setForeground(Color(0, 128, 0))
+
+            self.proxy_indicator.setText("  PROXY: ON (:%d)  " % port)
+            self.proxy_indicator.setVisible(True)
+        SwingUtilities.invokeLater(update_ui)
+
+        self._proxy_log("Proxy started on 127.0.0.1:%d" % port, force=True)
+        self._proxy_log("Send JSON-RPC requests to: http://127.0.0.1:%d/" % port, force=True)
     
     def _stop_proxy(self, event):
-        self.proxy_running = False
-        if self.proxy_server:
-            try:
-                self.proxy_server.close()
-            except:
-                pass
-            self.proxy_server = None
+        self.proxy.stop()
         
         def update_ui():
             self.start_proxy_btn.setEnabled(True)
@@ -1664,7 +2102,7 @@ TIP: Right-click a tool in the Tools tab -> 'Send to Repeater'
 
     
     def _send_to_repeater(self, tool_name):
-        tool = next((t for t in self.tools if t["name"] == tool_name), None)
+        tool = self.server.tool_index.get(tool_name)
         if not tool:
             return
         
@@ -1673,7 +2111,7 @@ TIP: Right-click a tool in the Tools tab -> 'Send to Repeater'
         
         request = {
             "jsonrpc": "2.0",
-            "id": "repeater_%d" % int(time.time() * 1000),
+            "id": self.client.id_allocator.next_id("repeater"),
             "method": "tools/call",
             "params": {
                 "name": tool_name,
@@ -1688,19 +2126,23 @@ TIP: Right-click a tool in the Tools tab -> 'Send to Repeater'
             proxy_port = int(self.proxy_port_field.getText())
         except:
             pass
+        route = self.servers.path_for(self.server)
         
         def do_send():
             try:
 
-                if not self.proxy_running and self.session_id:
+                bridged = self.config.burp_bridge
+                if not bridged and not self.proxy.running and self.client.session_id:
                     self._log("Auto-starting Virtual Proxy for Repeater...")
                     self._start_proxy(None)
                     time.sleep(0.5)
 
-                http_request = "POST / HTTP/1.1\r\n"
+                http_request = "POST %s HTTP/1.1\r\n" % route
                 http_request += "Host: 127.0.0.1:%d\r\n" % proxy_port
                 http_request += "Content-Type: application/json\r\n"
                 http_request += "Accept: application/json\r\n"
+                if bridged:
+                    http_request += "%s: 1\r\n" % BurpBridge.MARKER
                 http_request += "Content-Length: %d\r\n" % len(request_json)
                 http_request += "\r\n"
                 http_request += request_json
@@ -1711,7 +2153,7 @@ TIP: Right-click a tool in the Tools tab -> 'Send to Repeater'
                     "MCP: " + tool_name
                 )
                 
-                self._log("Sent tool '%s' to Repeater via proxy" % tool_name)
+                self._log("Sent tool '%s' to Repeater via %s" % (tool_name, "in-process bridge" if bridged else "proxy"))
                 self._update_status("Sent to Repeater: " + tool_name, "success")
                 
             except Exception as e:
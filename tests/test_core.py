@@ -0,0 +1,526 @@
+# -*- coding: utf-8 -*-
+# MCP Inspector - tests for the headless core
+# Author: Manjesh S
+#
+# Run on a plain CPython with FakeCallbacks standing in for Burp and
+# bench/mock_server.py for the MCP server:
+#
+#     python -m pytest tests
+#     python -m unittest discover tests
+
+import json
+import os
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+
+from fake_burp import FakeCallbacks
+from mcp_core import (AdaptiveLimiter, BurpBridge, ChunkedDecoder, HistoryStore, HttpConnectionPool,
+                      HttpParseError, HttpRequestReader, MCPClient, MCPConfig, NestedJsonUnescaper,
+                      ResponseCache, SSEParser, TimeoutScheduler, ToolIndex, VirtualProxyServer)
+from mock_server import MockMCPServer
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+class ChunkSocket(object):
+    """Socket stand-in that hands out pre-cut chunks from recv."""
+
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+        self.sent = []
+
+    def recv(self, size):
+        return self.chunks.pop(0) if self.chunks else b""
+
+    def sendall(self, data):
+        self.sent.append(data)
+
+
+class ScriptedServer(object):
+    """Local TCP server; ``handler(conn, n)`` answers the n-th request and returns False to close."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(8)
+        self.port = self._sock.getsockname()[1]
+        self._running = True
+        thread = threading.Thread(target=self._accept)
+        thread.daemon = True
+        thread.start()
+
+    def _accept(self):
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except (IOError, OSError):
+                return
+            thread = threading.Thread(target=self._serve, args=(conn,))
+            thread.daemon = True
+            thread.start()
+
+    def _serve(self, conn):
+        try:
+            while True:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    piece = conn.recv(65536)
+                    if not piece:
+                        return
+                    data += piece
+                head, body = data.split(b"\r\n\r\n", 1)
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                        while len(body) < length:
+                            body += conn.recv(65536)
+                self.requests += 1
+                if not self.handler(conn, self.requests):
+                    return
+        finally:
+            conn.close()
+
+    def stop(self):
+        self._running = False
+        self._sock.close()
+
+
+def read_http_response(stream):
+    """(status, headers, body) of one Content-Length response from a file object."""
+    status = int(stream.readline().split(b" ")[1])
+    headers = {}
+    while True:
+        line = stream.readline().strip()
+        if not line:
+            break
+        name, value = line.decode("iso-8859-1").split(":", 1)
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, stream.read(int(headers.get("content-length", 0)))
+
+
+OK = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok"
+
+
+class HttpConnectionPoolTest(unittest.TestCase):
+
+    def tearDown(self):
+        self.pool.close_all()
+        self.server.stop()
+
+    def _request(self):
+        return self.pool.request(False, "127.0.0.1", self.server.port, "POST", "/mcp", {}, b"{}", timeout=5)
+
+    def test_reuses_keep_alive_connection(self):
+        self.server = ScriptedServer(lambda conn, n: conn.sendall(OK) or True)
+        self.pool = HttpConnectionPool()
+        self.assertEqual(self._request()[0], 200)
+        self.assertEqual(self._request()[0], 200)
+        self.assertEqual((self.pool.created, self.pool.reused), (1, 1))
+
+    def test_retries_stale_connection_closed_before_response(self):
+        # The second request lands on a connection the server closes unanswered
+        def handler(conn, n):
+            if n == 1:
+                conn.sendall(OK)
+                return True
+            if n == 2:
+                return False
+            conn.sendall(OK)
+            return True
+        self.server = ScriptedServer(handler)
+        self.pool = HttpConnectionPool()
+        self._request()
+        self.assertEqual(self._request()[0], 200)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_no_retry_once_response_bytes_arrived(self):
+        def handler(conn, n):
+            if n == 1:
+                conn.sendall(OK)
+                return True
+            conn.sendall(b"HTTP/1.1 2")
+            return False
+        self.server = ScriptedServer(handler)
+        self.pool = HttpConnectionPool()
+        self._request()
+        self.assertRaises(httplib.HTTPException, self._request)
+        self.assertEqual(self.server.requests, 2)
+
+
+class ChunkedDecoderTest(unittest.TestCase):
+
+    def test_decodes_split_chunks_and_keeps_remainder(self):
+        decoder = ChunkedDecoder()
+        body = decoder.feed(b"4\r\nWi") + decoder.feed(b"ki\r\n5;ext=1\r\npedia\r\n0\r\n\r\nNEXT")
+        self.assertEqual(body, b"Wikipedia")
+        self.assertTrue(decoder.finished)
+        self.assertEqual(decoder.remainder(), b"NEXT")
+
+    def test_rejects_chunk_without_trailing_crlf(self):
+        self.assertRaises(ValueError, ChunkedDecoder().feed, b"3\r\nabcd\r\n0\r\n\r\n")
+
+
+class HttpRequestReaderTest(unittest.TestCase):
+
+    def test_reads_pipelined_requests_from_split_reads(self):
+        first = b'POST /mcp HTTP/1.1\r\nContent-Length: 7\r\n\r\n{"a":1}'
+        second = b'POST /mcp HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n3\r\n{}\n\r\n0\r\n\r\n'
+        data = first + second
+        reader = HttpRequestReader(ChunkSocket(data[:20], data[20:61], data[61:]))
+        method, path, version, headers, body = reader.read_request()
+        self.assertEqual((method, path, body), ("POST", "/mcp", '{"a":1}'))
+        self.assertEqual(reader.read_request()[4], "{}\n")
+        self.assertIsNone(reader.read_request())
+
+    def test_bad_chunk_framing_is_a_400(self):
+        reader = HttpRequestReader(ChunkSocket(
+            b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n2\r\nabc\r\n0\r\n\r\n"))
+        with self.assertRaises(HttpParseError) as caught:
+            reader.read_request()
+        self.assertEqual(caught.exception.status, 400)
+
+    def test_oversized_body_is_a_413(self):
+        reader = HttpRequestReader(ChunkSocket(b"POST / HTTP/1.1\r\nContent-Length: 100\r\n\r\n"),
+                                   max_body_bytes=10)
+        with self.assertRaises(HttpParseError) as caught:
+            reader.read_request()
+        self.assertEqual(caught.exception.status, 413)
+
+
+class SSEParserTest(unittest.TestCase):
+
+    def test_events_across_arbitrary_splits(self):
+        parser = SSEParser()
+        stream = b"id: 7\r\nretry: 1500\r\nevent: progress\r\ndata: {\"a\":1}\r\n\r\n: comment\n\ndata: x\ndata: y\n\n"
+        events = []
+        for i in range(len(stream)):
+            events.extend(parser.feed(stream[i:i + 1]))
+        self.assertEqual(events, [("progress", ['{"a":1}']), (None, ["x", "y"])])
+        self.assertEqual((parser.last_event_id, parser.retry_ms), ("7", 1500))
+
+
+class TimeoutSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.expired = []
+        self.scheduler = TimeoutScheduler(lambda key: self.expired.append((key, time.time())))
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test_expires_in_deadline_order_and_skips_cancelled(self):
+        self.scheduler.schedule("late", 0.2, 10, False)
+        self.scheduler.schedule("early", 0.05, 10, False)
+        self.scheduler.schedule("cancelled", 0.1, 10, False)
+        self.scheduler.cancel("cancelled")
+        self.assertTrue(wait_for(lambda: len(self.expired) == 2))
+        self.assertEqual([key for key, _ in self.expired], ["early", "late"])
+
+    def test_progress_extends_deadline_up_to_the_hard_limit(self):
+        started = time.time()
+        self.scheduler.schedule("req", 0.15, 0.4, True)
+        for _ in range(10):
+            time.sleep(0.05)
+            self.scheduler.touch("req")
+        self.assertTrue(wait_for(lambda: self.expired))
+        self.assertAlmostEqual(self.expired[0][1] - started, 0.4, delta=0.15)
+
+
+class AdaptiveLimiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.errors = []
+        self.limiter = AdaptiveLimiter(initial=4, max_limit=8, on_error=self.errors.append)
+
+    def tearDown(self):
+        self.limiter.shutdown()
+
+    def test_queues_beyond_the_limit_and_drains_on_release(self):
+        tokens = []
+        for _ in range(6):
+            self.assertTrue(self.limiter.submit(tokens.append))
+        self.assertEqual((len(tokens), self.limiter.queued_count()), (4, 2))
+        self.limiter.release(tokens[0], 0.01)
+        self.assertTrue(wait_for(lambda: len(tokens) == 5))
+
+    def test_overload_halves_the_limit(self):
+        tokens = []
+        self.limiter.submit(tokens.append)
+        self.limiter.release(tokens[0], 0.01, "overload")
+        self.assertEqual(int(self.limiter.limit), 2)
+
+    def test_raising_task_returns_its_permit(self):
+        limiter = AdaptiveLimiter(initial=1, on_error=self.errors.append)
+        tokens = []
+        limiter.submit(tokens.append)
+
+        def boom(token):
+            raise ValueError("boom")
+        limiter.submit(boom)
+        limiter.release(tokens[0], 0.01)
+        self.assertTrue(wait_for(lambda: self.errors))
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertIn("boom", self.errors[0])
+        limiter.shutdown()
+
+
+class HistoryStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "history.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _store(self, **kwargs):
+        kwargs.setdefault("memory_entries", 0)
+        return HistoryStore(self.path, **kwargs)
+
+    def _requests(self, store):
+        return [store.get(i)[1] for i in range(len(store))]
+
+    def test_round_trip_stores_repeated_bodies_once(self):
+        store = self._store(memory_entries=2)
+        for i in range(5):
+            store.add("request %d" % i, "same response")
+        store.close()
+        with open(self.path, "rb") as f:
+            data = f.read()
+        # Five distinct requests and one shared response
+        self.assertEqual(len(re.findall(b"B [0-9a-f]{40} [0-9]+\n", data)), 6)
+        store = self._store()
+        self.assertEqual(store.load(), 5)
+        self.assertEqual(store.get(4)[1:], ("request 4", "same response"))
+
+    def test_torn_tail_is_compacted_before_appending(self):
+        store = self._store()
+        for i in range(3):
+            store.add("a%d" % i, "r%d" % i)
+        store.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 5)
+
+        store = self._store()
+        self.assertEqual(store.load(), 2)
+        for i in range(3):
+            store.add("b%d" % i, "r%d" % i)
+        store.close()
+
+        store = self._store()
+        self.assertEqual(store.load(), 5)
+        self.assertEqual(self._requests(store), ["a0", "a1", "b0", "b1", "b2"])
+
+    def test_entries_spilled_before_load_are_not_indexed_twice(self):
+        store = self._store()
+        store.add("old", "r")
+        store.close()
+        store = self._store()
+        store.add("new", "r")
+        self.assertEqual(store.load(), 1)
+        self.assertEqual(self._requests(store), ["old", "new"])
+
+    def test_trimmed_entries_are_compacted_away(self):
+        store = self._store(max_entries=10)
+        store.compact_min_dropped = 5
+        for i in range(200):
+            store.add("request %d" % i, "response %d" % i)
+        store.close()
+        self.assertLess(os.path.getsize(self.path), 2 * 20 * 64)
+        store = self._store(max_entries=10)
+        self.assertEqual(store.load(), 10)
+        self.assertEqual(store.get(0)[1], "request 190")
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_ttl_expiry_and_lru_bound(self):
+        cache = ResponseCache({"tools/list": 0.1}, max_entries=2)
+        keys = [cache.make_key("u", "s", "tools/list", {"cursor": str(i)}) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, {"jsonrpc": "2.0", "id": i, "result": {"page": i}})
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual(cache.get(keys[2], req_id=99), {"jsonrpc": "2.0", "id": 99, "result": {"page": 2}})
+        time.sleep(0.15)
+        self.assertIsNone(cache.get(keys[2]))
+
+    def test_only_configured_methods_and_results_are_cached(self):
+        cache = ResponseCache({"tools/list": 60})
+        self.assertFalse(cache.cacheable("tools/call"))
+        key = cache.make_key("u", "s", "tools/list", {})
+        cache.put(key, {"jsonrpc": "2.0", "id": 1, "error": {"code": -1}})
+        self.assertEqual(len(cache), 0)
+
+
+class ToolIndexTest(unittest.TestCase):
+
+    def test_search_by_name_parts_description_and_schema(self):
+        index = ToolIndex()
+        index.add([
+            {"name": "readFile", "description": "Read a file from disk",
+             "inputSchema": {"properties": {"path": {"type": "string"}}}},
+            {"name": "http_get", "description": "Fetch a URL",
+             "inputSchema": {"properties": {"options": {"properties": {"timeoutMs": {}}}}}},
+        ])
+        self.assertEqual(index.get("http_get")["description"], "Fetch a URL")
+        self.assertEqual(index.search("file"), [0])
+        self.assertEqual(index.search("HTTP fetch"), [1])
+        self.assertEqual(index.search("timeout"), [1])
+        self.assertEqual(index.search("rea pa"), [0])
+        self.assertEqual(index.search("read url"), [])
+        self.assertEqual(index.search(""), [0, 1])
+
+
+class NestedJsonUnescaperTest(unittest.TestCase):
+
+    def test_expands_nested_and_escaped_strings(self):
+        inner = json.dumps({"deep": json.dumps([1, 2])})
+        value = {"content": [{"text": inner}, {"text": json.dumps(inner)[1:-1]}, {"text": "{not json}"}]}
+        result, stats = NestedJsonUnescaper().unescape(value)
+        self.assertEqual(result["content"][0]["text"], {"deep": [1, 2]})
+        self.assertEqual(result["content"][1]["text"], {"deep": [1, 2]})
+        self.assertEqual(result["content"][2]["text"], "{not json}")
+        self.assertEqual(stats["max_depth"], 2)
+
+    def test_depth_budget(self):
+        text = "[1]"
+        for _ in range(5):
+            text = json.dumps([text])
+        _, stats = NestedJsonUnescaper(max_depth=3).unescape(text)
+        self.assertEqual(stats["max_depth"], 3)
+
+
+class MockServerTest(unittest.TestCase):
+    """MCPClient, the Virtual Proxy and the bridge against bench/mock_server.py."""
+
+    mode = "json"
+
+    def setUp(self):
+        self.server = MockMCPServer(("127.0.0.1", 0), self.mode, inventory_size=5, page_size=2).start()
+        self.callbacks = FakeCallbacks(quiet=True, timeout=10)
+        self.config = MCPConfig(self.server.url, request_timeout=10)
+        self.client = MCPClient(self.config, self.callbacks)
+        self.assertIn("result", self.client.initialize())
+        self.proxy = None
+
+    def tearDown(self):
+        if self.proxy:
+            self.proxy.shutdown()
+        self.client.shutdown()
+        self.server.stop()
+
+    def _start_proxy(self):
+        self.proxy = VirtualProxyServer(self.client, self.config)
+        self.proxy.start(0)
+        conn = socket.create_connection(("127.0.0.1", self.proxy.port), 5)
+        self.addCleanup(conn.close)
+        return conn, conn.makefile("rb")
+
+    def _post(self, message):
+        body = json.dumps(message).encode("utf-8")
+        return (b"POST /mcp HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                b"Content-Length: %d\r\n\r\n" % len(body)) + body
+
+    def test_sync_call(self):
+        if self.mode != "json":
+            self.skipTest("send_request_sync reads the reply from the POST body only")
+        resp = self.client.send_request_sync("tools/call", {"name": "echo", "arguments": {"text": "hi"}})
+        self.assertIn("hi", resp["result"]["content"][0]["text"])
+
+    def test_pipelined_proxy_requests_keep_client_ids(self):
+        conn, stream = self._start_proxy()
+        ids = ["first", 2, "third"]
+        conn.sendall(b"".join(self._post({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                                          "params": {"name": "echo", "arguments": {"n": n}}})
+                              for n, i in enumerate(ids)))
+        for n, i in enumerate(ids):
+            status, _, body = read_http_response(stream)
+            reply = json.loads(body.decode("utf-8"))
+            self.assertEqual((status, reply["id"]), (200, i))
+            self.assertIn('"n": %d' % n, reply["result"]["content"][0]["text"])
+
+    def test_proxy_cache_miss_hit_then_invalidation(self):
+        conn, stream = self._start_proxy()
+
+        def list_tools(req_id):
+            conn.sendall(self._post({"jsonrpc": "2.0", "id": req_id, "method": "tools/list"}))
+            status, headers, body = read_http_response(stream)
+            return headers.get("x-mcp-cache"), json.loads(body.decode("utf-8"))["id"]
+
+        self.assertEqual(list_tools(1), ("MISS", 1))
+        self.assertEqual(list_tools(2), ("HIT", 2))
+        self.client._deliver_messages([{"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}])
+        self.assertEqual(list_tools(3), ("MISS", 3))
+
+    def test_bridge_restores_the_callers_id(self):
+        self.config.burp_bridge = True
+
+        class Listener(object):
+            def __init__(self, bridge):
+                self.bridge = bridge
+
+            def processHttpMessage(self, tool_flag, is_request, message_info):
+                self.bridge.process_http_message(tool_flag, is_request, message_info)
+
+        helpers = self.callbacks.getHelpers()
+        self.callbacks.registerHttpListener(Listener(BurpBridge(self.client, self.config, helpers)))
+        body = json.dumps({"jsonrpc": "2.0", "id": "repeater-1", "method": "tools/call",
+                           "params": {"name": "echo", "arguments": {}}})
+        request = ("POST / HTTP/1.1\r\nHost: 127.0.0.1:8899\r\n%s: 1\r\nContent-Length: %d\r\n\r\n%s"
+                   % (BurpBridge.MARKER, len(body), body))
+        # The marked request is redirected upstream, so this port is never contacted
+        service = helpers.buildHttpService("127.0.0.1", 8899, False)
+        response = self.callbacks.send_from_tool(self.callbacks.TOOL_REPEATER, service, request).getResponse()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        self.assertTrue(head.startswith(b"HTTP/1.1 200"))
+        self.assertEqual(json.loads(payload.decode("utf-8"))["id"], "repeater-1")
+
+
+class SSEMockServerTest(MockServerTest):
+    """The same checks with replies delivered over the SSE stream."""
+
+    mode = "sse"
+
+    def setUp(self):
+        MockServerTest.setUp(self)
+        self.assertTrue(wait_for(lambda: self.client.sse_socket is not None))
+
+    def test_list_all_follows_cursors(self):
+        done = threading.Event()
+        pages = []
+        outcome = []
+        self.client.list_all("tools/list", "tools", pages.append,
+                             lambda total, error: (outcome.append((total, error)), done.set()))
+        self.assertTrue(done.wait(10))
+        self.assertEqual(outcome[0][0], 5)
+        self.assertFalse(outcome[0][1])
+        self.assertEqual([t["name"] for page in pages for t in page][:2], ["echo", "tool_00001"])
+
+
+if __name__ == "__main__":
+    unittest.main()